@@ -0,0 +1,31 @@
+"""Base class for benchmark suites.
+
+Benchmarks are not collected by default test run (pattern "test*.py").
+Run them with:
+    python manage.py test benchmarks --pattern="bench_*.py"
+"""
+import json
+import time
+import tracemalloc
+
+from unit_tests.base import FunctionalTest
+
+
+class BenchmarkTestCase(FunctionalTest):
+
+    def measure(self, func, *args, **kwargs):
+        """Call func and return tuple (result, seconds, peak memory in bytes).
+        """
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        return result, seconds, peak
+
+    def report(self, name, **results):
+        """Print benchmark results as single line of JSON."""
+        print(json.dumps(dict(benchmark=name, **results), sort_keys=True))
@@ -0,0 +1,45 @@
+from benchmarks.base import BenchmarkTestCase
+from robjects.models import Robject
+from robjects.views import ExportExcelView
+
+
+class ExcelExportBenchmark(BenchmarkTestCase):
+    ROWS_COUNTS = [1000, 4000, 16000]
+    NOTES = "<p>Robject {} <strong>notes</strong> with some markup.</p>"
+
+    def create_robjects(self, proj, start, stop):
+        Robject.objects.bulk_create(
+            Robject(project=proj, name=f"robject_{idx}",
+                    notes=self.NOTES.format(idx), ligand=f"ligand_{idx}")
+            for idx in range(start, stop))
+
+    def export(self, queryset, stream):
+        view = ExportExcelView()
+        view.excel_stream_threshold = 0 if stream else None
+        response = view.export_to_excel(
+            queryset, is_relation=True, one_to_one=True, many_to_one=True,
+            exclude_fields=['sample'])
+        # consume response the way WSGI server does
+        if response.streaming:
+            return sum(len(chunk) for chunk in response.streaming_content)
+        return len(response.content)
+
+    def test_streaming_export_memory_stays_flat(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        peaks = {"in_memory": [], "streaming": []}
+        created = 0
+        for rows_count in self.ROWS_COUNTS:
+            self.create_robjects(proj, created, rows_count)
+            created = rows_count
+            qs = Robject.objects.filter(project=proj)
+            for mode, stream in (("in_memory", False), ("streaming", True)):
+                size, seconds, peak = self.measure(self.export, qs, stream)
+                peaks[mode].append(peak)
+                self.report("excel_export", mode=mode, rows=rows_count,
+                            seconds=round(seconds, 3), peak_bytes=peak,
+                            file_bytes=size)
+
+        # in memory workbook grows with rows, streaming one stays bounded
+        self.assertLess(peaks["streaming"][-1], peaks["in_memory"][-1])
+        growth = peaks["streaming"][-1] / peaks["streaming"][0]
+        self.assertLess(growth, self.ROWS_COUNTS[-1] / self.ROWS_COUNTS[0])
@@ -0,0 +1,76 @@
+import difflib
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+
+from benchmarks.base import BenchmarkTestCase
+from tools.diff import diff_text
+from tools.diff import render_inline_diff
+from tools.history import DiffField
+from tools.history import get_inline_diff
+
+
+def mutate(sequence, mutations, rng):
+    """Return sequence with given number of random point mutations."""
+    sequence = list(sequence)
+    for _ in range(mutations):
+        idx = rng.randrange(len(sequence))
+        if sequence[idx] != "\n":
+            sequence[idx] = rng.choice("ACGT")
+    return "".join(sequence)
+
+
+class HistoryDiffBenchmark(BenchmarkTestCase):
+    SIZE = 100 * 1024
+    MUTATIONS = (1, 10, 100, 1000, 10000)
+
+    def setUp(self):
+        self.rng = random.Random(0)
+        self.sequence = "".join(
+            self.rng.choice("ACGT") for _ in range(self.SIZE))
+        # 60 chars per line, like FASTA files
+        self.lines = "\n".join(self.sequence[i:i + 60]
+                               for i in range(0, self.SIZE, 60))
+
+    def diff_kwargs(self):
+        return dict(max_edits=settings.HISTORY_DIFF_MAX_EDITS,
+                    context=settings.HISTORY_DIFF_CONTEXT)
+
+    def test_inline_diff_of_100kb_sequence(self):
+        for name, old in (("single_line", self.sequence),
+                          ("fasta_lines", self.lines)):
+            for mutations in self.MUTATIONS:
+                new = mutate(old, mutations, self.rng)
+                html, seconds, peak = self.measure(
+                    render_inline_diff, old, new, **self.diff_kwargs())
+                chunks = diff_text(old, new, settings.HISTORY_DIFF_MAX_EDITS)
+                changed = sum(len(text) for tag, text in chunks
+                              if tag != "equal")
+                self.report("history_inline_diff", value=name,
+                            size=len(old), mutations=mutations,
+                            seconds=round(seconds, 4), peak_bytes=peak,
+                            html_bytes=len(html), changed_chars=changed,
+                            full_values_bytes=len(old) + len(new))
+
+    def test_difflib_reference(self):
+        # difflib by characters is too slow for 100 kb, compare by lines
+        old = self.lines
+        for mutations in self.MUTATIONS:
+            new = mutate(old, mutations, self.rng)
+            matcher = difflib.SequenceMatcher(
+                None, old.splitlines(True), new.splitlines(True))
+            _, seconds, peak = self.measure(matcher.get_opcodes)
+            self.report("history_difflib_lines_reference", size=len(old),
+                        mutations=mutations, seconds=round(seconds, 4),
+                        peak_bytes=peak)
+
+    def test_cached_inline_diff(self):
+        cache.clear()
+        new = mutate(self.sequence, 100, self.rng)
+        diff_object = DiffField("ref_seq", new, self.sequence)
+        _, first, _ = self.measure(get_inline_diff, 2, 1, diff_object)
+        _, cached, _ = self.measure(get_inline_diff, 2, 1, diff_object)
+        self.report("history_inline_diff_cache", size=len(self.sequence),
+                    mutations=100, first_seconds=round(first, 4),
+                    cached_seconds=round(cached, 6))
@@ -0,0 +1,41 @@
+import os
+from multiprocessing import get_context
+
+import django
+
+from benchmarks.base import BenchmarkTestCase
+from robjects.models import Robject
+from robjects.views import RobjectPDFeView
+
+
+class PdfExportBenchmark(BenchmarkTestCase):
+    ROBJECTS_COUNT = 48
+    SEQUENCE = "<p>" + "ACGT" * 500 + "</p>"
+
+    def export(self, queryset, pool=None):
+        view = RobjectPDFeView()
+        view.pdf_parallel_threshold = None if pool is None else 0
+        view.get_pdf_pool = lambda: pool
+        return view.export_to_pdf(queryset, create_date="2017-11-24")
+
+    def test_parallel_pdf_export_scales_with_cores(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        Robject.objects.bulk_create(
+            Robject(project=proj, name=f"robject_{idx}", author=user,
+                    ref_seq=self.SEQUENCE, mod_seq=self.SEQUENCE)
+            for idx in range(self.ROBJECTS_COUNT))
+        queryset = Robject.objects.filter(project=proj)
+
+        _, single_job, _ = self.measure(self.export, queryset)
+        self.report("pdf_export", mode="single_job",
+                    robjects=self.ROBJECTS_COUNT, seconds=round(single_job, 3))
+        processes = 1
+        while processes <= os.cpu_count():
+            # pools are started before measure, like export jobs pool
+            with get_context("spawn").Pool(
+                    processes, initializer=django.setup) as pool:
+                _, seconds, _ = self.measure(self.export, queryset, pool)
+            self.report("pdf_export", mode="parallel", processes=processes,
+                        robjects=self.ROBJECTS_COUNT, seconds=round(seconds, 3),
+                        speedup=round(single_job / seconds, 2))
+            processes *= 2
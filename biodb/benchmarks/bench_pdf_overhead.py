@@ -0,0 +1,30 @@
+import timeit
+from django.template.loader import get_template
+from weasyprint import CSS
+
+from benchmarks.base import BenchmarkTestCase
+from projects.mixins import get_pdf_template
+from projects.mixins import get_stylesheet
+from robjects.views import RobjectPDFeView
+
+
+class PdfRequestOverheadBenchmark(BenchmarkTestCase):
+    NUMBER = 50
+
+    def test_stylesheet_and_template_loading_overhead(self):
+        view = RobjectPDFeView()
+        stylesheet_path = view.get_pdf_stylesheet_path()
+
+        def uncached():
+            CSS(stylesheet_path)
+            get_template(view.pdf_template_name)
+
+        def cached():
+            get_stylesheet(stylesheet_path)
+            get_pdf_template(view.pdf_template_name)
+
+        before = timeit.timeit(uncached, number=self.NUMBER) / self.NUMBER
+        after = timeit.timeit(cached, number=self.NUMBER) / self.NUMBER
+        self.report("pdf_request_overhead", requests=self.NUMBER,
+                    before_ms=round(before * 1000, 3),
+                    after_ms=round(after * 1000, 3))
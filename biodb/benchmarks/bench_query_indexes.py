@@ -0,0 +1,104 @@
+import os
+import statistics
+import time
+
+from django.db import connection
+
+from benchmarks.base import BenchmarkTestCase
+from projects.models import Project
+from robjects.compaction import chunks
+from robjects.compaction import get_snapshot_values
+from robjects.models import Robject
+from robjects.models import Tag
+from samples.models import Sample
+
+# EXPLAIN statements of database vendors
+EXPLAIN_PREFIXES = {"sqlite": "EXPLAIN QUERY PLAN", "postgresql": "EXPLAIN",
+                    "mysql": "EXPLAIN"}
+
+
+def explain(queryset):
+    """Return query plan of queryset as list of strings."""
+    sql, params = queryset.query.sql_with_params()
+    prefix = EXPLAIN_PREFIXES.get(connection.vendor, "EXPLAIN")
+    with connection.cursor() as cursor:
+        cursor.execute(f"{prefix} {sql}", params)
+        return [" ".join(str(column) for column in row)
+                for row in cursor.fetchall()]
+
+
+class QueryIndexesBenchmark(BenchmarkTestCase):
+    # 1M rows take minutes to create, limit sizes with environment variable
+    SIZES = tuple(int(size) for size in os.environ.get(
+        "BENCHMARK_INDEX_SIZES", "10000,100000,1000000").split(","))
+    PROJECTS = 10
+    REPEAT = 20
+    BATCH_SIZE = 10000
+
+    def add_rows(self, projects, start, stop):
+        """Create robjects (with sample and historical record) and tags
+        with numbers from start to stop spread over projects."""
+        history_model = Robject.history.model
+        statuses = [status for status, _ in Sample.STATUS_CHOICES]
+        for batch in chunks(range(start, stop), self.BATCH_SIZE):
+            last_pk = Robject.objects.values_list("pk", flat=True).last() or 0
+            Robject.objects.bulk_create(
+                Robject(name=f"robject_{idx}",
+                        project=projects[idx % len(projects)])
+                for idx in batch)
+            robjects = list(Robject.objects.filter(pk__gt=last_pk))
+            Sample.objects.bulk_create(
+                Sample(robject=robject, status=statuses[idx % len(statuses)])
+                for idx, robject in enumerate(robjects))
+            history_model.objects.bulk_create(
+                history_model(history_type="+",
+                              history_date=robject.create_date,
+                              **get_snapshot_values(robject))
+                for robject in robjects)
+            Tag.objects.bulk_create(
+                Tag(name=f"tag_{idx}", project=projects[idx % len(projects)])
+                for idx in batch if idx % 100 == 0)
+
+    def get_querysets(self, proj, robject_id):
+        return {
+            "robjects_of_project": Robject.objects.filter(
+                project=proj).order_by("id")[:50],
+            "newest_robjects_of_project": Robject.objects.filter(
+                project=proj).order_by("-create_date")[:50],
+            "samples_of_project_by_status": Sample.objects.filter(
+                robject__project=proj, status=Sample.COMPLETED)[:50],
+            "tags_of_project": Tag.objects.filter(
+                project__name=proj.name).order_by("name"),
+            # query of tags autocomplete (see robjects.views)
+            "tags_of_project_by_prefix": Tag.objects.filter(
+                project__name=proj.name, name__startswith="tag_1").order_by(
+                "name")[:21],
+            "robject_history": Robject.history.model.objects.filter(
+                id=robject_id).order_by("-history_date")[:20],
+        }
+
+    def time_query(self, queryset):
+        """Return median seconds of evaluating queryset."""
+        timings = []
+        for _ in range(self.REPEAT):
+            start = time.perf_counter()
+            list(queryset.all())
+            timings.append(time.perf_counter() - start)
+        return statistics.median(timings)
+
+    def test_project_queries_plans_and_latency(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        projects = [proj] + [Project.objects.create(name=f"project_{idx}")
+                             for idx in range(2, self.PROJECTS + 1)]
+        rows = 0
+        for size in sorted(self.SIZES):
+            self.add_rows(projects, rows, size)
+            rows = size
+            robject_id = Robject.objects.filter(project=proj).values_list(
+                "pk", flat=True).last()
+            for name, queryset in self.get_querysets(
+                    proj, robject_id).items():
+                self.report("project_query_indexes", query=name, rows=size,
+                            vendor=connection.vendor,
+                            seconds_p50=round(self.time_query(queryset), 6),
+                            plan=explain(queryset))
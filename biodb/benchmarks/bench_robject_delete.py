@@ -0,0 +1,49 @@
+import time
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from benchmarks.base import BenchmarkTestCase
+from robjects.deletion import delete_robjects
+from robjects.models import Robject
+from robjects.models import Tag
+from samples.models import Sample
+
+
+def legacy_delete(queryset, user=None):
+    """RobjectDeleteView implementation deleting queryset with cascades."""
+    return queryset.delete()
+
+
+class RobjectDeleteBenchmark(BenchmarkTestCase):
+    # legacy delete makes ~3 queries per robject, django keeps 9000 queries
+    SIZES = (100, 1000, 2500)
+
+    def create_robjects(self, proj, number):
+        tag, _ = Tag.objects.get_or_create(name="tag", project=proj)
+        Robject.objects.bulk_create(
+            Robject(name=f"robject_{idx}", project=proj)
+            for idx in range(number))
+        robjects = list(Robject.objects.filter(project=proj))
+        Robject.tags.through.objects.bulk_create(
+            Robject.tags.through(robject=robject, tag=tag)
+            for robject in robjects)
+        Sample.objects.bulk_create(
+            Sample(robject=robject) for robject in robjects)
+
+    def test_delete_selected_robjects(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        for number in self.SIZES:
+            for name, delete in (("legacy_queryset_delete", legacy_delete),
+                                 ("delete_robjects", delete_robjects)):
+                self.create_robjects(proj, number)
+                # captured queries are limited, start with empty log
+                connection.queries_log.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    delete(Robject.objects.filter(project=proj), user=user)
+                    seconds = time.perf_counter() - start
+                self.assertFalse(Robject.objects.exists())
+                self.report("robject_delete", implementation=name,
+                            robjects=number, seconds=round(seconds, 4),
+                            queries=len(queries))
@@ -0,0 +1,66 @@
+import time
+
+from django import forms
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from benchmarks.base import BenchmarkTestCase
+from robjects.models import Name
+from robjects.models import Robject
+from robjects.models import Tag
+from robjects.saving import save_robject
+
+
+def legacy_save(form, user):
+    """RobjectEditView.form_valid implementation saving robject twice."""
+    robject = form.save()
+    robject.modify_by = user
+    robject.save()
+    return robject
+
+
+class RobjectSaveBenchmark(BenchmarkTestCase):
+    EDITS = 200
+    SEQUENCE = "ACGT" * 2500
+
+    def setUp(self):
+        self.user, self.proj = self.default_set_up_for_visit_robjects_pages()
+        self.tags = [Tag.objects.create(name=f"tag_{idx}", project=self.proj)
+                     for idx in range(10)]
+        self.names = [Name.objects.create(name=f"name_{idx}")
+                      for idx in range(10)]
+        self.form_class = forms.modelform_factory(
+            model=Robject, fields="__all__",
+            exclude=["create_by", "create_date", "modify_by"])
+
+    def get_form(self, robject, idx):
+        # every edit changes sequence and one of relations
+        form = self.form_class(instance=robject, data={
+            "name": robject.name, "project": self.proj.id,
+            "ref_seq": self.SEQUENCE + str(idx),
+            "tags": [tag.id for tag in self.tags[idx % 5:idx % 5 + 5]],
+            "names": [name.id for name in self.names[:5]]})
+        self.assertTrue(form.is_valid())
+        return form
+
+    def run_edits(self, name, save):
+        robject = Robject.objects.create(name=name, project=self.proj)
+        edit_forms = [self.get_form(robject, idx)
+                      for idx in range(self.EDITS)]
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            for form in edit_forms:
+                save(form, self.user)
+            seconds = time.perf_counter() - start
+        return seconds, len(queries), robject.history.count() - 1
+
+    def test_edits_per_second(self):
+        for name, save in (("legacy_double_save", legacy_save),
+                           ("save_robject", save_robject)):
+            seconds, queries, history = self.run_edits(name, save)
+            self.report("robject_edits", implementation=name,
+                        edits=self.EDITS,
+                        edits_per_second=round(self.EDITS / seconds, 1),
+                        queries_per_edit=queries / self.EDITS,
+                        history_rows_per_edit=history / self.EDITS)
+
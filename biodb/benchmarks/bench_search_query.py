@@ -0,0 +1,92 @@
+import timeit
+
+from django.db import connection
+from django.db.models import CharField
+from django.db.models import ForeignKey
+from django.db.models import Q
+from django.db.models import TextField
+
+from benchmarks.base import BenchmarkTestCase
+from robjects.models import Robject
+from robjects.views import SearchRobjectsView
+from robjects.views import get_search_lookups
+
+
+def legacy_perform_search(model, terms, project_name):
+    """perform_search implementation building fields plan on every call
+    and chaining Q objects with "|"."""
+    text_fields = [f for f in model._meta.get_fields() if isinstance(
+        f, (CharField, TextField))]
+    foreign_fields = [
+        f for f in model._meta.get_fields() if isinstance(f, ForeignKey)]
+    foreign_models_fields = {}
+    for foreign_field in foreign_fields:
+        fmodel = model._meta.get_field('%s' % foreign_field.name).rel.to
+        foreign_models_fields[foreign_field] = [
+            f for f in fmodel._meta.fields
+            if isinstance(f, (CharField, TextField))]
+    qs = Q()
+    for term in terms:
+        queries = [Q(**{'%s__icontains' % f.name: term})
+                   for f in text_fields]
+        for foreign_field, model_fields in foreign_models_fields.items():
+            queries += [Q(**{'%s__%s__icontains' %
+                             (foreign_field.name, f.name): term})
+                        for f in model_fields]
+        for qs_query in queries:
+            qs = qs | qs_query
+    return model.objects.filter(qs, project__name=project_name)
+
+
+class SearchQueryCompileBenchmark(BenchmarkTestCase):
+    NUMBER = 50
+    QUERY = " ".join(f"term_{idx}" for idx in range(10))
+
+    def compile(self, queryset):
+        return queryset.query.get_compiler(connection=connection).as_sql()
+
+    def test_search_query_matches_legacy_results(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        Robject.objects.create(project=proj, name="term_3", notes="x")
+        Robject.objects.create(project=proj, name="other")
+        view = SearchRobjectsView()
+        terms = view.normalize_query(self.QUERY)
+        self.assertEqual(
+            list(view.perform_search(self.QUERY, proj.name)),
+            list(legacy_perform_search(Robject, terms, proj.name)))
+
+    def test_search_query_compile_time(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        view = SearchRobjectsView()
+        terms = view.normalize_query(self.QUERY)
+        get_search_lookups.cache_clear()
+        legacy = timeit.timeit(
+            lambda: self.compile(
+                legacy_perform_search(Robject, terms, proj.name)),
+            number=self.NUMBER)
+        current = timeit.timeit(
+            lambda: self.compile(view.perform_search(self.QUERY, proj.name)),
+            number=self.NUMBER)
+        legacy_sql, _ = self.compile(
+            legacy_perform_search(Robject, terms, proj.name))
+        sql, _ = self.compile(view.perform_search(self.QUERY, proj.name))
+        self.report("search_query_compile", terms=len(terms),
+                    conditions=len(terms) * len(get_search_lookups(Robject)),
+                    calls=self.NUMBER,
+                    legacy_seconds=round(legacy, 4),
+                    seconds=round(current, 4),
+                    speedup=round(legacy / max(current, 1e-9), 1),
+                    legacy_max_parens=max_nesting(legacy_sql),
+                    max_parens=max_nesting(sql))
+
+
+def max_nesting(sql):
+    """Return max depth of parentheses in sql."""
+    depth = deepest = 0
+    for char in sql:
+        if char == "(":
+            depth += 1
+            deepest = max(deepest, depth)
+        elif char == ")":
+            depth -= 1
+    return deepest
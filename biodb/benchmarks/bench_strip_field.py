@@ -0,0 +1,51 @@
+import timeit
+from bs4 import BeautifulSoup
+
+from benchmarks.base import BenchmarkTestCase
+from projects.mixins import ExportViewMixin
+from projects.mixins import cached_html_to_text
+
+
+def legacy_strip_field(field_value):
+    """strip_field implementation parsing each value twice"""
+    field = str(field_value)
+    if bool(BeautifulSoup(field, "html.parser").find()):
+        only_text = BeautifulSoup(
+            str(field_value), 'html.parser').text
+        return only_text.strip()
+    return field
+
+
+class StripFieldBenchmark(BenchmarkTestCase):
+    NUMBER = 200
+    VALUES = {
+        "plain_text": "robject ligand name",
+        "empty": "",
+        "boilerplate_html": "<p>Reference: <em>see bibliography</em></p>",
+        "sequence_html": "<p>" + "ACGT" * 2500 + "</p>",
+        "unique_html": "<p>notes <strong>{}</strong></p>",
+    }
+
+    def test_strip_field_matches_legacy_output(self):
+        mixin = ExportViewMixin()
+        for value in self.VALUES.values():
+            for _ in range(2):
+                self.assertEqual(mixin.strip_field(value),
+                                 legacy_strip_field(value))
+
+    def test_strip_field_speed(self):
+        mixin = ExportViewMixin()
+        for name, value in self.VALUES.items():
+            if name == "unique_html":
+                values = [value.format(idx) for idx in range(self.NUMBER)]
+            else:
+                values = [value] * self.NUMBER
+            cached_html_to_text.cache_clear()
+            legacy = timeit.timeit(
+                lambda: [legacy_strip_field(v) for v in values], number=1)
+            current = timeit.timeit(
+                lambda: [mixin.strip_field(v) for v in values], number=1)
+            self.report("strip_field", value=name, calls=self.NUMBER,
+                        legacy_seconds=round(legacy, 4),
+                        seconds=round(current, 4),
+                        speedup=round(legacy / max(current, 1e-9), 1))
@@ -0,0 +1,114 @@
+import os
+import time
+
+from django.core.urlresolvers import RegexURLResolver
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from benchmarks.base import BenchmarkTestCase
+from biodb.metrics import percentile
+from projects import urls as projects_urls
+from projects.dataset import generate_dataset
+from projects.models import Project
+from robjects.jobs import run_export_job
+from robjects.models import ExportJob
+from robjects.models import Robject
+from robjects.models import Tag
+from samples.models import Sample
+
+
+def iter_url_names(patterns, namespace="projects", kwargs=()):
+    """Yield (url name, names of url kwargs) of all patterns, with
+    patterns of included urls."""
+    for pattern in patterns:
+        pattern_kwargs = tuple(kwargs) + tuple(pattern.regex.groupindex)
+        if isinstance(pattern, RegexURLResolver):
+            yield from iter_url_names(
+                pattern.url_patterns, f"{namespace}:{pattern.namespace}",
+                pattern_kwargs)
+        elif pattern.name:
+            yield f"{namespace}:{pattern.name}", pattern_kwargs
+
+
+class UrlsLoadBenchmark(BenchmarkTestCase):
+    """Request every url of projects, robjects and samples apps on
+    synthetic dataset (sizes from environment variables)."""
+    ROBJECTS = int(os.environ.get("BENCHMARK_URLS_ROBJECTS", 1000))
+    SAMPLES = int(os.environ.get("BENCHMARK_URLS_SAMPLES", 3))
+    HISTORY_DEPTH = int(os.environ.get("BENCHMARK_URLS_HISTORY_DEPTH", 10))
+    REPEAT = int(os.environ.get("BENCHMARK_URLS_REPEAT", 10))
+    # robjects selected for exports and delete confirmation
+    SELECTED = 20
+
+    def setUp(self):
+        self.user = self.default_set_up_for_projects_pages()
+        generate_dataset(projects=1, robjects=self.ROBJECTS, tags=20,
+                         names=100, samples=self.SAMPLES,
+                         history_depth=self.HISTORY_DEPTH, user=self.user,
+                         seed=0)
+        self.proj = Project.objects.get(name="dataset_1")
+        robjects = Robject.objects.filter(project=self.proj).order_by("pk")
+        self.selected = list(robjects.values_list(
+            "pk", flat=True)[:self.SELECTED])
+        job = ExportJob.objects.create(
+            project=self.proj, create_by=self.user,
+            export_type=ExportJob.EXCEL,
+            robjects_ids=",".join(str(pk) for pk in self.selected))
+        # finished job has file to download
+        run_export_job(job.pk)
+        self.url_kwargs = {
+            "project_name": self.proj.name,
+            "robject_id": self.selected[0],
+            "tag_id": Tag.objects.filter(project=self.proj).first().pk,
+            "sample_id": Sample.objects.filter(
+                robject__project=self.proj).first().pk,
+            "job_id": job.pk,
+        }
+        selection = "&".join(f"robject_{pk}={pk}" for pk in self.selected)
+        self.query_strings = {
+            "projects:robjects:search_robjects": "query=binding receptor",
+            "projects:robjects:names_create": "_popup=1",
+            "projects:robjects:tags_create": "_popup=1",
+            "projects:robjects:names_autocomplete": "q=dataset_name_1",
+            "projects:robjects:tags_autocomplete": "q=dataset_1_tag",
+            "projects:robjects:raport_excel": selection,
+            "projects:robjects:pdf_raport": selection,
+            "projects:robjects:robject_delete": selection,
+        }
+        # popups are opened from robject form only
+        form_referer = {"HTTP_REFERER": reverse(
+            "projects:robjects:robject_create",
+            kwargs={"project_name": self.proj.name})}
+        self.headers = {"projects:robjects:names_create": form_referer,
+                        "projects:robjects:tags_create": form_referer}
+
+    def get_path(self, url_name, kwargs_names):
+        path = reverse(url_name, kwargs={
+            name: self.url_kwargs[name] for name in kwargs_names})
+        query_string = self.query_strings.get(url_name)
+        return f"{path}?{query_string}" if query_string else path
+
+    def test_urls_latency_queries_and_memory(self):
+        for url_name, kwargs_names in iter_url_names(
+                projects_urls.urlpatterns):
+            path = self.get_path(url_name, kwargs_names)
+            headers = self.headers.get(url_name, {})
+            # first request fills caches, only its peak memory is reported
+            response, _, peak = self.measure(
+                self.client.get, path, **headers)
+            timings = []
+            for _ in range(self.REPEAT):
+                start = time.perf_counter()
+                self.client.get(path, **headers)
+                timings.append(time.perf_counter() - start)
+            # queries of warm request, like timings of repeated requests
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(path, **headers)
+            query_count = len(queries)
+            self.report("url_load", url_name=url_name, path=path,
+                        status=response.status_code, robjects=self.ROBJECTS,
+                        repeat=self.REPEAT,
+                        p50=round(percentile(timings, 50), 5),
+                        p95=round(percentile(timings, 95), 5),
+                        queries=query_count, peak_memory=peak)
@@ -0,0 +1,82 @@
+"""Metrics of sampled requests.
+
+QueryMetricsMiddleware (see biodb.middleware) measures
+METRICS_SAMPLE_RATE of requests and records them in ring buffer of
+METRICS_BUFFER_SIZE latest measurements. Buffer lives in process memory,
+so staff-only /metrics/ page summarizes requests served by the process
+which serves the page.
+"""
+import math
+import threading
+from collections import deque
+from collections import namedtuple
+from statistics import mean
+
+from django.conf import settings
+
+# times in seconds, template_time is None when view rendered template
+# itself (not with TemplateResponse)
+RequestMetrics = namedtuple(  # pylint: disable-msg=C0103
+    "RequestMetrics",
+    ["url_name", "queries", "sql_time", "template_time", "total_time"])
+
+_lock = threading.Lock()
+_buffer = None
+
+
+def record_metrics(metrics):
+    """Add RequestMetrics to buffer, the oldest are dropped when full."""
+    global _buffer
+    with _lock:
+        if _buffer is None:
+            _buffer = deque(
+                maxlen=getattr(settings, "METRICS_BUFFER_SIZE", 1000))
+        _buffer.append(metrics)
+
+
+def get_recorded_metrics():
+    """Return list of recorded RequestMetrics, the oldest first."""
+    with _lock:
+        return list(_buffer or ())
+
+
+def clear_metrics():
+    global _buffer
+    with _lock:
+        _buffer = None
+
+
+def percentile(values, percent):
+    """Return nearest-rank percentile of values."""
+    values = sorted(values)
+    return values[max(0, math.ceil(percent / 100 * len(values)) - 1)]
+
+
+def to_ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+def summarize_metrics(records):
+    """Return dict of metrics summary (times in ms) by url name."""
+    by_url_name = {}
+    for metrics in records:
+        by_url_name.setdefault(metrics.url_name, []).append(metrics)
+    summary = {}
+    for url_name, url_records in sorted(by_url_name.items()):
+        queries = [metrics.queries for metrics in url_records]
+        total_times = [metrics.total_time for metrics in url_records]
+        template_times = [metrics.template_time for metrics in url_records
+                          if metrics.template_time is not None]
+        summary[url_name] = {
+            "requests": len(url_records),
+            "queries_avg": round(mean(queries), 2),
+            "queries_max": max(queries),
+            "sql_time_avg": to_ms(mean(
+                metrics.sql_time for metrics in url_records)),
+            "template_time_avg": to_ms(
+                mean(template_times) if template_times else None),
+            "total_time_p50": to_ms(percentile(total_times, 50)),
+            "total_time_p95": to_ms(percentile(total_times, 95)),
+            "total_time_max": to_ms(max(total_times)),
+        }
+    return summary
@@ -0,0 +1,76 @@
+import random
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.utils.deprecation import MiddlewareMixin
+
+from biodb.metrics import RequestMetrics
+from biodb.metrics import record_metrics
+
+# url name of requests which didn't resolve
+UNRESOLVED = "<unresolved>"
+
+
+class QueryMetricsMiddleware(MiddlewareMixin):
+    """Measure sampled requests (see biodb.metrics).
+
+    Number and time of queries to default database are read from debug
+    cursor, which is forced only for sampled requests, so other requests
+    run without overhead. Template render time is measured for
+    TemplateResponse. Put middleware first, so total time includes other
+    middlewares.
+
+    Queries log is cleared when sampled request starts, like django does
+    on request_started, so entries dropped from full log (it keeps last
+    9000 queries) are not subtracted. Log isn't cleared while queries are
+    captured by other code (debug cursor is already forced, eg.
+    CaptureQueriesContext in tests), then only queries logged after
+    request started are counted.
+
+    Limits (django 1.11 has no connection.execute_wrapper): requests
+    running more than 9000 queries are undercounted, and queries run
+    while StreamingHttpResponse is consumed (after process_response) are
+    not counted at all.
+    """
+
+    def process_request(self, request):
+        if random.random() >= getattr(settings, "METRICS_SAMPLE_RATE", 0):
+            return None
+        if not connection.force_debug_cursor:
+            # nobody else reads queries log
+            connection.queries_log.clear()
+        request._metrics = {
+            "start": time.perf_counter(),
+            "force_debug_cursor": connection.force_debug_cursor,
+            "initial_queries": len(connection.queries_log),
+            "template_time": None,
+        }
+        connection.force_debug_cursor = True
+        return None
+
+    def process_template_response(self, request, response):
+        metrics = getattr(request, "_metrics", None)
+        if metrics is not None:
+            # response is rendered right after template response middlewares
+            start = time.perf_counter()
+
+            def stop_template_timer(response):
+                metrics["template_time"] = time.perf_counter() - start
+            response.add_post_render_callback(stop_template_timer)
+        return response
+
+    def process_response(self, request, response):
+        metrics = getattr(request, "_metrics", None)
+        if metrics is None:
+            return response
+        total_time = time.perf_counter() - metrics["start"]
+        connection.force_debug_cursor = metrics["force_debug_cursor"]
+        queries = list(connection.queries_log)[metrics["initial_queries"]:]
+        match = getattr(request, "resolver_match", None)
+        record_metrics(RequestMetrics(
+            url_name=match.view_name if match else UNRESOLVED,
+            queries=len(queries),
+            sql_time=sum(float(query["time"]) for query in queries),
+            template_time=metrics["template_time"], total_time=total_time))
+        return response
@@ -1,9 +1,17 @@
+from functools import lru_cache
+
+from guardian.core import ObjectPermissionChecker
+from guardian.ctypes import get_content_type
+
+from django.contrib.auth.models import Permission
+from django.db.models import Q
 from django.http import Http404
 from django.http import HttpResponseForbidden
 from django.shortcuts import redirect
 from django.shortcuts import get_object_or_404
 from biodb import settings
 from projects.models import Project
+from tools.pagination import paginate
 
 
 class LoginRequiredMixin(object):
@@ -14,12 +22,52 @@ class LoginRequiredMixin(object):
         return redirect('%s?next=%s' % (settings.LOGIN_URL, request.path))
 
 
+class RequestPermissionChecker(ObjectPermissionChecker):
+    """ObjectPermissionChecker reading user and group permissions of
+    object in one query (guardian reads them in two)."""
+
+    def get_perms(self, obj):
+        if not self.user or not self.user.is_active or \
+                self.user.is_superuser:
+            return super().get_perms(obj)
+        key = self.get_local_cache_key(obj)
+        if key not in self._obj_perms_cache:
+            self._obj_perms_cache[key] = list(set(
+                Permission.objects.filter(
+                    Q(**self.get_user_filters(obj)) |
+                    Q(**self.get_group_filters(obj)),
+                    content_type=get_content_type(obj)).values_list(
+                    "codename", flat=True)))
+        return self._obj_perms_cache[key]
+
+
+def get_permission_checker(request):
+    """Return permission checker of request user, shared by request.
+
+    Checker caches permissions of checked objects, so every object
+    permissions are read once per request.
+    """
+    if not hasattr(request, "_permission_checker"):
+        request._permission_checker = RequestPermissionChecker(request.user)
+    return request._permission_checker
+
+
+def get_request_project(request, project_name):
+    """Return project with given name or raise 404, read once per request.
+    """
+    projects = request.__dict__.setdefault("_projects", {})
+    if project_name not in projects:
+        projects[project_name] = get_object_or_404(Project, name=project_name)
+    return projects[project_name]
+
+
 class LoginPermissionRequiredMixin(object):
     def dispatch(self, request, *args, **kwargs):
         if request.user.is_authenticated():
             permission_obj = self.get_permission_object()
+            checker = get_permission_checker(request)
             for permission in self.permissions_required:
-                if not request.user.has_perm("projects." + permission, permission_obj):
+                if not checker.has_perm("projects." + permission, permission_obj):
                     _permission = permission.replace('_', ' ')
                     return HttpResponseForbidden(
                         f"<h1>User doesn't have permission: {_permission}</h1>")
@@ -32,7 +80,64 @@ class LoginPermissionRequiredMixin(object):
         project_name is required in kwargs else method is returning 404.
         """
         if self.kwargs and 'project_name' in self.kwargs:
-            project = get_object_or_404(
-                Project, name=self.kwargs['project_name'])
-            return project
+            return get_request_project(
+                self.request, self.kwargs['project_name'])
         return Http404
+
+
+class KeysetPaginationMixin(object):
+    """Paginate ListView by keyset (see tools.pagination).
+
+    Next and previous pages are requested with "after" and "before"
+    cursors, so deep pages take the same time as first one. Page number
+    in "page" parameter switches to offset pagination.
+    """
+    paginate_by = 100
+    # ordering fields, last one should be unique
+    keyset_ordering = ("id",)
+
+    def paginate_queryset(self, queryset, page_size):
+        return paginate(self.request, queryset, self.keyset_ordering,
+                        page_size, page_kwarg=self.page_kwarg)
+
+
+@lru_cache(maxsize=None)
+def get_column_joins(model, columns):
+    """Return tuple of foreign key paths used by columns lookups.
+
+    Column "robject__project__name" of Sample needs joins "robject" and
+    "robject__project". Only forward ForeignKeys and OneToOneFields can
+    be joined (select_related), other relations are skipped.
+    """
+    joins = []
+    for column in columns:
+        current_model = model
+        path = []
+        for part in column.split("__"):
+            field = current_model._meta.get_field(part)
+            if not (field.many_to_one or field.one_to_one) or \
+                    field.auto_created:
+                break
+            path.append(part)
+            current_model = field.related_model
+        if path and "__".join(path) not in joins:
+            joins.append("__".join(path))
+    return tuple(joins)
+
+
+class ColumnsJoinMixin(object):
+    """Fetch related objects of rendered columns in list query.
+
+    columns lists lookups of values rendered for every object (eg.
+    "author" or "robject__project__name"), related objects on their
+    paths are joined with select_related, so page of objects costs
+    constant number of queries.
+    """
+    columns = ()
+
+    def join_columns(self, queryset):
+        return queryset.select_related(
+            *get_column_joins(queryset.model, tuple(self.columns)))
+
+    def get_queryset(self):
+        return self.join_columns(super().get_queryset())
@@ -55,6 +55,7 @@ INSTALLED_APPS = (
 )
 
 MIDDLEWARE_CLASSES = (
+    'biodb.middleware.QueryMetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -118,6 +119,59 @@ USE_TZ = True
 # STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 STATIC_URL = '/static/'
 
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+MEDIA_URL = '/media/'
+
+# Robjects full-text search index, one of:
+# "robjects.search.SQLiteFTSBackend" (SQLite >= 3.34),
+# "robjects.search.PostgresSearchBackend"
+# None - search with icontains lookups (no index)
+ROBJECTS_SEARCH_BACKEND = None
+
+# Background export jobs
+# number of local worker processes (0 - run jobs in request process)
+EXPORT_JOBS_WORKERS = 2
+
+# Inline diffs of history page
+# values differing by more edits (chars) than that are compared by lines,
+# more edited lines replace whole value
+HISTORY_DIFF_MAX_EDITS = 200
+# number of unchanged chars shown around changes
+HISTORY_DIFF_CONTEXT = 40
+
+# History compaction ("manage.py compact_history")
+# remove snapshots which don't change any field of previous snapshot
+HISTORY_COLLAPSE_UNCHANGED = True
+# archive (compress) snapshots older than that, None - never archive
+HISTORY_ARCHIVE_AFTER_DAYS = 365
+# number of newest snapshots of every robject which are never archived
+HISTORY_KEEP_LATEST = 20
+
+# Orphan names (not used by any robject) garbage collection
+# ("manage.py delete_orphan_names")
+# names created in robject form popup are kept that long (seconds)
+ORPHAN_NAMES_MIN_AGE = 24 * 60 * 60
+# number of names deleted in one query
+ORPHAN_NAMES_BATCH_SIZE = 500
+# delete one batch of orphan names after request at most once per that
+# many seconds (in every web process), None - only with management command
+ORPHAN_NAMES_SWEEP_INTERVAL = None
+
+# Projects list
+# seconds cached list of projects visible to user is kept (it is also
+# invalidated when permissions change), None - forever; lists and their
+# versions are kept in default cache, which in production must be shared
+# by all web processes (e.g. memcached or database cache in CACHES),
+# otherwise permission changes reach other processes only after timeout
+VISIBLE_PROJECTS_CACHE_TIMEOUT = 60 * 60
+
+# Request metrics (biodb.middleware.QueryMetricsMiddleware, staff-only
+# /metrics/ page)
+# fraction of requests measured, 0 - none
+METRICS_SAMPLE_RATE = 0.05
+# number of latest measured requests kept in every process
+METRICS_BUFFER_SIZE = 1000
+
 
 # add for userena app
 AUTHENTICATION_BACKENDS = (
@@ -0,0 +1,79 @@
+from django.contrib.auth.models import User
+from django.core.signals import request_started
+from django.db import connection
+from django.db import reset_queries
+from django.test import TestCase
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from biodb.metrics import RequestMetrics
+from biodb.metrics import clear_metrics
+from biodb.metrics import get_recorded_metrics
+from biodb.metrics import summarize_metrics
+
+
+class QueryMetricsMiddlewareTests(TestCase):
+
+    def setUp(self):
+        clear_metrics()
+        User.objects.create_user(username="USERNAME", password="PASSWORD")
+        self.client.login(username="USERNAME", password="PASSWORD")
+
+    def tearDown(self):
+        clear_metrics()
+
+    @override_settings(METRICS_SAMPLE_RATE=1)
+    def test_sampled_request_is_recorded(self):
+        self.client.get("/projects/")
+        metrics = get_recorded_metrics()[-1]
+        self.assertEqual(metrics.url_name, "projects:projects_list")
+        self.assertGreater(metrics.queries, 0)
+        self.assertIsNotNone(metrics.template_time)
+        self.assertGreaterEqual(metrics.total_time, metrics.template_time)
+
+    @override_settings(METRICS_SAMPLE_RATE=1)
+    def test_queries_are_counted_when_queries_log_is_full(self):
+        # first request caches list of visible projects
+        self.client.get("/projects/")
+        self.client.get("/projects/")
+        queries = get_recorded_metrics()[-1].queries
+        # log isn't cleared by django on request_started
+        request_started.disconnect(reset_queries)
+        self.addCleanup(request_started.connect, reset_queries)
+        connection.queries_log.extend(
+            {"sql": "", "time": "0"}
+            for _ in range(connection.queries_log.maxlen))
+        self.client.get("/projects/")
+        self.assertEqual(get_recorded_metrics()[-1].queries, queries)
+
+    def test_sampled_request_keeps_captured_queries(self):
+        # first request caches list of visible projects
+        self.client.get("/projects/")
+        with override_settings(METRICS_SAMPLE_RATE=0), \
+                CaptureQueriesContext(connection) as not_sampled:
+            self.client.get("/projects/")
+        with override_settings(METRICS_SAMPLE_RATE=1), \
+                CaptureQueriesContext(connection) as sampled:
+            self.client.get("/projects/")
+        self.assertEqual(len(sampled), len(not_sampled))
+        self.assertEqual(get_recorded_metrics()[-1].queries, len(sampled))
+
+    @override_settings(METRICS_SAMPLE_RATE=0)
+    def test_request_is_not_recorded_without_sampling(self):
+        self.client.get("/projects/")
+        self.assertEqual(get_recorded_metrics(), [])
+
+    @override_settings(METRICS_SAMPLE_RATE=1, METRICS_BUFFER_SIZE=2)
+    def test_buffer_keeps_latest_requests(self):
+        for _ in range(3):
+            self.client.get("/projects/")
+        self.assertEqual(len(get_recorded_metrics()), 2)
+
+    def test_summary_by_url_name(self):
+        summary = summarize_metrics([
+            RequestMetrics("view", 2, 0.001, None, 0.01),
+            RequestMetrics("view", 4, 0.003, 0.002, 0.03)])
+        self.assertEqual(summary["view"]["requests"], 2)
+        self.assertEqual(summary["view"]["queries_avg"], 3)
+        self.assertEqual(summary["view"]["template_time_avg"], 2)
+        self.assertEqual(summary["view"]["total_time_p95"], 30)
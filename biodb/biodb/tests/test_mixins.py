@@ -1,3 +1,15 @@
+from django.contrib.auth.models import Group
+from django.contrib.auth.models import User
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test import TestCase
+from django.views.generic import View
+from guardian.ctypes import get_content_type
+from guardian.shortcuts import assign_perm
+
+from biodb.mixins import LoginPermissionRequiredMixin
+from projects.models import Project
+
 # from django.test import TestCase, RequestFactory
 # from biodb.mixins import LoginRequiredMixin
 # from django.views.generic import View
@@ -33,3 +45,49 @@
 #         # Parent's
 #         result = TestClass().dispatch(request)
 #         self.assertEqual(result, "parent dispatch called")
+
+
+
+class ProjectView(LoginPermissionRequiredMixin, View):
+    permissions_required = ["can_visit_project", "can_modify_project"]
+
+    def get(self, request, *args, **kwargs):
+        # project is already read by mixin
+        return HttpResponse(self.get_permission_object().name)
+
+
+class LoginPermissionRequiredMixinTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="USERNAME")
+        self.project = Project.objects.create(name="project_1")
+        # content types are cached once per process
+        get_content_type(Project)
+
+    def get(self, project_name="project_1"):
+        request = RequestFactory().get("/")
+        request.user = self.user
+        return ProjectView.as_view()(request, project_name=project_name)
+
+    def test_project_and_permissions_are_read_in_two_queries(self):
+        assign_perm("can_visit_project", self.user, self.project)
+        group = Group.objects.create(name="group")
+        group.user_set.add(self.user)
+        assign_perm("can_modify_project", group, self.project)
+        with self.assertNumQueries(2):
+            response = self.get()
+        self.assertEqual(response.content.decode(), "project_1")
+
+    def test_all_permissions_are_required(self):
+        assign_perm("can_visit_project", self.user, self.project)
+        assign_perm("can_modify_project", self.user,
+                    Project.objects.create(name="project_2"))
+        response = self.get()
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.content.decode(),
+                         "<h1>User doesn't have permission: "
+                         "can modify project</h1>")
+
+    def test_superuser_has_all_permissions(self):
+        self.user.is_superuser = True
+        self.user.save()
+        self.assertEqual(self.get().status_code, 200)
@@ -1,5 +1,7 @@
 from django.test import TestCase
+from django.test import override_settings
 from django.contrib.auth.models import User
+from biodb.metrics import clear_metrics
 
 class RedirectViewTests(TestCase):
     def test_redirect_annonymous_user_to_welcome_page_after_get(self):
@@ -11,3 +13,27 @@ class RedirectViewTests(TestCase):
         self.client.login(username="USERNAME", password="PASSWORD")
         response = self.client.get("/")
         self.assertRedirects(response, "/projects/")
+
+
+class MetricsViewTests(TestCase):
+    def test_redirect_annonymous_user_to_login_page(self):
+        response = self.client.get("/metrics/")
+        self.assertRedirects(response, "/accounts/login/?next=/metrics/")
+
+    def test_not_staff_user_sees_permission_denied(self):
+        User.objects.create_user(username="USERNAME", password="PASSWORD")
+        self.client.login(username="USERNAME", password="PASSWORD")
+        response = self.client.get("/metrics/")
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(METRICS_SAMPLE_RATE=1)
+    def test_staff_user_gets_metrics_of_views(self):
+        clear_metrics()
+        User.objects.create_user(
+            username="USERNAME", password="PASSWORD", is_staff=True)
+        self.client.login(username="USERNAME", password="PASSWORD")
+        self.client.get("/projects/")
+        response = self.client.get("/metrics/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("projects:projects_list", response.json()["views"])
+        clear_metrics()
@@ -13,6 +13,7 @@ urlpatterns = [
     url(r'^projects/', include("projects.urls")),
     url(r'^accounts/', include("accounts.urls")),
     url(r'^admin/', include(admin.site.urls)),
+    url(r'^metrics/$', views.MetricsView.as_view(), name="metrics"),
 ]
 
 if settings.DEBUG:
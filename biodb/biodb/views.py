@@ -1,7 +1,14 @@
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import JsonResponse
 from django.views.generic import View
 from django.shortcuts import redirect
 from django.core.urlresolvers import reverse
 
+from biodb.metrics import get_recorded_metrics
+from biodb.metrics import summarize_metrics
+from biodb.mixins import LoginRequiredMixin
+
 
 class RedirectView(View):
     def get(self, request, **kwargs):
@@ -9,3 +16,18 @@ class RedirectView(View):
             return redirect(reverse("projects:projects_list"))
         else:
             return redirect(reverse("login"))
+
+
+class MetricsView(LoginRequiredMixin, View):
+    """Summary of metrics of requests served by this process (staff only,
+    see biodb.metrics)."""
+
+    def get(self, request, **kwargs):
+        if not request.user.is_staff:
+            raise PermissionDenied
+        records = get_recorded_metrics()
+        return JsonResponse({
+            "sample_rate": getattr(settings, "METRICS_SAMPLE_RATE", 0),
+            "requests": len(records),
+            "views": summarize_metrics(records),
+        })
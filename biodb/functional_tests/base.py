@@ -148,6 +148,17 @@ class FunctionalTest(StaticLiveServerTestCase):
     def switch_to_main(self):
         self.browser.switch_to.window(self.main_window)
 
+    def choose_autocomplete_option(self, field_name, text):
+        """User types text in search box of autocomplete select and clicks
+        option loaded from server (only selected options are rendered)."""
+        select_xpath = f"//select[@id='id_{field_name}']"
+        self.browser.find_element_by_xpath(
+            f"{select_xpath}/preceding-sibling::"
+            "input[@class='autocomplete-search']").send_keys(text)
+        option = self.wait_for(lambda: self.browser.find_element_by_xpath(
+            f"{select_xpath}/option[contains(text(), '{text}')]"))
+        option.click()
+
     def login_user(self, username="USERNAME", password="PASSWORD"):
         """ Helper method for log user in."""
 
@@ -1,6 +1,7 @@
 from django.contrib.auth.models import User
 from django.test import tag
 from functional_tests.base import FunctionalTest
+from guardian.shortcuts import assign_perm
 from projects.models import Project
 from secrets import choice
 
@@ -15,6 +16,11 @@ class ProjectsPageTestCase(FunctionalTest):
             name="project_" + str(choice(range(2, 100))))
         self.project_2 = Project.objects.create(
             name="project_" + str(choice(range(2, 100))))
+        # only projects user can visit are listed
+        self.user = User.objects.create_user(
+            username="USERNAME", password="PASSWORD")
+        for project in (self.project_1, self.project_2):
+            assign_perm("projects.can_visit_project", self.user, project)
 
     def test_login_required(self):
         self.annonymous_testing_helper(self.PROJECT_LIST_URL)
@@ -32,18 +38,18 @@ class ProjectsPageTestCase(FunctionalTest):
         self.assertIn(self.project_2.name, [p.text for p in projects])
 
     def test_user_goes_to_certain_project(self):
-        # Create and log in user.
-        User.objects.create_user(
-            username="USERNAME", password="PASSWORD")
+        # Log in user.
         self.login_user(username="USERNAME", password="PASSWORD")
         # User visits projects page of BioDB app. He clicks one of projects
-        # links. He is redirected to /projects/<project_name>/robjects/.
+        # links (projects are ordered by name). He is redirected to
+        # /projects/<project_name>/robjects/.
         self.browser.get(self.live_server_url + "/projects/")
         link = self.browser.find_element_by_css_selector("li:first-child a")
+        project_name = link.text
         link.click()
 
         self.assertEqual(
             self.browser.current_url,
             self.live_server_url + "/projects/{}/robjects/".format(
-                self.project_1.name)
+                project_name)
         )
@@ -290,9 +290,9 @@ class RobjectCreateTestCase(FunctionalTest):
         self.add_related_name(name="name_2")
         self.add_related_name(name="name_3")
 
-        # After that, he unselect one of them.
-        self.browser.find_element_by_xpath(
-            "//option[contains(text(), 'name_2')]").click()
+        # After that, he finds one of them in names search box and
+        # unselect it.
+        self.choose_autocomplete_option("names", "name_2")
 
         # Next, he fills three other fields.
         self.browser.find_element_by_css_selector(
@@ -333,9 +333,8 @@ class RobjectCreateTestCase(FunctionalTest):
         # User create new tag.
         self.add_related_tag(name="new_tag")
 
-        # User additionally pick preexisting tag from select menu.
-        self.browser.find_element_by_xpath(
-            "//option[contains(text(), 'pre_tag')]").click()
+        # User additionally search for preexisting tag and pick it.
+        self.choose_autocomplete_option("tags", "pre_tag")
 
         # At last he fill name field.
         self.browser.find_element_by_css_selector(
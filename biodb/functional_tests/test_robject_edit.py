@@ -182,6 +182,7 @@ class RobjectEditView(FunctionalTest):
 
     def test_user_modify_all_fields(self):
         self.set_up_robject_edit()
+        Name.objects.create(name="EXISTING_NAME")
         self.get_page()
         self.fill_text_field("name", "new_name")
         self.fill_text_field("ligand", "new_ligand")
@@ -195,6 +196,7 @@ class RobjectEditView(FunctionalTest):
         self.fill_CKE_field("ref_clinical", "new_ref_clinical")
         self.add_related_name("new_name")
         self.add_related_tag("new_tag")
+        self.choose_autocomplete_option("names", "EXISTING_NAME")
         self.submit_form()
         data = {
             "name": "new_name",
@@ -209,7 +211,8 @@ class RobjectEditView(FunctionalTest):
             "ref_clinical": "<p>new_ref_clinical</p>"
         }
         self.confirm_robject_fields(data, names=[
-                                    "new_name"], tags=["new_tag"])
+                                    "new_name", "EXISTING_NAME"],
+                                    tags=["new_tag"])
 
     def test_different_user_edit_robject(self):
         self.set_up_robject_edit()
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class ProjectsConfig(AppConfig):
+    name = 'projects'
+
+    def ready(self):
+        # connect visible projects cache and project counters signals
+        import projects.signals  # noqa
@@ -0,0 +1,175 @@
+"""Denormalized numbers of robjects, samples and tags of projects.
+
+ProjectCounters are changed by signals (see projects.signals) with
+F() updates, so pages read totals from one row instead of COUNT queries.
+Bulk deletion of robjects (without signals) subtracts known numbers of
+deleted objects. Other writes which don't send signals (queryset update,
+bulk_create) are fixed by reconcile_counters, which is run periodically
+by "manage.py rebuild_project_counters".
+"""
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models import Count
+from django.db.models import F
+from django.utils import timezone
+
+from projects.models import Project
+from projects.models import ProjectCounters
+from robjects.models import Robject
+from robjects.models import Tag
+from samples.models import Sample
+
+# counter field, counted model and lookup of its project
+COUNTED_MODELS = (("robjects", Robject, "project"),
+                  ("samples", Sample, "robject__project"),
+                  ("tags", Tag, "project"))
+COUNTER_FIELDS = tuple(field for field, _, _ in COUNTED_MODELS)
+MAX_IDS_IN_QUERY = 500
+
+_bulk_deletion = threading.local()
+
+
+def change_counter(project_id, field, delta):
+    """Add delta to counter field of project.
+
+    Missing counters (of projects created before counters) are not
+    created here, project could be deleted in the same transaction; they
+    are created by reconcile_counters.
+    """
+    if project_id is None or not delta:
+        return
+    ProjectCounters.objects.filter(project_id=project_id).update(
+        **{field: F(field) + delta})
+
+
+def change_samples_counter(robject_id, delta):
+    """Add delta to samples counter of project of robject.
+
+    Project is selected by subquery, so it is a single update.
+    """
+    if robject_id is None or not delta:
+        return
+    ProjectCounters.objects.filter(project__robject=robject_id).update(
+        samples=F("samples") + delta)
+
+
+@contextmanager
+def bulk_deletion():
+    """Within block signals of deleted objects don't change counters.
+
+    Bulk deletion (see robjects.deletion) subtracts deleted objects
+    itself. State is local to thread.
+    """
+    depth = getattr(_bulk_deletion, "depth", 0)
+    _bulk_deletion.depth = depth + 1
+    try:
+        yield
+    finally:
+        _bulk_deletion.depth = depth
+
+
+def in_bulk_deletion():
+    return getattr(_bulk_deletion, "depth", 0) > 0
+
+
+def count_objects(project_ids):
+    """Count objects of projects with one grouped query per counter.
+
+    Returns:
+        dict: {project id: {counter field: number}}.
+    """
+    counts = {project_id: dict.fromkeys(COUNTER_FIELDS, 0)
+              for project_id in project_ids}
+    for field, model, lookup in COUNTED_MODELS:
+        rows = model._base_manager.filter(
+            **{f"{lookup}__in": project_ids}).values_list(lookup).annotate(
+            number=Count("pk")).order_by()
+        for project_id, number in rows:
+            counts[project_id][field] = number
+    return counts
+
+
+def subtract_deleted_robjects(robjects):
+    """Subtract robjects and their samples from counters of projects.
+
+    Called before robjects are deleted without signals (see
+    robjects.deletion), samples are counted with one grouped query.
+    """
+    ids = [robject.pk for robject in robjects]
+    deltas = {}
+    for robject in robjects:
+        deltas.setdefault(robject.project_id, Counter())["robjects"] += 1
+    samples = Sample._base_manager.filter(robject__in=ids).values_list(
+        "robject__project").annotate(number=Count("pk")).order_by()
+    for project_id, number in samples:
+        deltas.setdefault(project_id, Counter())["samples"] += number
+    for project_id, fields in deltas.items():
+        for field, number in fields.items():
+            change_counter(project_id, field, -number)
+
+
+def reconcile_counters(project_ids=None, batch_size=MAX_IDS_IN_QUERY):
+    """Recount counters of projects with given ids (all when None).
+
+    Per batch of projects counters rows are locked (select_for_update)
+    before objects are counted, so concurrent F() updates wait for the
+    transaction and are applied to recounted values. Only wrong counters
+    are updated, missing ones are created in bulk.
+
+    Returns:
+        int: number of projects which counters were wrong or missing.
+    """
+    projects = Project.objects.all()
+    if project_ids is not None:
+        projects = projects.filter(pk__in=set(project_ids))
+    project_ids = sorted(projects.values_list("pk", flat=True))
+    fixed = 0
+    for start in range(0, len(project_ids), batch_size):
+        batch = project_ids[start:start + batch_size]
+        with transaction.atomic():
+            current = {counters.project_id: counters
+                       for counters in ProjectCounters.objects.filter(
+                           project_id__in=batch).select_for_update()}
+            counts = count_objects(batch)
+            reconcile_date = timezone.now()
+            missing = []
+            for project_id, values in counts.items():
+                counters = current.get(project_id)
+                if counters is None:
+                    missing.append(ProjectCounters(
+                        project_id=project_id, reconcile_date=reconcile_date,
+                        **values))
+                elif any(getattr(counters, field) != number
+                         for field, number in values.items()):
+                    ProjectCounters.objects.filter(
+                        project_id=project_id).update(**values)
+                    fixed += 1
+            ProjectCounters.objects.filter(project_id__in=batch).update(
+                reconcile_date=reconcile_date)
+            ProjectCounters.objects.bulk_create(missing)
+            fixed += len(missing)
+    return fixed
+
+
+def get_counters(project):
+    """Return counters of project, not saved zero counters when missing."""
+    counters = ProjectCounters.objects.filter(project=project).first()
+    return counters or ProjectCounters(project=project)
+
+
+def attach_counters(projects):
+    """Set counters of projects (list) with one query."""
+    ids = [project.pk for project in projects]
+    if len(ids) > MAX_IDS_IN_QUERY:
+        # too many variables for one query, read all counters
+        current = {counters.pk: counters
+                   for counters in ProjectCounters.objects.all()}
+    else:
+        current = ProjectCounters.objects.in_bulk(ids)
+    for project in projects:
+        project.counters = current.get(project.pk) or \
+            ProjectCounters(project=project)
+    return projects
@@ -0,0 +1,187 @@
+"""Synthetic datasets for load testing and benchmarks.
+
+generate_dataset creates projects with robjects (rich text sequences,
+tags, names, samples in every status and history of given depth) with
+bulk queries, one transaction per project. Bulk queries don't send
+signals: counters of created projects are reconciled at the end, while
+search index and history differences have to be filled with
+"manage.py rebuild_search_index" and "manage.py backfill_history_diffs".
+"""
+import random
+from collections import namedtuple
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+from guardian.shortcuts import assign_perm
+
+from projects.counters import reconcile_counters
+from projects.models import Project
+from robjects.compaction import chunks
+from robjects.compaction import get_snapshot_values
+from robjects.models import Name
+from robjects.models import Robject
+from robjects.models import Tag
+from samples.models import Sample
+
+# numbers of created objects
+DatasetSummary = namedtuple(  # pylint: disable-msg=C0103
+    "DatasetSummary",
+    ["projects", "robjects", "tags", "names", "samples", "history"])
+
+NUCLEOTIDES = "ACGT"
+WORDS = ("binding affinity receptor ligand assay buffer plasmid vector "
+         "expression purification yield stable mutant domain kinase "
+         "antibody epitope culture titration").split()
+# robjects created (and kept in memory) at once
+BATCH_SIZE = 1000
+# relations of every robject, limited by number of tags and names
+TAGS_PER_ROBJECT = 3
+NAMES_PER_ROBJECT = 2
+
+
+def random_text(rng, words):
+    return " ".join(rng.choices(WORDS, k=words)).capitalize() + "."
+
+
+def rich_text(*paragraphs):
+    """Return paragraphs as html of RichTextField."""
+    return "".join(f"<p>{paragraph}</p>" for paragraph in paragraphs)
+
+
+def mutate(rng, sequence, mutations):
+    """Return sequence with nucleotides replaced at random positions."""
+    sequence = list(sequence)
+    for position in rng.sample(range(len(sequence)),
+                               min(mutations, len(sequence))):
+        sequence[position] = rng.choice(NUCLEOTIDES)
+    return "".join(sequence)
+
+
+def make_robject(rng, project, idx, sequence_length):
+    ref_seq = "".join(rng.choices(NUCLEOTIDES, k=sequence_length))
+    return Robject(
+        project=project, name=f"{project.name}_robject_{idx}",
+        ref_seq=rich_text(ref_seq),
+        mod_seq=rich_text(mutate(rng, ref_seq, sequence_length // 100 + 1)),
+        notes=rich_text(random_text(rng, 30), random_text(rng, 20)),
+        description=rich_text(random_text(rng, 50)),
+        bibliography=rich_text(random_text(rng, 15)),
+        ligand=rng.choice(WORDS), receptor=rng.choice(WORDS))
+
+
+def make_history(rng, robject, depth, user=None):
+    """Return depth historical records of robject, the newest one equal
+    to robject and older ones with different notes."""
+    history_model = Robject.history.model
+    values = get_snapshot_values(robject)
+    now = timezone.now()
+    records = []
+    for version in range(depth):
+        record_values = dict(values)
+        if version < depth - 1:
+            record_values["notes"] = rich_text(random_text(rng, 30))
+        records.append(history_model(
+            history_type="+" if version == 0 else "~",
+            history_date=now - timedelta(hours=depth - version),
+            history_user=user, **record_values))
+    return records
+
+
+def relate(robjects, field_name, objects, number, rng):
+    """Relate every robject with number of random objects by m2m field."""
+    field = Robject._meta.get_field(field_name)
+    through = field.remote_field.through
+    number = min(number, len(objects))
+    through.objects.bulk_create(
+        through(**{field.m2m_field_name(): robject,
+                   field.m2m_reverse_field_name(): related})
+        for robject in robjects for related in rng.sample(objects, number))
+
+
+@transaction.atomic
+def generate_project(name, robjects, tags, names, samples, history_depth,
+                     sequence_length, rng, user=None):
+    """Create project with objects.
+
+    Returns:
+        tuple: (project, DatasetSummary of created objects).
+    """
+    project = Project.objects.create(name=name)
+    if user is not None:
+        assign_perm("projects.can_visit_project", user, project)
+        assign_perm("projects.can_modify_project", user, project)
+    Tag.objects.bulk_create(Tag(name=f"{name}_tag_{idx}", project=project)
+                            for idx in range(tags))
+    project_tags = list(Tag.objects.filter(project=project))
+    statuses = [status for status, _ in Sample.STATUS_CHOICES]
+    history_model = Robject.history.model
+    created_samples = created_history = 0
+    for batch in chunks(range(robjects), BATCH_SIZE):
+        last_pk = Robject.objects.filter(project=project).values_list(
+            "pk", flat=True).last() or 0
+        Robject.objects.bulk_create(
+            make_robject(rng, project, idx, sequence_length)
+            for idx in batch)
+        batch_robjects = list(Robject.objects.filter(
+            project=project, pk__gt=last_pk))
+        relate(batch_robjects, "tags", project_tags, TAGS_PER_ROBJECT, rng)
+        relate(batch_robjects, "names", names, NAMES_PER_ROBJECT, rng)
+        # statuses go round, so every status has samples
+        new_samples = [
+            Sample(robject=robject, owner=user, code=f"S{robject.pk}-{idx}",
+                   status=statuses[(robject.pk + idx) % len(statuses)],
+                   notes=rich_text(random_text(rng, 10)))
+            for robject in batch_robjects for idx in range(samples)]
+        Sample.objects.bulk_create(new_samples)
+        new_history = [record for robject in batch_robjects
+                       for record in make_history(
+                           rng, robject, history_depth, user)]
+        history_model.objects.bulk_create(new_history)
+        created_samples += len(new_samples)
+        created_history += len(new_history)
+    return project, DatasetSummary(1, robjects, tags, 0, created_samples,
+                                   created_history)
+
+
+def generate_dataset(projects=1, robjects=100, tags=10, names=50, samples=3,
+                     history_depth=3, sequence_length=1000, prefix="dataset",
+                     user=None, seed=None):
+    """Create synthetic dataset and return DatasetSummary.
+
+    Args:
+        projects (int): number of projects named prefix_1, prefix_2, ...
+        robjects (int): number of robjects of every project.
+        tags (int): number of tags of every project.
+        names (int): number of names shared by projects, existing names
+            with the same prefix are not created again.
+        samples (int): number of samples of every robject.
+        history_depth (int): number of historical records of robject.
+        sequence_length (int): length of reference sequences.
+        user (User): gets permissions to visit and modify projects, owns
+            samples and is author of historical records.
+        seed (int): seed of random generator, same seed gives same data.
+    """
+    rng = random.Random(seed)
+    # names are unique, names left by previous run with the same prefix
+    # are reused
+    existing_names = set(Name.objects.filter(
+        name__startswith=f"{prefix}_name_").values_list("name", flat=True))
+    new_names = [Name(name=name) for name in (
+        f"{prefix}_name_{idx}" for idx in range(names))
+        if name not in existing_names]
+    Name.objects.bulk_create(new_names)
+    dataset_names = list(Name.objects.filter(
+        name__startswith=f"{prefix}_name_"))
+    totals = dict.fromkeys(DatasetSummary._fields, 0)
+    totals["names"] = len(new_names)
+    project_ids = []
+    for idx in range(1, projects + 1):
+        project, project_summary = generate_project(
+            f"{prefix}_{idx}", robjects, tags, dataset_names, samples,
+            history_depth, sequence_length, rng, user)
+        for field, number in project_summary._asdict().items():
+            totals[field] += number
+        project_ids.append(project.pk)
+    reconcile_counters(project_ids)
+    return DatasetSummary(**totals)
@@ -0,0 +1,60 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from projects.dataset import generate_dataset
+from projects.models import Project
+from robjects.models import Name
+
+
+class Command(BaseCommand):
+    help = ("Generate synthetic projects with robjects, tags, names, "
+            "samples and history for load testing.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--projects", type=int, default=1,
+                            help="Number of projects.")
+        parser.add_argument("--robjects", type=int, default=100,
+                            help="Number of robjects of every project.")
+        parser.add_argument("--tags", type=int, default=10,
+                            help="Number of tags of every project.")
+        parser.add_argument("--names", type=int, default=50,
+                            help="Number of names shared by projects.")
+        parser.add_argument("--samples", type=int, default=3,
+                            help="Number of samples of every robject.")
+        parser.add_argument("--history-depth", type=int, default=3,
+                            help="Number of historical records of robject.")
+        parser.add_argument("--sequence-length", type=int, default=1000,
+                            help="Length of reference sequences.")
+        parser.add_argument("--prefix", default="dataset",
+                            help="Prefix of projects and names.")
+        parser.add_argument("--user",
+                            help="Username given permissions to projects.")
+        parser.add_argument("--seed", type=int,
+                            help="Seed of random generator.")
+
+    def handle(self, *args, **options):
+        prefix = options["prefix"]
+        if Project.objects.filter(name__startswith=f"{prefix}_").exists() \
+                or Name.objects.filter(name__startswith=f"{prefix}_").exists():
+            raise CommandError(f"Objects with prefix '{prefix}' exist, "
+                               "choose other --prefix.")
+        user = None
+        if options["user"]:
+            try:
+                user = User.objects.get(username=options["user"])
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['user']}' not found.")
+        summary = generate_dataset(
+            projects=options["projects"], robjects=options["robjects"],
+            tags=options["tags"], names=options["names"],
+            samples=options["samples"],
+            history_depth=options["history_depth"],
+            sequence_length=options["sequence_length"], prefix=prefix,
+            user=user, seed=options["seed"])
+        self.stdout.write(
+            f"Created {summary.projects} projects, {summary.robjects} "
+            f"robjects, {summary.tags} tags, {summary.names} names, "
+            f"{summary.samples} samples and {summary.history} historical "
+            "records. Run rebuild_search_index and backfill_history_diffs "
+            "to index robjects and their history.")
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from projects.counters import MAX_IDS_IN_QUERY
+from projects.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = ("Recount robjects, samples and tags of projects. Run it "
+            "periodically to fix counters changed without signals.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "projects", nargs="*", type=int,
+            help="Ids of projects to recount, all projects by default.")
+        parser.add_argument(
+            "--batch-size", type=int, default=MAX_IDS_IN_QUERY,
+            help="Number of projects recounted in one transaction.")
+
+    def handle(self, *args, **options):
+        fixed = reconcile_counters(options["projects"] or None,
+                                   batch_size=options["batch_size"])
+        self.stdout.write(f"Fixed counters of {fixed} projects.")
@@ -1,21 +1,124 @@
+import os
 from datetime import datetime
+from functools import lru_cache
+from io import BytesIO
+from tempfile import TemporaryFile
+from wsgiref.util import FileWrapper
 from bs4 import BeautifulSoup
 
 from django.conf import settings
 from django.http import HttpResponse
+from django.http import StreamingHttpResponse
+from django.template.base import FilterExpression
 from django.template.loader import get_template
+from django.template.loader_tags import ExtendsNode
+from django.template.loader_tags import IncludeNode
 
 from openpyxl import Workbook
+from PyPDF2 import PdfFileReader
+from PyPDF2 import PdfFileWriter
 from weasyprint import CSS
 from weasyprint import HTML
+from weasyprint.fonts import FontConfiguration
+
+# process level caches: {key: (file modification time, cached object)},
+# templates are kept with [(file path, modification time)] of all their files
+_stylesheets_cache = {}
+_templates_cache = {}
+
+
+# longer values (sequences, notes) are not cached, so cache holds at
+# most HTML_TO_TEXT_CACHE_SIZE * 2 * HTML_TO_TEXT_CACHE_MAX_CHARS chars
+HTML_TO_TEXT_CACHE_SIZE = 1024
+HTML_TO_TEXT_CACHE_MAX_CHARS = 1000
+
+
+def html_to_text(text):
+    """Return text without HTML markup."""
+    soup = BeautifulSoup(text, "html.parser")
+    if soup.find():
+        return soup.text.strip()
+    return text
+
+
+# repeated short values (like templates of RichTextFields) are parsed once
+cached_html_to_text = lru_cache(maxsize=HTML_TO_TEXT_CACHE_SIZE)(
+    html_to_text)
+
+
+@lru_cache(maxsize=None)
+def get_font_config():
+    """Return font configuration shared by all pdf files in process."""
+    return FontConfiguration()
+
+
+def get_stylesheet(stylesheet_path):
+    """Return parsed weasyprint CSS.
+
+    File is parsed again only when its modification time changes.
+    """
+    mtime = os.path.getmtime(stylesheet_path)
+    cached = _stylesheets_cache.get(stylesheet_path)
+    if cached is None or cached[0] != mtime:
+        stylesheet = CSS(stylesheet_path, font_config=get_font_config())
+        cached = (mtime, stylesheet)
+        _stylesheets_cache[stylesheet_path] = cached
+    return cached[1]
+
+
+def get_template_files(template):
+    """Return paths of files of template and of all templates it includes
+    or extends (given by name, not by variable)."""
+    files = [template.origin.name]
+    for node in template.nodelist.get_nodes_by_type(
+            (IncludeNode, ExtendsNode)):
+        name = node.template if isinstance(node, IncludeNode) else \
+            node.parent_name
+        if isinstance(name, FilterExpression) and \
+                isinstance(name.var, str) and not name.filters:
+            files.extend(get_template_files(
+                template.engine.get_template(name.var)))
+    return files
+
+
+def get_pdf_template(template_name):
+    """Return compiled template, loaded again only when file of template
+    or of any template it includes changes."""
+    cached = _templates_cache.get(template_name)
+    if cached is not None:
+        mtimes, template = cached
+        if all(os.path.getmtime(path) == mtime for path, mtime in mtimes):
+            return template
+    template = get_template(template_name)
+    _templates_cache[template_name] = (
+        [(path, os.path.getmtime(path))
+         for path in get_template_files(template.template)], template)
+    return template
+
+
+def render_pdf(rendered_html, stylesheet_path):
+    """Generate pdf file from rendered html (used in pdf worker processes).
+    """
+    return HTML(string=rendered_html).write_pdf(
+        stylesheets=[get_stylesheet(stylesheet_path)],
+        font_config=get_font_config())
 
 
 class ExportViewMixin(object):
     # django.db.models.Model
     model = None
     pdf_template_name = None
+    # template with header and footer only (used by parallel rendering)
+    pdf_pages_template_name = None
     pdf_css_name = None
     css_sufix = None
+    # above this number of objects excel is streamed (None - never stream)
+    excel_stream_threshold = None
+    # number of objects fetched from db at once while streaming
+    excel_chunk_size = 500
+    # from this number of objects pdf is rendered in parallel when
+    # get_pdf_pool returns pool (None - always render pdf in single job)
+    pdf_parallel_threshold = None
 
     def get_model_fields(self, is_relation=False, one_to_one=False,
                          many_to_one=False, exclude_fields=None):
@@ -42,46 +145,105 @@ class ExportViewMixin(object):
 
         return model_fields
 
+    def get_related_lookups(self, fields_names):
+        """
+        Return tuple of lists (select_related, prefetch_related) with names
+        of relational fields from fields_names.
+        """
+        select_related = []
+        prefetch_related = []
+        for field_name in fields_names:
+            field = self.model._meta.get_field(field_name)
+            if field.many_to_one or field.one_to_one:
+                select_related.append(field_name)
+            elif field.many_to_many or field.one_to_many:
+                prefetch_related.append(field_name)
+        return select_related, prefetch_related
+
+    def get_export_queryset(self, queryset, fields_names):
+        """Join or prefetch all relations required by exported fields.
+
+        Export takes constant number of queries instead of few queries
+        per exported object.
+        """
+        select_related, prefetch_related = self.get_related_lookups(
+            fields_names)
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        return queryset
+
     def strip_field(self, field_value):
         ''' Strip field from HTML'''
         if isinstance(field_value, datetime):
             return field_value.strftime("%Y-%m-%d %H:%M")
         else:
             field = str(field_value)
-            if bool(BeautifulSoup(field, "html.parser").find()):
-                only_text = BeautifulSoup(
-                    str(field_value), 'html.parser').text
-                return only_text.strip()
-            return field
+            # there is no markup without "<" char
+            if "<" not in field:
+                return field
+            if len(field) <= HTML_TO_TEXT_CACHE_MAX_CHARS:
+                return cached_html_to_text(field)
+            return html_to_text(field)
+
+    def iterate_in_chunks(self, queryset, chunk_size=None):
+        """Yield objects from queryset fetched in chunks ordered by pk.
+
+        Only one chunk of objects is kept in memory at the same time.
+        Unlike queryset.iterator() chunks respect prefetch_related.
+        """
+        if not chunk_size:
+            chunk_size = self.excel_chunk_size
+        queryset = queryset.order_by("pk")
+        last_pk = None
+        while True:
+            chunk = queryset
+            if last_pk is not None:
+                chunk = chunk.filter(pk__gt=last_pk)
+            chunk = list(chunk[:chunk_size])
+            if not chunk:
+                return
+            yield from chunk
+            last_pk = chunk[-1].pk
+
+    def get_excel_row(self, query_object, fields_names):
+        """Return list of cells values for single object"""
+        row = list()
+        for field_name in fields_names:
+            # holding field value
+            if field_name in ["tags", "names"]:
+                field_string = getattr(
+                    query_object, field_name).all().all_as_string()
+            else:
+                field_value = getattr(query_object, field_name)
+                field_string = self.strip_field(field_value)
+
+            # append to container
+            row.append(field_string)
+        return row
 
     def export_to_excel(self, queryset, is_relation=False, one_to_one=False,
                         many_to_one=False, exclude_fields=None):
         """ Function handle export to excel view"""
 
+        # filling first row by fields names
+        fields_names = self.get_model_fields(
+            is_relation, one_to_one, many_to_one, exclude_fields)
+        queryset = self.get_export_queryset(queryset, fields_names)
+        # big selections are streamed to keep memory usage flat
+        if self.excel_stream_threshold is not None and \
+                queryset.count() > self.excel_stream_threshold:
+            return self.stream_to_excel(queryset, fields_names)
+
         # create workbook
         wb = Workbook()
         # capture active worksheet
         ws = wb.active
-        # filling first row by fields names
-        fields_names = self.get_model_fields(
-            is_relation, one_to_one, many_to_one, exclude_fields)
         ws.append(fields_names)
         for query_object in queryset:
-            temp = list()
-            for field_name in fields_names:
-                # holding field value
-                if field_name in ["tags", "names"]:
-                    field_string = getattr(
-                        query_object, field_name).all().all_as_string()
-                else:
-                    field_value = getattr(query_object, field_name)
-                    field_string = self.strip_field(field_value)
-
-                # append to container
-                temp.append(field_string)
-
-                # adding cline row to excel
-            ws.append(temp)
+            # adding cline row to excel
+            ws.append(self.get_excel_row(query_object, fields_names))
         output = HttpResponse()
         # preparing output
         file_name = "report.xlsx"
@@ -90,23 +252,60 @@ class ExportViewMixin(object):
         output['Content-Disposition'] = 'attachment; filename=' + file_name
         return output
 
+    def stream_to_excel(self, queryset, fields_names):
+        """Export queryset to excel using write-only workbook.
+
+        Rows are written to temporary file chunk by chunk and file is sent
+        to client in StreamingHttpResponse. Only memory use is bounded:
+        xlsx is a zip archive completed on save, so first byte is sent
+        after whole workbook is written and time to first byte still
+        grows with number of rows (very big selections are exported in
+        background ExportJob instead).
+        """
+        # write-only workbook doesn't keep cells in memory
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet()
+        ws.append(fields_names)
+        for query_object in self.iterate_in_chunks(queryset):
+            ws.append(self.get_excel_row(query_object, fields_names))
+        # save workbook to temporary file instead of response
+        excel_file = TemporaryFile()
+        wb.save(excel_file)
+        excel_file.seek(0)
+        output = StreamingHttpResponse(
+            FileWrapper(excel_file),
+            content_type="application/vnd.openxmlformats-officedocument."
+                         "spreadsheetml.sheet")
+        file_name = "report.xlsx"
+        output['Content-Disposition'] = 'attachment; filename=' + file_name
+        return output
+
+    def get_pdf_stylesheet_path(self):
+        return (settings.BASE_DIR + self.css_sufix +
+                settings.STATIC_URL + self.pdf_css_name)
+
     def export_to_pdf(self, queryset, **kwargs):
         ''' View generates pdf view based on models template name and
             model fields.
             In model define:
                 model, pdf_template_name, pdf_css_name, css_sufix
         '''
-
-        # create template from file
-        html_template = get_template(self.pdf_template_name)
-        # get single element list robjects
-        kwargs['robjects'] = queryset
-        rendered_html = html_template.render(kwargs).encode(encoding="UTF-8")
-        # generate pdf from rendered html
-        pdf_file = HTML(string=rendered_html).write_pdf(
-            stylesheets=[CSS(settings.BASE_DIR + self.css_sufix +
-                             settings.STATIC_URL + self.pdf_css_name)],
-        )
+        pool = None
+        if self.pdf_parallel_threshold is not None and \
+                queryset.count() >= self.pdf_parallel_threshold:
+            pool = self.get_pdf_pool()
+        if pool is not None:
+            pdf_file = self.render_pdf_in_parallel(queryset, pool, **kwargs)
+        else:
+            # create template from file
+            html_template = get_pdf_template(self.pdf_template_name)
+            # get single element list robjects
+            kwargs['robjects'] = queryset
+            rendered_html = html_template.render(
+                kwargs).encode(encoding="UTF-8")
+            # generate pdf from rendered html
+            pdf_file = render_pdf(rendered_html,
+                                  self.get_pdf_stylesheet_path())
         # Add file object to response
 
         http_response = HttpResponse(pdf_file, content_type='application/pdf')
@@ -114,3 +313,49 @@ class ExportViewMixin(object):
         # return response
 
         return http_response
+
+    def get_pdf_pool(self):
+        """Return pool of worker processes rendering pdf sections.
+
+        Pool must live longer than request, processes are never started
+        in request process. None - pdf is rendered in single job.
+        """
+        return None
+
+    def render_pdf_in_parallel(self, queryset, pool, **kwargs):
+        """Render pdf section of every object in pool worker process.
+
+        Sections are rendered without header and footer. Header, footer
+        and page numbers are rendered once for all pages and merged onto
+        sections pages, so page numbering stays continuous.
+        Html is rendered in main process, workers don't touch database.
+        """
+        html_template = get_pdf_template(self.pdf_template_name)
+        stylesheet_path = self.get_pdf_stylesheet_path()
+        sections = []
+        for query_object in queryset:
+            section_kwargs = dict(kwargs, robjects=[query_object],
+                                  pdf_section=True)
+            rendered_html = html_template.render(
+                section_kwargs).encode(encoding="UTF-8")
+            sections.append((rendered_html, stylesheet_path))
+        pdf_files = pool.starmap(render_pdf, sections)
+        readers = [PdfFileReader(BytesIO(pdf_file)) for pdf_file in pdf_files]
+        pages_count = sum(reader.getNumPages() for reader in readers)
+
+        # render header and footer on blank pages
+        pages_template = get_pdf_template(self.pdf_pages_template_name)
+        pages_html = pages_template.render(
+            dict(kwargs, pages=range(pages_count))).encode(encoding="UTF-8")
+        decorations = PdfFileReader(
+            BytesIO(render_pdf(pages_html, stylesheet_path)))
+
+        # merge sections and put header and footer on every page
+        writer = PdfFileWriter()
+        pages = (page for reader in readers for page in reader.pages)
+        for page_number, page in enumerate(pages):
+            page.mergePage(decorations.getPage(page_number))
+            writer.addPage(page)
+        output = BytesIO()
+        writer.write(output)
+        return output.getvalue()
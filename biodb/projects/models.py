@@ -32,11 +32,34 @@ class Project(models.Model):
         return self.name
 
 
+class ProjectCounters(models.Model):
+    """Numbers of robjects, samples and tags of project.
+
+    Counters are changed by signals when objects are created, moved or
+    deleted (see projects.counters) and recomputed by
+    "manage.py rebuild_project_counters", so pages show them without
+    COUNT queries.
+    """
+    project = models.OneToOneField(
+        to=Project, primary_key=True, related_name="counters",
+        on_delete=models.CASCADE)
+    robjects = models.IntegerField(default=0)
+    samples = models.IntegerField(default=0)
+    tags = models.IntegerField(default=0)
+    reconcile_date = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return "ProjectCounters " + str(self.project_id)
+
+
 class RelatedModelsCustomQuerysetClass(models.QuerySet):
     """ Class which extends models.QuerySet and provides all_as_string method
     """
     def all_as_string(queryset):
         """ Method joins objects from queryset into comma separated string
+
+        Iterating over queryset uses its result cache, so querysets from
+        prefetch_related don't hit database.
         """
         all_as_list_of_strings = [obj.__str__() for obj in queryset]
         _all_as_string = ", ".join(all_as_list_of_strings)
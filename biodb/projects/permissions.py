@@ -0,0 +1,67 @@
+"""Projects visible to users (with can_visit_project permission).
+
+Lists are read with guardian get_objects_for_user (user and group object
+permissions in one query) and kept in django cache under versioned keys.
+Every user has own version and all users share global version; a list is
+dropped by changing version (see projects.signals):
+
+* version of user changes when his object permissions (written by
+  guardian assign_perm / remove_perm), permissions of his groups, his
+  groups or his flags change,
+* global version changes when projects change or members of changed
+  group are unknown.
+
+Versions are kept in cache too, so production needs cache shared by all
+web processes (memcached, redis, database cache - see CACHES setting);
+with default per-process LocMemCache other processes would show stale
+lists until VISIBLE_PROJECTS_CACHE_TIMEOUT passes.
+"""
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from guardian.shortcuts import get_objects_for_user
+
+from projects.models import Project
+
+VISIT_PERMISSION = "projects.can_visit_project"
+VERSION_KEY = "visible-projects-version"
+
+
+def get_user_version_key(user_pk):
+    return f"{VERSION_KEY}:{user_pk}"
+
+
+def get_cache_key(user_pk):
+    """Return key of projects of user with given pk in current versions."""
+    version_keys = (VERSION_KEY, get_user_version_key(user_pk))
+    versions = cache.get_many(version_keys)
+    for key in version_keys:
+        if key not in versions:
+            # new unique version, so keys of expired version are not reused
+            cache.add(key, uuid4().hex, None)
+            versions[key] = cache.get(key)
+    return "visible-projects:{}:{}:{}".format(
+        versions[VERSION_KEY], versions[version_keys[1]], user_pk)
+
+
+def get_visible_projects(user):
+    """Return list of projects user can visit, ordered by name."""
+    key = get_cache_key(user.pk)
+    projects = cache.get(key)
+    if projects is None:
+        projects = list(get_objects_for_user(
+            user, VISIT_PERMISSION, klass=Project).order_by("name"))
+        cache.set(key, projects,
+                  getattr(settings, "VISIBLE_PROJECTS_CACHE_TIMEOUT", None))
+    return projects
+
+
+def invalidate_visible_projects(user_pks=None):
+    """Drop cached projects of users with given pks or of all users."""
+    if user_pks is None:
+        version_keys = [VERSION_KEY]
+    else:
+        version_keys = [get_user_version_key(pk) for pk in user_pks]
+    if version_keys:
+        cache.set_many({key: uuid4().hex for key in version_keys}, None)
@@ -0,0 +1,164 @@
+"""Signals invalidating cached lists of projects visible to users and
+keeping project counters (see projects.counters) up to date."""
+from django.contrib.auth.models import User
+from django.db.models.signals import m2m_changed
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.db.models.signals import pre_delete
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+from guardian.models import GroupObjectPermission
+from guardian.models import UserObjectPermission
+
+from projects.counters import change_counter
+from projects.counters import change_samples_counter
+from projects.counters import in_bulk_deletion
+from projects.models import Project
+from projects.models import ProjectCounters
+from projects.permissions import invalidate_visible_projects
+from robjects.models import Robject
+from robjects.models import Tag
+from samples.models import Sample
+
+
+@receiver(post_save, sender=UserObjectPermission)
+@receiver(post_delete, sender=UserObjectPermission)
+def invalidate_user_projects(sender, instance, **kwargs):
+    # assign_perm / remove_perm for user
+    invalidate_visible_projects([instance.user_id])
+
+
+@receiver(post_save, sender=GroupObjectPermission)
+@receiver(post_delete, sender=GroupObjectPermission)
+def invalidate_group_projects(sender, instance, **kwargs):
+    # assign_perm / remove_perm for group
+    invalidate_visible_projects(User.objects.filter(
+        groups=instance.group_id).values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=User)
+def invalidate_projects_of_changed_user(sender, instance, **kwargs):
+    # superuser and active flags change visible projects
+    invalidate_visible_projects([instance.pk])
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidate_projects_of_users(sender, instance, action, reverse, pk_set,
+                                 **kwargs):
+    if not action.startswith("post_"):
+        return
+    if not reverse:
+        invalidate_visible_projects([instance.pk])
+    elif pk_set:
+        invalidate_visible_projects(pk_set)
+    else:
+        # group or permission cleared, users are unknown
+        invalidate_visible_projects()
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+def invalidate_all_projects(sender, **kwargs):
+    # created, renamed or deleted project
+    invalidate_visible_projects()
+
+
+@receiver(post_save, sender=Project)
+def create_project_counters(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        ProjectCounters.objects.get_or_create(project=instance)
+
+
+def read_saved_value(sender, instance, field_name, update_fields):
+    """Return value (id) of foreign key of saved instance.
+
+    Saved row is read (one query) only when instance has primary key and
+    save can change the field, otherwise current value is returned.
+    """
+    attname = sender._meta.get_field(field_name).attname
+    if instance.pk is None or (update_fields is not None and
+                               field_name not in update_fields):
+        return getattr(instance, attname)
+    return sender._base_manager.filter(pk=instance.pk).values_list(
+        attname, flat=True).first()
+
+
+@receiver(pre_save, sender=Robject)
+@receiver(pre_save, sender=Tag)
+def remember_project(sender, instance, raw=False, update_fields=None,
+                     **kwargs):
+    if not raw:
+        instance._counted_project_id = read_saved_value(
+            sender, instance, "project", update_fields)
+
+
+@receiver(pre_save, sender=Sample)
+def remember_robject(sender, instance, raw=False, update_fields=None,
+                     **kwargs):
+    if not raw:
+        instance._counted_robject_id = read_saved_value(
+            sender, instance, "robject", update_fields)
+
+
+@receiver(post_save, sender=Robject)
+def count_saved_robject(sender, instance, created, raw=False, **kwargs):
+    old_project_id = None if created else instance._counted_project_id
+    if raw or old_project_id == instance.project_id:
+        return
+    change_counter(old_project_id, "robjects", -1)
+    change_counter(instance.project_id, "robjects", 1)
+    if not created:
+        # samples are moved with robject
+        samples = Sample.objects.filter(robject=instance).count()
+        change_counter(old_project_id, "samples", -samples)
+        change_counter(instance.project_id, "samples", samples)
+
+
+@receiver(post_save, sender=Tag)
+def count_saved_tag(sender, instance, created, raw=False, **kwargs):
+    old_project_id = None if created else instance._counted_project_id
+    if raw or old_project_id == instance.project_id:
+        return
+    change_counter(old_project_id, "tags", -1)
+    change_counter(instance.project_id, "tags", 1)
+
+
+@receiver(pre_delete, sender=Robject)
+def remember_robject_samples(sender, instance, **kwargs):
+    # foreign keys of samples can be cleared before deletion
+    instance._counted_samples_ids = list(Sample.objects.filter(
+        robject=instance).values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Robject)
+def count_deleted_robject(sender, instance, **kwargs):
+    change_counter(instance.project_id, "robjects", -1)
+    # samples deleted in cascade before robject are subtracted by their
+    # signals, the ones still existing will not find robject and are
+    # subtracted here
+    samples_ids = getattr(instance, "_counted_samples_ids", None)
+    if samples_ids:
+        change_counter(instance.project_id, "samples", -Sample.objects.filter(
+            pk__in=samples_ids).count())
+
+
+@receiver(post_delete, sender=Tag)
+def count_deleted_tag(sender, instance, **kwargs):
+    change_counter(instance.project_id, "tags", -1)
+
+
+@receiver(post_save, sender=Sample)
+def count_saved_sample(sender, instance, created, raw=False, **kwargs):
+    old_robject_id = None if created else instance._counted_robject_id
+    if raw or old_robject_id == instance.robject_id:
+        return
+    change_samples_counter(old_robject_id, -1)
+    change_samples_counter(instance.robject_id, 1)
+
+
+@receiver(post_delete, sender=Sample)
+def count_deleted_sample(sender, instance, **kwargs):
+    # samples deleted with robjects in bulk are subtracted by deletion
+    if not in_bulk_deletion():
+        change_samples_counter(instance.robject_id, -1)
@@ -4,6 +4,16 @@ $(function() {
       $(".robject").prop("checked", true);
     } else {
       $(".robject").prop("checked", false);
+      $(".select-all-robjects").prop("checked", false);
+    }
+  });
+  // selecting robjects on all pages selects robjects on this page too
+  $(".select-all-robjects").click(function() {
+    $(".robject, .select-all").prop("checked", this.checked);
+  });
+  $(".robject").click(function() {
+    if (!this.checked) {
+      $(".select-all, .select-all-robjects").prop("checked", false);
     }
   });
 });
@@ -0,0 +1,63 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from projects.dataset import generate_dataset
+from projects.models import Project
+from projects.models import ProjectCounters
+from robjects.models import Name
+from robjects.models import Robject
+from robjects.models import Tag
+from samples.models import Sample
+
+
+class RebuildProjectCountersCommandTestCase(TestCase):
+
+    def test_command_fixes_counters(self):
+        proj = Project.objects.create(name="project_1")
+        # bulk_create doesn't send signals
+        Robject.objects.bulk_create(
+            Robject(name=f"robject_{idx}", project=proj) for idx in range(3))
+        ProjectCounters.objects.filter(project=proj).delete()
+        stdout = StringIO()
+        call_command("rebuild_project_counters", stdout=stdout)
+        counters = ProjectCounters.objects.get(project=proj)
+        self.assertEqual(
+            (counters.robjects, counters.samples, counters.tags), (3, 0, 0))
+        self.assertIn("Fixed counters of 1 projects.", stdout.getvalue())
+        self.assertIsNotNone(counters.reconcile_date)
+
+
+class GenerateDatasetCommandTestCase(TestCase):
+
+    def test_command_generates_dataset(self):
+        user = User.objects.create_user(username="USERNAME")
+        stdout = StringIO()
+        call_command("generate_dataset", projects=2, robjects=5, tags=4,
+                     names=6, samples=2, history_depth=3, user="USERNAME",
+                     seed=1, stdout=stdout)
+        self.assertEqual(Project.objects.count(), 2)
+        proj = Project.objects.get(name="dataset_1")
+        self.assertTrue(user.has_perm("projects.can_visit_project", proj))
+        self.assertEqual(Robject.objects.filter(project=proj).count(), 5)
+        self.assertEqual(Tag.objects.filter(project=proj).count(), 4)
+        self.assertEqual(Sample.objects.count(), 20)
+        self.assertEqual(Robject.history.count(), 30)
+        self.assertEqual(ProjectCounters.objects.get(project=proj).samples,
+                         10)
+        self.assertIn("Created 2 projects, 10 robjects, 8 tags, 6 names, "
+                      "20 samples and 30 historical records.",
+                      stdout.getvalue())
+
+    def test_command_refuses_existing_prefix(self):
+        Project.objects.create(name="dataset_1")
+        with self.assertRaises(CommandError):
+            call_command("generate_dataset", robjects=1, stdout=StringIO())
+
+    def test_existing_names_are_reused(self):
+        Name.objects.create(name="dataset_name_0")
+        summary = generate_dataset(robjects=1, names=3, samples=0)
+        self.assertEqual(summary.names, 2)
+        self.assertEqual(Name.objects.count(), 3)
@@ -0,0 +1,104 @@
+import os
+from datetime import datetime
+from tempfile import NamedTemporaryFile
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+from django.template.loader import get_template
+from django.test import TestCase
+from django.test import override_settings
+from projects import mixins
+from projects.mixins import ExportViewMixin
+from projects.mixins import get_pdf_template
+from projects.mixins import get_stylesheet
+from projects.mixins import HTML_TO_TEXT_CACHE_MAX_CHARS
+from projects.mixins import cached_html_to_text
+
+
+class ExportViewMixinStripFieldTestCase(TestCase):
+    def setUp(self):
+        cached_html_to_text.cache_clear()
+
+    def test_datetime_is_formatted(self):
+        value = datetime(2017, 11, 24, 12, 30)
+        self.assertEqual(ExportViewMixin().strip_field(value),
+                         "2017-11-24 12:30")
+
+    def test_text_without_markup_is_not_changed(self):
+        self.assertEqual(ExportViewMixin().strip_field(" a &amp; b "),
+                         " a &amp; b ")
+        self.assertEqual(ExportViewMixin().strip_field(None), "None")
+
+    def test_markup_is_removed(self):
+        self.assertEqual(
+            ExportViewMixin().strip_field("<p> robject <b>notes</b></p>\n"),
+            "robject notes")
+
+    def test_text_with_lower_than_char_only_is_not_changed(self):
+        self.assertEqual(ExportViewMixin().strip_field(" 1 < 2 "), " 1 < 2 ")
+
+    def test_repeated_values_are_parsed_once(self):
+        for _ in range(3):
+            ExportViewMixin().strip_field("<p>notes</p>")
+        self.assertEqual(cached_html_to_text.cache_info().misses, 1)
+        self.assertEqual(cached_html_to_text.cache_info().hits, 2)
+
+    def test_long_values_are_not_cached(self):
+        value = "<p>" + "A" * HTML_TO_TEXT_CACHE_MAX_CHARS + "</p>"
+        self.assertEqual(ExportViewMixin().strip_field(value),
+                         "A" * HTML_TO_TEXT_CACHE_MAX_CHARS)
+        self.assertEqual(cached_html_to_text.cache_info().currsize, 0)
+
+
+class PdfCacheTestCase(TestCase):
+    def setUp(self):
+        mixins._stylesheets_cache.clear()
+        mixins._templates_cache.clear()
+        with NamedTemporaryFile("w", suffix=".css", delete=False) as f:
+            f.write("h1 { color: gray; }")
+        self.css_path = f.name
+        self.addCleanup(os.remove, self.css_path)
+
+    @patch("projects.mixins.CSS")
+    def test_stylesheet_is_parsed_once(self, css_mock):
+        first = get_stylesheet(self.css_path)
+        second = get_stylesheet(self.css_path)
+        self.assertIs(first, second)
+        self.assertEqual(css_mock.call_count, 1)
+
+    @patch("projects.mixins.CSS")
+    def test_stylesheet_is_parsed_again_when_file_changes(self, css_mock):
+        get_stylesheet(self.css_path)
+        mtime = os.path.getmtime(self.css_path)
+        os.utime(self.css_path, (mtime + 10, mtime + 10))
+        get_stylesheet(self.css_path)
+        self.assertEqual(css_mock.call_count, 2)
+
+    def test_pdf_template_is_loaded_once(self):
+        with patch("projects.mixins.get_template",
+                   wraps=get_template) as get_template_mock:
+            first = get_pdf_template("robjects/robject_raport_pdf.html")
+            second = get_pdf_template("robjects/robject_raport_pdf.html")
+        self.assertIs(first, second)
+        self.assertEqual(get_template_mock.call_count, 1)
+
+    def test_pdf_template_is_loaded_again_when_included_file_changes(self):
+        templates_dir = TemporaryDirectory()
+        self.addCleanup(templates_dir.cleanup)
+        page_path = os.path.join(templates_dir.name, "page.html")
+        with open(os.path.join(templates_dir.name, "raport.html"), "w") as f:
+            f.write('{% include "page.html" %}')
+        with open(page_path, "w") as f:
+            f.write("page")
+        templates = [{
+            "BACKEND": "django.template.backends.django.DjangoTemplates",
+            "DIRS": [templates_dir.name],
+        }]
+        with override_settings(TEMPLATES=templates), \
+                patch("projects.mixins.get_template",
+                      wraps=get_template) as get_template_mock:
+            get_pdf_template("raport.html")
+            get_pdf_template("raport.html")
+            mtime = os.path.getmtime(page_path)
+            os.utime(page_path, (mtime + 10, mtime + 10))
+            get_pdf_template("raport.html")
+        self.assertEqual(get_template_mock.call_count, 2)
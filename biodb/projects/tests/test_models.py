@@ -1,9 +1,16 @@
 from django.core.exceptions import ValidationError
 from django.db import IntegrityError
+from django.db import connection
 from django.db import models
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from projects.counters import reconcile_counters
 from projects.models import Project
+from projects.models import ProjectCounters
+from robjects.deletion import delete_robjects
+from robjects.models import Robject
 from robjects.models import Tag
+from samples.models import Sample
 from django.core.urlresolvers import reverse
 
 
@@ -67,3 +74,86 @@ class TagModelTestCase(TestCase):
         p = Project.objects.create(name="test_proj")
         t1 = Tag.objects.create(name="test_tag_1", project=p)
         self.assertEqual(t1.get_absolute_url(), "/projects/test_proj/tags/")
+
+
+class ProjectCountersTestCase(TestCase):
+
+    def get_counters(self, proj):
+        counters = ProjectCounters.objects.get(project=proj)
+        return counters.robjects, counters.samples, counters.tags
+
+    def test_counters_are_created_with_project(self):
+        proj = Project.objects.create(name="project_1")
+        self.assertEqual(self.get_counters(proj), (0, 0, 0))
+
+    def test_counters_change_when_objects_are_created_and_deleted(self):
+        proj = Project.objects.create(name="project_1")
+        robj = Robject.objects.create(name="robject_1", project=proj)
+        Sample.objects.create(robject=robj)
+        tag = Tag.objects.create(name="tag_1", project=proj)
+        self.assertEqual(self.get_counters(proj), (1, 1, 1))
+        tag.delete()
+        robj.delete()
+        self.assertEqual(self.get_counters(proj), (0, 0, 0))
+
+    def test_counters_change_when_robject_is_moved(self):
+        proj_1 = Project.objects.create(name="project_1")
+        proj_2 = Project.objects.create(name="project_2")
+        robj = Robject.objects.create(name="robject_1", project=proj_1)
+        Sample.objects.create(robject=robj)
+        robj = Robject.objects.get(pk=robj.pk)
+        robj.project = proj_2
+        robj.save()
+        self.assertEqual(self.get_counters(proj_1), (0, 0, 0))
+        self.assertEqual(self.get_counters(proj_2), (1, 1, 0))
+
+    def test_counters_change_after_bulk_delete(self):
+        proj = Project.objects.create(name="project_1")
+        robj = Robject.objects.create(name="robject_1", project=proj)
+        Robject.objects.create(name="robject_2", project=proj)
+        Sample.objects.create(robject=robj)
+        Sample.objects.create(robject=robj)
+        Tag.objects.create(name="tag_1", project=proj)
+        delete_robjects(Robject.objects.filter(name="robject_1"))
+        self.assertEqual(self.get_counters(proj), (1, 0, 1))
+
+    def test_cascade_delete_takes_one_query_per_sample(self):
+        proj = Project.objects.create(name="project_1")
+        numbers_of_queries = []
+        for samples in (1, 5):
+            robj = Robject.objects.create(name=f"robject_{samples}",
+                                          project=proj)
+            for _ in range(samples):
+                Sample.objects.create(robject=robj)
+            with CaptureQueriesContext(connection) as queries:
+                robj.delete()
+            numbers_of_queries.append(len(queries))
+            self.assertEqual(self.get_counters(proj), (0, 0, 0))
+        # counter update without reading project of sample
+        self.assertEqual(numbers_of_queries[1] - numbers_of_queries[0], 4)
+
+    def test_sample_is_counted_with_one_query(self):
+        proj = Project.objects.create(name="project_1")
+        robj = Robject.objects.create(name="robject_1", project=proj)
+        with CaptureQueriesContext(connection) as queries:
+            Sample.objects.create(robject=robj)
+        # insert and counter update
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(self.get_counters(proj), (1, 1, 0))
+
+    def test_sample_delete_after_robject_delete_is_counted(self):
+        proj = Project.objects.create(name="project_1")
+        Robject.objects.create(name="robject_1", project=proj).delete()
+        robj = Robject.objects.create(name="robject_2", project=proj)
+        sample = Sample.objects.create(robject=robj)
+        sample.delete()
+        self.assertEqual(self.get_counters(proj), (1, 0, 0))
+
+    def test_reconcile_updates_only_wrong_counters(self):
+        proj_1 = Project.objects.create(name="project_1")
+        proj_2 = Project.objects.create(name="project_2")
+        Robject.objects.create(name="robject_1", project=proj_1)
+        ProjectCounters.objects.filter(project=proj_2).update(tags=3)
+        self.assertEqual(reconcile_counters(), 1)
+        self.assertEqual(self.get_counters(proj_1), (1, 0, 0))
+        self.assertEqual(self.get_counters(proj_2), (0, 0, 0))
@@ -2,9 +2,17 @@ from projects.models import Project
 from robjects.models import Tag
 from unit_tests.base import FunctionalTest
 from guardian.shortcuts import assign_perm
+from guardian.shortcuts import remove_perm
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 
 class ProjectListViewTestCase(FunctionalTest):
+    def setUp(self):
+        # drop lists cached by other tests (user pks are reused)
+        cache.clear()
 
     def test_renders_given_template(self):
         self.default_set_up_for_projects_pages()
@@ -19,7 +27,9 @@ class ProjectListViewTestCase(FunctionalTest):
     def test_get_project_list_from_db(self):
         proj1 = Project.objects.create(name="project_1")
         proj2 = Project.objects.create(name="project_2")
-        self.default_set_up_for_projects_pages()
+        user = self.default_set_up_for_projects_pages()
+        assign_perm("projects.can_visit_project", user, proj1)
+        assign_perm("projects.can_visit_project", user, proj2)
         response = self.client.get("/projects/")
         self.assertIn(proj1, response.context["project_list"])
         self.assertIn(proj2, response.context["project_list"])
@@ -27,6 +37,74 @@ class ProjectListViewTestCase(FunctionalTest):
     def test_login_requirement(self):
         self.annonymous_testing_helper(self.PROJECT_LIST_URL)
 
+    def test_only_projects_user_can_visit_are_listed(self):
+        user = self.default_set_up_for_projects_pages()
+        visible = Project.objects.create(name="project_1")
+        Project.objects.create(name="project_2")
+        group_project = Project.objects.create(name="project_3")
+        assign_perm("projects.can_visit_project", user, visible)
+        group = Group.objects.create(name="group")
+        group.user_set.add(user)
+        assign_perm("projects.can_visit_project", group, group_project)
+        response = self.client.get("/projects/")
+        self.assertEqual(response.context["project_list"],
+                         [visible, group_project])
+
+    def test_list_is_updated_when_permissions_change(self):
+        user = self.default_set_up_for_projects_pages()
+        proj = Project.objects.create(name="project_1")
+        self.client.get("/projects/")
+        assign_perm("projects.can_visit_project", user, proj)
+        response = self.client.get("/projects/")
+        self.assertEqual(response.context["project_list"], [proj])
+        remove_perm("projects.can_visit_project", user, proj)
+        response = self.client.get("/projects/")
+        self.assertEqual(response.context["project_list"], [])
+
+    def test_project_counters_are_rendered(self):
+        user = self.default_set_up_for_projects_pages()
+        proj = Project.objects.create(name="project_1")
+        assign_perm("projects.can_visit_project", user, proj)
+        Tag.objects.create(name="tag_1", project=proj)
+        response = self.client.get("/projects/")
+        self.assertContains(response, "(0 robjects,")
+        self.assertContains(response, "1 tags)")
+
+    def test_list_is_rendered_in_constant_number_of_queries(self):
+        user = self.default_set_up_for_projects_pages()
+
+        def add_project():
+            proj = Project.objects.create(
+                name=f"project_{Project.objects.count()}")
+            assign_perm("projects.can_visit_project", user, proj)
+        response = self.assertConstantNumQueries("/projects/", add_project,
+                                                 rows=20)
+        self.assertEqual(len(response.context["project_list"]), 21)
+
+    def test_cached_list_is_read_without_permissions_queries(self):
+        user = self.default_set_up_for_projects_pages()
+        proj = Project.objects.create(name="project_1")
+        assign_perm("projects.can_visit_project", user, proj)
+        with CaptureQueriesContext(connection) as uncached:
+            self.client.get("/projects/")
+        with CaptureQueriesContext(connection) as cached:
+            response = self.client.get("/projects/")
+        self.assertLess(len(cached), len(uncached))
+        self.assertEqual(response.context["project_list"], [proj])
+
+    def test_group_permission_change_is_visible(self):
+        user = self.default_set_up_for_projects_pages()
+        proj = Project.objects.create(name="project_1")
+        group = Group.objects.create(name="group_1")
+        user.groups.add(group)
+        self.client.get("/projects/")
+        assign_perm("projects.can_visit_project", group, proj)
+        response = self.client.get("/projects/")
+        self.assertEqual(response.context["project_list"], [proj])
+        remove_perm("projects.can_visit_project", group, proj)
+        response = self.client.get("/projects/")
+        self.assertEqual(response.context["project_list"], [])
+
 
 class TagListViewTestCase(FunctionalTest):
     def test_view_returns_404_when_slug_not_match(self):
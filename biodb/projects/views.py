@@ -14,11 +14,20 @@ from django.shortcuts import redirect
 # Create your views here.
 from robjects.models import Tag
 
+from projects.counters import attach_counters
 from projects.models import Project
+from projects.permissions import get_visible_projects
 
 
 class ProjectListView(LoginRequiredMixin, ListView):
+    """List projects user can visit (cached, see projects.permissions)
+    with their counters."""
     model = Project
+    template_name = "projects/project_list.html"
+    context_object_name = "project_list"
+
+    def get_queryset(self):
+        return attach_counters(get_visible_projects(self.request.user))
 
 
 class TagsListView(LoginPermissionRequiredMixin, ListView):
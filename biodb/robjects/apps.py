@@ -3,3 +3,10 @@ from django.apps import AppConfig
 
 class RobjectsConfig(AppConfig):
     name = 'robjects'
+
+    def ready(self):
+        # connect history and search index signals
+        from robjects import signals
+        from robjects.search import get_search_backend
+        if get_search_backend() is not None:
+            signals.connect_search_index_receivers()
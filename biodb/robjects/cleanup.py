@@ -0,0 +1,85 @@
+"""Garbage collection of orphan names.
+
+Names are created in robject form popup (NameCreateView) before robject
+is saved, so abandoned forms leave names without robjects. They are
+deleted by "manage.py delete_orphan_names" and, when
+ORPHAN_NAMES_SWEEP_INTERVAL is set, by sweeper run after requests at most
+once per interval (see robjects.signals).
+"""
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from robjects.models import Name
+
+_sweep_lock = threading.Lock()
+_last_sweep = None
+
+
+def get_orphan_names(min_age=None):
+    """Return queryset of names without robjects older than min_age
+    seconds (names without create date are old)."""
+    queryset = Name.objects.filter(robjects=None)
+    if min_age:
+        created_before = timezone.now() - timedelta(seconds=min_age)
+        queryset = queryset.filter(
+            Q(create_date__lt=created_before) | Q(create_date=None))
+    return queryset
+
+
+def delete_orphan_names(min_age=None, batch_size=500, max_batches=None):
+    """Delete orphan names in batches and return their number.
+
+    Args:
+        min_age (int): seconds after creation names are kept.
+        batch_size (int): number of names deleted in one query.
+        max_batches (int): stop after that many batches, None - delete
+            all orphan names.
+    """
+    deleted = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        ids = list(get_orphan_names(min_age).values_list(
+            "pk", flat=True)[:batch_size])
+        if not ids:
+            break
+        # checked again while names are fetched for deletion, name could
+        # get robject meanwhile; orphan names have no robjects, so delete()
+        # takes the same few queries for every batch
+        _, deleted_rows = get_orphan_names(min_age).filter(
+            pk__in=ids).delete()
+        deleted += deleted_rows.get(Name._meta.label, 0)
+        batches += 1
+        if len(ids) < batch_size:
+            break
+    return deleted
+
+
+def sweep_orphan_names():
+    """Delete one batch of orphan names if ORPHAN_NAMES_SWEEP_INTERVAL
+    seconds passed since last sweep in this process.
+
+    Returns:
+        int: number of deleted names or None when sweep was skipped.
+    """
+    global _last_sweep
+    interval = getattr(settings, "ORPHAN_NAMES_SWEEP_INTERVAL", None)
+    if interval is None:
+        return None
+    # other thread is sweeping already
+    if not _sweep_lock.acquire(blocking=False):
+        return None
+    try:
+        now = time.monotonic()
+        if _last_sweep is not None and now - _last_sweep < interval:
+            return None
+        _last_sweep = now
+        return delete_orphan_names(
+            min_age=settings.ORPHAN_NAMES_MIN_AGE,
+            batch_size=settings.ORPHAN_NAMES_BATCH_SIZE, max_batches=1)
+    finally:
+        _sweep_lock.release()
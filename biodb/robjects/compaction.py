@@ -0,0 +1,295 @@
+"""Compaction of robjects history.
+
+Every save of robject stores copy of all its fields in HistoricalRobject
+table. Compaction:
+    * removes snapshots which don't change any field of previous snapshot
+      (eg. robject saved twice in one edit),
+    * moves old snapshots to ArchivedRobjectHistory table, where they are
+      stored as compressed differences to previous snapshot.
+Policy is set in settings (HISTORY_COLLAPSE_UNCHANGED,
+HISTORY_ARCHIVE_AFTER_DAYS, HISTORY_KEEP_LATEST) and compaction is run by
+"manage.py compact_history". Archived snapshots are reconstructed by
+load_archived_history and shown in history view like other versions.
+"""
+from datetime import date
+from itertools import groupby
+from itertools import takewhile
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from robjects.models import ArchivedRobjectHistory
+from robjects.models import Robject
+from robjects.models import RobjectHistoryDiff
+from tools.diff import diff_text
+from tools.diff import EQUAL
+from tools.diff import INSERT
+from tools.history import generate_versions_range
+
+# fields changed by every save, ignored when looking for unchanged snapshots
+COLLAPSE_IGNORED_FIELDS = ("modify_date",)
+# shorter texts are archived whole, longer as list of text operations
+MIN_TEXT_DELTA_LENGTH = 200
+# text operations: keep or delete number of chars, insert text
+KEEP, REMOVE, ADD = 0, -1, 1
+# max number of ids in single "IN" lookup (sqlite allows 999 variables)
+MAX_IDS_IN_QUERY = 500
+
+
+def get_snapshot_fields():
+    """Return robject fields stored in historical records."""
+    return Robject._meta.concrete_fields
+
+
+def get_snapshot_values(history):
+    """Return dict of robject fields values (by attname) of record."""
+    return {field.attname: getattr(history, field.attname)
+            for field in get_snapshot_fields()}
+
+
+def is_unchanged(history, previous_history):
+    """Return True if history record doesn't change previous one."""
+    return history.history_type == "~" and all(
+        getattr(history, field.attname) ==
+        getattr(previous_history, field.attname)
+        for field in get_snapshot_fields()
+        if field.name not in COLLAPSE_IGNORED_FIELDS)
+
+
+def dump_value(value):
+    """Return JSON serializable field value."""
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def encode_text_delta(old, new):
+    """Return list of [operation, argument] lists turning old into new.
+
+    Operations are: [KEEP, n] - copy n chars of old text, [REMOVE, n] -
+    skip n chars of old text, [ADD, text] - insert text.
+    """
+    operations = []
+    for tag, text in diff_text(
+            old, new,
+            max_edits=getattr(settings, "HISTORY_DIFF_MAX_EDITS", None)):
+        if tag == EQUAL:
+            operations.append([KEEP, len(text)])
+        elif tag == INSERT:
+            operations.append([ADD, text])
+        else:
+            operations.append([REMOVE, len(text)])
+    return operations
+
+
+def apply_text_delta(old, operations):
+    """Return text made by applying encode_text_delta operations to old."""
+    parts = []
+    position = 0
+    for operation, argument in operations:
+        if operation == KEEP:
+            parts.append(old[position:position + argument])
+            position += argument
+        elif operation == REMOVE:
+            position += argument
+        else:
+            parts.append(argument)
+    return "".join(parts)
+
+
+def encode_delta(values, previous_values):
+    """Return JSON serializable changes of values to previous_values.
+
+    Changed value is stored as {"value": value} or, for long texts, as
+    {"text": operations} (see encode_text_delta).
+    """
+    delta = {}
+    for name, value in values.items():
+        old_value = previous_values[name]
+        if value == old_value:
+            continue
+        if isinstance(value, str) and isinstance(old_value, str) and \
+                len(old_value) >= MIN_TEXT_DELTA_LENGTH:
+            delta[name] = {"text": encode_text_delta(old_value, value)}
+        else:
+            delta[name] = {"value": dump_value(value)}
+    return delta
+
+
+def load_values(data):
+    """Return robject fields values from JSON data of archived record."""
+    fields = {field.attname: field for field in get_snapshot_fields()}
+    return {name: fields[name].to_python(value)
+            for name, value in data.items()}
+
+
+def apply_delta(previous_values, delta):
+    """Return values made by applying encode_delta changes."""
+    values = dict(previous_values)
+    for name, change in delta.items():
+        if "text" in change:
+            values[name] = apply_text_delta(values[name], change["text"])
+        else:
+            values.update(load_values({name: change["value"]}))
+    return values
+
+
+def archive_records(records):
+    """Return unsaved ArchivedRobjectHistory objects of robject records.
+
+    Records (oldest first) are stored as differences to previous record,
+    first of them is stored whole.
+    """
+    archived = []
+    previous_values = None
+    for history in records:
+        values = get_snapshot_values(history)
+        record = ArchivedRobjectHistory(
+            robject_id=history.id, history_id=history.history_id,
+            history_date=history.history_date,
+            history_type=history.history_type,
+            history_change_reason=history.history_change_reason,
+            history_user_id=history.history_user_id,
+            is_delta=previous_values is not None)
+        if previous_values is None:
+            record.set_data({name: dump_value(value)
+                             for name, value in values.items()})
+        else:
+            record.set_data(encode_delta(values, previous_values))
+        archived.append(record)
+        previous_values = values
+    return archived
+
+
+class ArchivedSnapshot(object):
+    """Historical robject record reconstructed from archive.
+
+    Has attributes of HistoricalRobject objects used by CustomHistory, so
+    archived versions are shown in history view like other versions.
+    """
+    HISTORY_TYPES = {"+": "Created", "~": "Changed", "-": "Deleted"}
+
+    def __init__(self, archived, values):
+        self.history_id = archived.history_id
+        self.history_date = archived.history_date
+        self.history_type = archived.history_type
+        self.history_change_reason = archived.history_change_reason
+        self.history_user_id = archived.history_user_id
+        self.values = values
+        for name, value in values.items():
+            setattr(self, name, value)
+        # set by load_archived_history
+        self.create_by = None
+        self.modify_by = None
+
+    def get_history_type_display(self):
+        return self.HISTORY_TYPES[self.history_type]
+
+    @property
+    def instance(self):
+        return Robject(**self.values)
+
+
+def load_archived_history(robject_id):
+    """Return ArchivedSnapshot objects of robject, newest first."""
+    snapshots = []
+    values = None
+    for archived in ArchivedRobjectHistory.objects.filter(
+            robject_id=robject_id).order_by("history_id"):
+        data = archived.get_data()
+        if archived.is_delta:
+            values = apply_delta(values, data)
+        else:
+            values = load_values(data)
+        snapshots.append(ArchivedSnapshot(archived, values))
+    users = User.objects.in_bulk(
+        ({snapshot.modify_by_id for snapshot in snapshots} |
+         {snapshot.create_by_id for snapshot in snapshots}) - {None})
+    for snapshot in snapshots:
+        snapshot.modify_by = users.get(snapshot.modify_by_id)
+        snapshot.create_by = users.get(snapshot.create_by_id)
+    return snapshots[::-1]
+
+
+def generate_robject_versions(robject, history, history_count,
+                              archived_count, start, stop, exclude=None):
+    """Return CustomHistory objects of robject versions [start:stop].
+
+    Versions (newest first) are records of history queryset followed by
+    archived ones, which are always older. Archive is read only when
+    page contains archived versions or the oldest not archived one.
+    """
+    count = history_count + archived_count
+    versions = []
+    if start < history_count:
+        versions = generate_versions_range(
+            history, start, min(stop, history_count), count,
+            exclude=exclude,
+            get_stored_diff=RobjectHistoryDiff.get_stored_diff_objects)
+    if archived_count and stop >= history_count:
+        archived = load_archived_history(robject.id)
+        if start < history_count:
+            # oldest not archived version is compared with archived one
+            versions[-1].previous_version = archived[0]
+        versions.extend(generate_versions_range(
+            archived, max(start - history_count, 0), stop - history_count,
+            archived_count, exclude=exclude))
+    return versions
+
+
+def chunks(items, size):
+    return [items[idx:idx + size] for idx in range(0, len(items), size)]
+
+
+def compact_history(robject_ids, collapse=True, archive_before=None,
+                    keep_latest=0, dry_run=False):
+    """Compact history of robjects with given ids in one transaction.
+
+    Args:
+        robject_ids (list): ids of robjects.
+        collapse (bool): remove records not changing previous record.
+        archive_before (datetime): archive records older than that, None
+            to not archive.
+        keep_latest (int): number of newest records of every robject
+            which are never archived.
+        dry_run (bool): only count records.
+    Returns:
+        tuple: (collapsed, archived) numbers of records.
+    """
+    history_model = Robject.history.model
+    records = history_model.objects.filter(
+        id__in=robject_ids).order_by("id", "history_id")
+    collapsed = []
+    # history id: id of new previous record (in place of collapsed one)
+    new_previous = {}
+    archived = []
+    for robject_id, robject_records in groupby(records, lambda h: h.id):
+        kept = []
+        previous_history = None
+        for history in robject_records:
+            if collapse and kept and is_unchanged(history, kept[-1]):
+                collapsed.append(history.history_id)
+            else:
+                if kept and previous_history is not kept[-1]:
+                    new_previous[history.history_id] = kept[-1].history_id
+                kept.append(history)
+            previous_history = history
+        if archive_before is not None:
+            archivable = kept[:max(len(kept) - keep_latest, 0)]
+            archived.extend(archive_records(takewhile(
+                lambda h: h.history_date < archive_before, archivable)))
+    if dry_run:
+        return len(collapsed), len(archived)
+    with transaction.atomic():
+        for history_id, previous_history_id in new_previous.items():
+            RobjectHistoryDiff.objects.filter(history_id=history_id).update(
+                previous_history_id=previous_history_id)
+        for ids in chunks(collapsed, MAX_IDS_IN_QUERY):
+            history_model.objects.filter(history_id__in=ids).delete()
+        ArchivedRobjectHistory.objects.bulk_create(
+            archived, batch_size=MAX_IDS_IN_QUERY)
+        for ids in chunks([record.history_id for record in archived],
+                          MAX_IDS_IN_QUERY):
+            history_model.objects.filter(history_id__in=ids).delete()
+    return len(collapsed), len(archived)
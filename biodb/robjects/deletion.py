@@ -0,0 +1,113 @@
+"""Bulk deletion of robjects.
+
+Deleting queryset of robjects makes django fetch every robject and send
+post_delete signal for each of them (simple_history writes "Deleted"
+record, search index removes document), so number of queries grows with
+number of robjects. delete_robjects deletes robjects in batches, with a
+constant number of queries per batch: related rows, "Deleted" historical
+records and search index documents are written in bulk. Deleted
+robjects and samples are subtracted from counters of projects (no
+signals are sent) with one query per project and counter.
+"""
+from collections import namedtuple
+
+from django.db import connection
+from django.db import transaction
+from django.db.models import CASCADE
+from django.utils import timezone
+
+from projects.counters import bulk_deletion
+from projects.counters import subtract_deleted_robjects
+from robjects.compaction import get_snapshot_values
+from robjects.models import Robject
+from robjects.search import get_search_backend
+
+# numbers of deleted robjects, their related rows and batches
+DeleteSummary = namedtuple("DeleteSummary",  # pylint: disable-msg=C0103
+                           ["robjects", "related", "batches"])
+
+
+def delete_related(robjects_ids):
+    """Delete rows related to robjects.
+
+    Returns:
+        dict: numbers of deleted (or unlinked) rows by model verbose name.
+    """
+    deleted = {}
+    for field in Robject._meta.many_to_many:
+        field.remote_field.through.objects.filter(
+            **{f"{field.m2m_field_name()}__in": robjects_ids}).delete()
+    for relation in Robject._meta.related_objects:
+        queryset = relation.related_model._base_manager.filter(
+            **{f"{relation.field.name}__in": robjects_ids})
+        if relation.on_delete is CASCADE:
+            count, _ = queryset.delete()
+        else:
+            count = queryset.update(**{relation.field.name: None})
+        deleted[str(relation.related_model._meta.verbose_name_plural)] = \
+            count
+    return deleted
+
+
+def delete_rows(robjects_ids):
+    """Delete rows of robjects with given ids in single query.
+
+    Plain DELETE is used because Robject.objects.filter(...).delete()
+    fetches robjects and sends pre_delete and post_delete for every one of
+    them, which would write second "Deleted" records and subtract deleted
+    robjects from counters again (delete_batch does it in bulk).
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM {} WHERE {} IN ({})".format(
+            connection.ops.quote_name(Robject._meta.db_table),
+            connection.ops.quote_name(Robject._meta.pk.column),
+            ", ".join(["%s"] * len(robjects_ids))), robjects_ids)
+
+
+def delete_batch(robjects_ids, user=None):
+    """Delete robjects with given ids in one transaction.
+
+    Returns:
+        tuple: (number of deleted robjects, dict of related rows numbers).
+    """
+    history_model = Robject.history.model
+    with transaction.atomic():
+        robjects = list(Robject.objects.filter(pk__in=robjects_ids))
+        history_date = timezone.now()
+        history_model.objects.bulk_create([
+            history_model(history_type="-", history_date=history_date,
+                          history_user=user, **get_snapshot_values(robject))
+            for robject in robjects])
+        ids = [robject.pk for robject in robjects]
+        # samples are counted before they are deleted with related rows
+        subtract_deleted_robjects(robjects)
+        with bulk_deletion():
+            related = delete_related(ids)
+        if ids:
+            delete_rows(ids)
+        backend = get_search_backend()
+        if backend is not None:
+            backend.remove(ids)
+    return len(ids), related
+
+
+def delete_robjects(queryset, user=None, batch_size=500):
+    """Delete robjects of queryset in batches of batch_size robjects.
+
+    Args:
+        queryset (QuerySet): robjects to delete.
+        user (User): user written in "Deleted" historical records.
+        batch_size (int): number of robjects deleted in one transaction.
+    Returns:
+        DeleteSummary: numbers of deleted objects.
+    """
+    ids = list(queryset.order_by("pk").values_list("pk", flat=True))
+    summary = DeleteSummary(0, {}, 0)
+    for start in range(0, len(ids), batch_size):
+        count, related = delete_batch(ids[start:start + batch_size], user)
+        summary = DeleteSummary(
+            summary.robjects + count,
+            {name: summary.related.get(name, 0) + related_count
+             for name, related_count in related.items()},
+            summary.batches + 1)
+    return summary
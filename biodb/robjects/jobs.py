@@ -0,0 +1,75 @@
+"""Background export jobs run in local worker processes."""
+from multiprocessing import get_context
+from tempfile import TemporaryFile
+
+import django
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from robjects.models import ExportJob
+from robjects.models import Robject
+
+_pool = None
+
+
+def get_pool():
+    """Return pool of worker processes, created on first use.
+
+    Workers are spawned (not forked), so they don't share database
+    connections with web server process.
+    """
+    global _pool
+    if _pool is None:
+        _pool = get_context("spawn").Pool(settings.EXPORT_JOBS_WORKERS,
+                                          initializer=django.setup)
+    return _pool
+
+
+def enqueue_export_job(job):
+    """Run job in worker process as soon as it is saved in database."""
+    if not settings.EXPORT_JOBS_WORKERS:
+        run_export_job(job.pk)
+        return
+    transaction.on_commit(
+        lambda: get_pool().apply_async(run_export_job, (job.pk,)))
+
+
+def run_export_job(job_pk):
+    """Generate export file and save it as job result."""
+    # views import this module
+    from robjects.views import ExportExcelView
+    from robjects.views import RobjectPDFeView
+
+    job = ExportJob.objects.select_related("project", "create_by").get(
+        pk=job_pk)
+    job.status = ExportJob.RUNNING
+    job.save(update_fields=["status"])
+    try:
+        queryset = Robject.objects.filter(
+            pk__in=job.get_robjects_ids(), project=job.project)
+        if job.export_type == ExportJob.EXCEL:
+            response = ExportExcelView().export(queryset)
+        else:
+            view = RobjectPDFeView()
+            # worker processes can't start their own pools
+            view.pdf_parallel_threshold = None
+            response = view.export(queryset, user=job.create_by,
+                                   create_date=job.create_date)
+        if response.streaming:
+            content = response.streaming_content
+        else:
+            content = [response.content]
+        with TemporaryFile() as result_file:
+            for chunk in content:
+                result_file.write(chunk)
+            result_file.seek(0)
+            job.result.save(job.get_file_name(), File(result_file),
+                            save=False)
+        job.status = ExportJob.FINISHED
+    except Exception as error:
+        job.status = ExportJob.FAILED
+        job.error = str(error)
+    job.finish_date = timezone.now()
+    job.save()
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+
+from robjects.models import Robject
+from robjects.models import RobjectHistoryDiff
+from tools.pagination import keyset_paginate
+
+
+class Command(BaseCommand):
+    help = "Store differences of historical robjects records without them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500,
+                            help="Number of historical records read at once.")
+
+    def handle(self, *args, **options):
+        # records of every robject one after another, oldest first
+        ordering = ("id", "history_id")
+        queryset = Robject.history.all()
+        batch_size = options["batch_size"]
+        created = 0
+        previous_history = None
+        cursor = None
+        while True:
+            page = keyset_paginate(queryset, ordering, batch_size,
+                                   after=cursor)
+            batch = page.object_list
+            stored = set(RobjectHistoryDiff.objects.filter(
+                history__in=[history.history_id for history in batch]
+            ).values_list("history_id", flat=True))
+            diffs = []
+            for history in batch:
+                if previous_history is not None and \
+                        previous_history.id != history.id:
+                    previous_history = None
+                if history.history_id not in stored:
+                    diffs.append(RobjectHistoryDiff.from_versions(
+                        history, previous_history))
+                previous_history = history
+            RobjectHistoryDiff.objects.bulk_create(diffs)
+            created += len(diffs)
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+        self.stdout.write(f"Stored {created} history diffs.")
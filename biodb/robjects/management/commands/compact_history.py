@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from robjects.compaction import compact_history
+from robjects.models import Robject
+
+
+class Command(BaseCommand):
+    help = "Remove unchanged and archive old historical robjects records."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=100,
+            help="Number of robjects compacted in one transaction.")
+        parser.add_argument(
+            "--archive-after-days", type=int,
+            default=getattr(settings, "HISTORY_ARCHIVE_AFTER_DAYS", None),
+            help="Archive records older than that (default from settings).")
+        parser.add_argument(
+            "--keep-latest", type=int,
+            default=getattr(settings, "HISTORY_KEEP_LATEST", 0),
+            help="Number of newest records of robject never archived.")
+        parser.add_argument(
+            "--no-archive", action="store_true",
+            help="Only remove unchanged records.")
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Only count records which would be compacted.")
+
+    def handle(self, *args, **options):
+        collapse = getattr(settings, "HISTORY_COLLAPSE_UNCHANGED", True)
+        days = options["archive_after_days"]
+        if options["no_archive"] or days is None:
+            archive_before = None
+        else:
+            archive_before = timezone.now() - timedelta(days=days)
+        ids = Robject.history.order_by("id").values_list(
+            "id", flat=True).distinct()
+        collapsed = archived = 0
+        last_id = None
+        while True:
+            batch = ids if last_id is None else ids.filter(id__gt=last_id)
+            batch = list(batch[:options["batch_size"]])
+            if not batch:
+                break
+            batch_collapsed, batch_archived = compact_history(
+                batch, collapse=collapse, archive_before=archive_before,
+                keep_latest=options["keep_latest"],
+                dry_run=options["dry_run"])
+            collapsed += batch_collapsed
+            archived += batch_archived
+            last_id = batch[-1]
+        prefix = "Would remove" if options["dry_run"] else "Removed"
+        self.stdout.write(f"{prefix} {collapsed} unchanged and archived "
+                          f"{archived} historical records.")
@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from robjects.cleanup import delete_orphan_names
+from robjects.cleanup import get_orphan_names
+
+
+class Command(BaseCommand):
+    help = "Delete names not used by any robject."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--min-age", type=int, default=settings.ORPHAN_NAMES_MIN_AGE,
+            help="Keep names created less than that many seconds ago.")
+        parser.add_argument(
+            "--batch-size", type=int,
+            default=settings.ORPHAN_NAMES_BATCH_SIZE,
+            help="Number of names deleted in one query.")
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Only count names which would be deleted.")
+
+    def handle(self, *args, **options):
+        if options["dry_run"]:
+            count = get_orphan_names(options["min_age"]).count()
+            self.stdout.write(f"Would delete {count} orphan names.")
+            return
+        count = delete_orphan_names(min_age=options["min_age"],
+                                    batch_size=options["batch_size"])
+        self.stdout.write(f"Deleted {count} orphan names.")
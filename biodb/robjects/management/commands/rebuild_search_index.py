@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from robjects.models import Robject
+from robjects.search import get_search_backend
+from robjects.search import select_indexed_relations
+
+
+class Command(BaseCommand):
+    help = "Rebuild robjects search index from scratch."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500,
+                            help="Number of robjects indexed at once.")
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        if backend is None:
+            raise CommandError("ROBJECTS_SEARCH_BACKEND is not set.")
+        backend.setup()
+        backend.clear()
+        queryset = select_indexed_relations(
+            Robject.objects.order_by("pk"))
+        batch_size = options["batch_size"]
+        indexed = 0
+        last_pk = 0
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            backend.index(batch)
+            indexed += len(batch)
+            last_pk = batch[-1].pk
+        self.stdout.write(f"Indexed {indexed} robjects.")
@@ -1,3 +1,7 @@
+import json
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from projects.models import Project
 from django.contrib.auth.models import User
@@ -5,9 +9,30 @@ from ckeditor.fields import RichTextField
 from projects.models import RelatedModelsCustomManager
 from simple_history.models import HistoricalRecords
 from django.core.urlresolvers import reverse
+from tools.history import compare_versions
+from tools.history import DiffField
 # Create your models here.
 
 
+class IndexedHistoricalRecords(HistoricalRecords):
+    """HistoricalRecords with composite indexes of historical model.
+
+    Args:
+        indexes (list): tuples of historical model field names, one per
+            index.
+    """
+
+    def __init__(self, *args, indexes=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.indexes = indexes
+
+    def get_meta_options(self, model):
+        meta_fields = super().get_meta_options(model)
+        meta_fields["indexes"] = [models.Index(fields=list(fields))
+                                  for fields in self.indexes]
+        return meta_fields
+
+
 class Robject(models.Model):
     project = models.ForeignKey(to=Project, null=True, blank=True)
     author = models.ForeignKey(
@@ -30,13 +55,17 @@ class Robject(models.Model):
     ref_clinical = RichTextField(blank=True)
     ligand = models.CharField(max_length=100, blank=True)
     receptor = models.CharField(max_length=100, blank=True)
-    history = HistoricalRecords()
+    # versions of robject are read by id ordered by date
+    history = IndexedHistoricalRecords(indexes=[("id", "history_date")])
 
     def __str__(self):
         return "Robject " + str(self.id)
 
     class Meta:
         unique_together = ("name", "project")
+        # lists of project robjects are filtered by project and ordered
+        indexes = [models.Index(fields=["project", "id"]),
+                   models.Index(fields=["project", "create_date"])]
 
     @staticmethod
     def get_fields(instance, fields=None):
@@ -106,6 +135,9 @@ class Robject(models.Model):
 
 class Name(models.Model):
     name = models.CharField(max_length=100, unique=True)
+    # names without robjects are deleted some time after creation (see
+    # robjects.cleanup)
+    create_date = models.DateTimeField(null=True, auto_now_add=True)
     objects = RelatedModelsCustomManager()
 
     def __str__(self):
@@ -117,8 +149,139 @@ class Tag(models.Model):
     project = models.ForeignKey(to=Project, related_name="tags", null=True)
     objects = RelatedModelsCustomManager()
 
+    class Meta:
+        indexes = [models.Index(fields=["project", "name"])]
+
     def __str__(self):
         return self.name
 
     def get_absolute_url(self):
         return reverse("projects:tag_list", kwargs={"project_name": self.project.name})
+
+
+class ExportJob(models.Model):
+    """Excel or PDF export of selected robjects run in background."""
+    EXCEL = "excel"
+    PDF = "pdf"
+    EXPORT_TYPE_CHOICES = ((EXCEL, "Excel"),
+                           (PDF, "PDF"))
+    FILE_NAMES = {EXCEL: "report.xlsx", PDF: "raport.pdf"}
+
+    PENDING = 1
+    RUNNING = 2
+    FINISHED = 3
+    FAILED = 4
+    STATUS_CHOICES = ((PENDING, "Pending"),
+                      (RUNNING, "Running"),
+                      (FINISHED, "Finished"),
+                      (FAILED, "Failed"))
+
+    project = models.ForeignKey(to=Project, related_name="export_jobs")
+    create_by = models.ForeignKey(
+        to=User, null=True, related_name="export_jobs")
+    create_date = models.DateTimeField(auto_now_add=True)
+    finish_date = models.DateTimeField(null=True, blank=True)
+    export_type = models.CharField(max_length=10, choices=EXPORT_TYPE_CHOICES)
+    # comma separated ids of exported robjects
+    robjects_ids = models.TextField()
+    status = models.IntegerField(default=PENDING, choices=STATUS_CHOICES)
+    error = models.TextField(blank=True)
+    result = models.FileField(upload_to="exports/", blank=True)
+
+    def __str__(self):
+        return "ExportJob " + str(self.id)
+
+    def get_robjects_ids(self):
+        return [int(pk) for pk in self.robjects_ids.split(",") if pk]
+
+    def get_file_name(self):
+        return self.FILE_NAMES[self.export_type]
+
+    def get_absolute_url(self):
+        return reverse("projects:robjects:export_job_details", kwargs={
+            "project_name": self.project.name, "job_id": self.id})
+
+
+class RobjectHistoryDiff(models.Model):
+    """Differences between historical robject record and previous one.
+
+    History never changes once written, so differences are computed once,
+    when historical record is created (see robjects.signals), instead of
+    on every visit of history page. Existing history can be filled with
+    "manage.py backfill_history_diffs".
+    """
+    # fields not shown in history
+    EXCLUDE_FIELDS = ["id", "create_date", "modify_date"]
+
+    history = models.OneToOneField(
+        to="robjects.HistoricalRobject", related_name="diff",
+        on_delete=models.CASCADE)
+    previous_history = models.ForeignKey(
+        to="robjects.HistoricalRobject", null=True, related_name="+",
+        on_delete=models.SET_NULL)
+    # JSON list of [field, new_value, old_value] lists
+    changes = models.TextField(default="[]")
+
+    def __str__(self):
+        return "RobjectHistoryDiff " + str(self.history_id)
+
+    @classmethod
+    def from_versions(cls, history, previous_history):
+        """Return unsaved diff of history and previous_history records."""
+        if previous_history is None:
+            diff_objects = []
+        else:
+            fields = history.instance.get_fields_names(
+                exclude=cls.EXCLUDE_FIELDS)
+            diff_objects = compare_versions(history, previous_history, fields)
+        return cls(history=history, previous_history=previous_history,
+                   changes=json.dumps(diff_objects, cls=DjangoJSONEncoder))
+
+    @staticmethod
+    def get_previous_history(history):
+        """Return historical record of same robject preceding history."""
+        return type(history).objects.filter(
+            id=history.id, history_id__lt=history.history_id).order_by(
+            "-history_id").first()
+
+    def get_diff_objects(self):
+        return [DiffField(*change) for change in json.loads(self.changes)]
+
+    @staticmethod
+    def get_stored_diff_objects(history):
+        """Return stored DiffField objects of history record or None.
+
+        Use select_related("diff") on history queryset to avoid queries.
+        """
+        try:
+            return history.diff.get_diff_objects()
+        except RobjectHistoryDiff.DoesNotExist:
+            return None
+
+
+class ArchivedRobjectHistory(models.Model):
+    """Historical robject record moved out of HistoricalRobject table.
+
+    Robject fields values are stored as zlib compressed JSON: all values
+    (is_delta=False) or only changes to previous archived record of the
+    same robject (is_delta=True). Records are archived and reconstructed
+    by robjects.compaction ("manage.py compact_history").
+    """
+    robject_id = models.IntegerField(db_index=True)
+    history_id = models.IntegerField(unique=True)
+    history_date = models.DateTimeField()
+    history_type = models.CharField(max_length=1)
+    history_change_reason = models.CharField(max_length=100, null=True)
+    history_user = models.ForeignKey(
+        to=User, null=True, related_name="+", on_delete=models.SET_NULL)
+    is_delta = models.BooleanField(default=False)
+    data = models.BinaryField()
+
+    def __str__(self):
+        return "ArchivedRobjectHistory " + str(self.history_id)
+
+    def get_data(self):
+        return json.loads(zlib.decompress(bytes(self.data)).decode())
+
+    def set_data(self, data):
+        self.data = zlib.compress(json.dumps(data).encode())
@@ -0,0 +1,57 @@
+"""Saving robjects created or edited in forms.
+
+Robject is written once: audit fields are set before save, so only one
+historical record is stored per create or edit. Many to many relations
+are compared with current ones and only differences are written, with
+one bulk query per field and kind of change.
+"""
+from django.db import transaction
+
+from robjects.models import Robject
+
+# many to many fields of robject forms
+M2M_FIELDS = ("tags", "names")
+
+
+def get_related_ids(robject, field_name):
+    """Return set of ids of objects related to robject by m2m field."""
+    field = Robject._meta.get_field(field_name)
+    return set(field.remote_field.through.objects.filter(
+        **{field.m2m_column_name(): robject.pk}).values_list(
+        field.m2m_reverse_name(), flat=True))
+
+
+def set_related(robject, field_name, objects, created=False):
+    """Relate robject only with given objects by m2m field.
+
+    Related manager add and remove are used for differences (they write
+    rows in bulk and send m2m_changed signals keeping search index up to
+    date). Relations of created robject are not read.
+    """
+    manager = getattr(robject, field_name)
+    current_ids = set() if created else get_related_ids(robject, field_name)
+    new_ids = {obj.pk for obj in objects}
+    if current_ids - new_ids:
+        manager.remove(*(current_ids - new_ids))
+    if new_ids - current_ids:
+        manager.add(*(new_ids - current_ids))
+
+
+@transaction.atomic
+def save_robject(form, user):
+    """Save robject of valid model form in one transaction and return it.
+
+    New robject gets create_by, every robject gets modify_by set to user
+    before single save.
+    """
+    robject = form.save(commit=False)
+    created = robject._state.adding
+    if created:
+        robject.create_by = user
+    robject.modify_by = user
+    robject.save()
+    for field_name in M2M_FIELDS:
+        if field_name in form.cleaned_data:
+            set_related(robject, field_name, form.cleaned_data[field_name],
+                        created=created)
+    return robject
@@ -0,0 +1,226 @@
+"""Pluggable full-text search index for robjects.
+
+Backend is chosen by ROBJECTS_SEARCH_BACKEND setting (dotted path to
+backend class). When setting is empty SearchRobjectsView falls back to
+icontains lookups over all text fields.
+
+Index table is created after migrate (or by "manage.py
+rebuild_search_index", which also fills it with existing robjects) and
+kept in sync by signals (see robjects.signals), which are connected only
+when backend is configured.
+"""
+import re
+from abc import ABC
+from abc import abstractmethod
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+from robjects.models import Robject
+
+
+def get_search_backend():
+    """Return configured search backend instance or None."""
+    backend_path = getattr(settings, "ROBJECTS_SEARCH_BACKEND", None)
+    if not backend_path:
+        return None
+    return load_backend(backend_path)
+
+
+@lru_cache(maxsize=None)
+def load_backend(backend_path):
+    return import_string(backend_path)()
+
+
+def select_indexed_relations(queryset):
+    """Return robjects queryset reading relations of documents in bulk."""
+    return queryset.select_related(
+        "project", "author", "create_by", "modify_by").prefetch_related(
+        "tags", "names")
+
+
+class SearchBackend(ABC):
+    """Base class of search index backends.
+
+    Every robject is indexed as single text document built from robject
+    text fields, name of its project, names of its users (never other
+    user fields, like password hash or email) and names of its tags and
+    names.
+    """
+    table_name = "robjects_search_index"
+    robject_fields = ("name", "ligand", "receptor", "notes", "ref_seq",
+                      "mod_seq", "description", "bibliography",
+                      "ref_commercial", "ref_clinical")
+    user_relations = ("author", "create_by", "modify_by")
+    user_fields = ("username", "first_name", "last_name")
+
+    def get_document(self, robject):
+        """Return text indexed for given robject."""
+        values = [getattr(robject, field) for field in self.robject_fields]
+        if robject.project_id is not None:
+            values.append(robject.project.name)
+        for relation in self.user_relations:
+            user = getattr(robject, relation)
+            if user is not None:
+                values.extend(getattr(user, field)
+                              for field in self.user_fields)
+        values.extend(tag.name for tag in robject.tags.all())
+        values.extend(name.name for name in robject.names.all())
+        return "\n".join(str(value) for value in values if value)
+
+    def setup(self):
+        """Create index table if it doesn't exist."""
+        with connection.cursor() as cursor:
+            self.create_table(cursor)
+
+    @abstractmethod
+    def create_table(self, cursor):
+        """Create index table if it doesn't exist."""
+
+    def index(self, robjects):
+        """Add or replace robjects documents in index."""
+        rows = [(robject.pk, robject.project_id, self.get_document(robject))
+                for robject in robjects]
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            self.write_rows(cursor, rows)
+
+    @abstractmethod
+    def write_rows(self, cursor, rows):
+        """Write (robject id, project id, document) rows."""
+
+    def remove(self, robjects_ids):
+        """Remove documents of robjects with given ids from index."""
+        robjects_ids = list(robjects_ids)
+        if not robjects_ids:
+            return
+        with connection.cursor() as cursor:
+            self.delete_rows(cursor, robjects_ids)
+
+    @abstractmethod
+    def delete_rows(self, cursor, robjects_ids):
+        """Delete rows of robjects with given ids."""
+
+    def clear(self):
+        """Remove all documents from index."""
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table_name}")
+
+    def search(self, terms, project_name):
+        """Return queryset of all project robjects matching any of terms.
+
+        Robjects are ordered by rank, best matching first.
+        """
+        queryset = Robject.objects.filter(project__name=project_name)
+        if not terms:
+            return queryset
+        return self.filter_ranked(queryset, terms)
+
+    @abstractmethod
+    def filter_ranked(self, queryset, terms):
+        """Return robjects of queryset matching any of terms ordered by
+        rank, index table is joined to queryset."""
+
+    def join_index(self, queryset, index_column, **extra):
+        """Join index table on its index_column equal to robject id."""
+        robjects_table = Robject._meta.db_table
+        extra["where"] = [f"{self.table_name}.{index_column} = "
+                          f"{robjects_table}.id"] + extra.get("where", [])
+        return queryset.extra(tables=[self.table_name], **extra)
+
+
+class SQLiteFTSBackend(SearchBackend):
+    """Index in SQLite FTS5 virtual table.
+
+    Trigram tokenizer (SQLite >= 3.34) gives case insensitive substring
+    matching like icontains lookups, but using index. Terms shorter than
+    3 chars can't use trigrams and are matched with LIKE.
+    """
+
+    def create_table(self, cursor):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table_name} USING "
+            f"fts5(project_id UNINDEXED, document, tokenize='trigram')")
+
+    def write_rows(self, cursor, rows):
+        # rowid of document is robject id
+        self.delete_rows(cursor, [row[0] for row in rows])
+        cursor.executemany(
+            f"INSERT INTO {self.table_name} (rowid, project_id, document) "
+            f"VALUES (%s, %s, %s)", rows)
+
+    def delete_rows(self, cursor, robjects_ids):
+        cursor.executemany(
+            f"DELETE FROM {self.table_name} WHERE rowid = %s",
+            [(pk,) for pk in robjects_ids])
+
+    def filter_ranked(self, queryset, terms):
+        if all(len(term) >= 3 for term in terms):
+            # each term as quoted string, any term can match
+            match = " OR ".join(
+                '"%s"' % term.replace('"', '""') for term in terms)
+            return self.join_index(
+                queryset, "rowid", where=[f"{self.table_name} MATCH %s"],
+                params=[match], order_by=[f"{self.table_name}.rank"])
+        conditions = " OR ".join(
+            [f"{self.table_name}.document LIKE %s"] * len(terms))
+        return self.join_index(
+            queryset, "rowid", where=[f"({conditions})"],
+            params=[f"%{term}%" for term in terms], order_by=["pk"])
+
+
+class PostgresSearchBackend(SearchBackend):
+    """Index in PostgreSQL table with tsvector column and GIN index.
+
+    Words of terms are matched as prefixes of indexed words (tsvector
+    doesn't support matching inside words).
+    """
+
+    def create_table(self, cursor):
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table_name} ("
+            f"robject_id integer PRIMARY KEY, project_id integer, "
+            f"document tsvector)")
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {self.table_name}_document "
+            f"ON {self.table_name} USING GIN (document)")
+
+    def write_rows(self, cursor, rows):
+        cursor.executemany(
+            f"INSERT INTO {self.table_name} "
+            f"(robject_id, project_id, document) "
+            f"VALUES (%s, %s, to_tsvector('simple', %s)) "
+            f"ON CONFLICT (robject_id) DO UPDATE SET "
+            f"project_id = EXCLUDED.project_id, "
+            f"document = EXCLUDED.document", rows)
+
+    def delete_rows(self, cursor, robjects_ids):
+        cursor.execute(
+            f"DELETE FROM {self.table_name} WHERE robject_id = ANY(%s)",
+            [robjects_ids])
+
+    def get_tsquery(self, terms):
+        """Join terms with OR, words of single term with AND."""
+        queries = []
+        for term in terms:
+            words = re.findall(r"\w+", term)
+            if words:
+                queries.append(
+                    "(" + " & ".join(f"{word}:*" for word in words) + ")")
+        return " | ".join(queries)
+
+    def filter_ranked(self, queryset, terms):
+        tsquery = self.get_tsquery(terms)
+        if not tsquery:
+            return queryset.none()
+        query = "to_tsquery('simple', %s)"
+        return self.join_index(
+            queryset, "robject_id",
+            where=[f"{self.table_name}.document @@ {query}"],
+            params=[tsquery],
+            select={"search_rank":
+                    f"ts_rank({self.table_name}.document, {query})"},
+            select_params=[tsquery], order_by=["-search_rank"])
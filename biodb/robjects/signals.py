@@ -0,0 +1,164 @@
+"""Signals keeping search index and history diffs in sync with robjects
+and sweeping orphan names."""
+from django.contrib.auth.models import User
+from django.core.signals import request_finished
+from django.db.models import Q
+from django.db.models.signals import m2m_changed
+from django.db.models.signals import post_migrate
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.db.models.signals import pre_delete
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+from django.test.signals import setting_changed
+
+from projects.models import Project
+from robjects.cleanup import sweep_orphan_names
+from robjects.models import Name
+from robjects.models import Robject
+from robjects.models import RobjectHistoryDiff
+from robjects.models import Tag
+from robjects.search import SearchBackend
+from robjects.search import get_search_backend
+from robjects.search import select_indexed_relations
+
+
+@receiver(post_migrate)
+def create_search_index(sender, app_config, **kwargs):
+    backend = get_search_backend()
+    if backend is not None and app_config.name == "robjects":
+        backend.setup()
+
+
+def index_robject(sender, instance, **kwargs):
+    get_search_backend().index([instance])
+
+
+def remove_robject_from_index(sender, instance, **kwargs):
+    get_search_backend().remove([instance.pk])
+
+
+def index_robjects_with_changed_relations(sender, instance, action,
+                                          reverse, pk_set, **kwargs):
+    if not action.startswith("post_"):
+        return
+    if not reverse:
+        get_search_backend().index([instance])
+    elif pk_set:
+        get_search_backend().index(select_indexed_relations(
+            Robject.objects.filter(pk__in=pk_set)))
+
+
+def index_robjects_of_label(sender, instance, created, **kwargs):
+    if not created:
+        get_search_backend().index(
+            select_indexed_relations(instance.robjects.all()))
+
+
+def remember_robjects_of_label(sender, instance, **kwargs):
+    # relations are removed before post_delete is sent
+    instance._indexed_robjects_ids = list(
+        instance.robjects.values_list("id", flat=True))
+
+
+def index_robjects_of_deleted_label(sender, instance, **kwargs):
+    robjects_ids = getattr(instance, "_indexed_robjects_ids", None)
+    if robjects_ids:
+        get_search_backend().index(select_indexed_relations(
+            Robject.objects.filter(pk__in=robjects_ids)))
+
+
+def remember_indexed_values(sender, instance, raw=False, update_fields=None,
+                            **kwargs):
+    """Read saved values of fields indexed in documents of robjects
+    (project name, user names) before they are changed."""
+    fields = INDEXED_FIELDS[sender]
+    instance._indexed_values = None
+    if update_fields is not None and not set(fields) & set(update_fields):
+        # eg. last_login of user
+        return
+    if instance.pk is not None and not raw:
+        instance._indexed_values = sender._base_manager.filter(
+            pk=instance.pk).values_list(*fields).first()
+
+
+def index_robjects_of_renamed(sender, instance, created, raw=False,
+                              **kwargs):
+    old_values = getattr(instance, "_indexed_values", None)
+    if created or raw or old_values is None:
+        return
+    new_values = tuple(getattr(instance, field)
+                       for field in INDEXED_FIELDS[sender])
+    if old_values == new_values:
+        return
+    if sender is Project:
+        robjects = Robject.objects.filter(project=instance)
+    else:
+        robjects = Robject.objects.filter(
+            Q(author=instance) | Q(create_by=instance) |
+            Q(modify_by=instance))
+    get_search_backend().index(select_indexed_relations(robjects))
+
+
+# fields of related models indexed in documents of robjects
+INDEXED_FIELDS = {Project: ("name",), User: SearchBackend.user_fields}
+# (signal, receiver, sender) kept in sync with index
+SEARCH_INDEX_RECEIVERS = (
+    (post_save, index_robject, Robject),
+    (post_delete, remove_robject_from_index, Robject),
+    (m2m_changed, index_robjects_with_changed_relations,
+     Robject.tags.through),
+    (m2m_changed, index_robjects_with_changed_relations,
+     Robject.names.through),
+    (post_save, index_robjects_of_label, Tag),
+    (post_save, index_robjects_of_label, Name),
+    (pre_delete, remember_robjects_of_label, Tag),
+    (pre_delete, remember_robjects_of_label, Name),
+    (post_delete, index_robjects_of_deleted_label, Tag),
+    (post_delete, index_robjects_of_deleted_label, Name),
+    (pre_save, remember_indexed_values, Project),
+    (pre_save, remember_indexed_values, User),
+    (post_save, index_robjects_of_renamed, Project),
+    (post_save, index_robjects_of_renamed, User),
+)
+
+
+def connect_search_index_receivers():
+    """Connect receivers keeping search index in sync.
+
+    They are connected only when search backend is configured, so without
+    it saves and deletes don't run their queries and Tag and Name can be
+    deleted fast (without fetching objects).
+    """
+    for signal, function, sender in SEARCH_INDEX_RECEIVERS:
+        signal.connect(function, sender=sender,
+                       dispatch_uid=f"search_index:{function.__name__}")
+
+
+def disconnect_search_index_receivers():
+    for signal, function, sender in SEARCH_INDEX_RECEIVERS:
+        signal.disconnect(function, sender=sender,
+                          dispatch_uid=f"search_index:{function.__name__}")
+
+
+@receiver(setting_changed)
+def switch_search_index_receivers(sender, setting, value, **kwargs):
+    # settings are overridden in tests
+    if setting == "ROBJECTS_SEARCH_BACKEND":
+        if value:
+            connect_search_index_receivers()
+        else:
+            disconnect_search_index_receivers()
+
+
+@receiver(post_save, sender=Robject.history.model)
+def store_history_diff(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        previous_history = RobjectHistoryDiff.get_previous_history(instance)
+        RobjectHistoryDiff.from_versions(instance, previous_history).save()
+
+
+@receiver(request_finished)
+def sweep_orphan_names_after_request(sender, **kwargs):
+    # rate limited by ORPHAN_NAMES_SWEEP_INTERVAL, disabled by default
+    sweep_orphan_names()
@@ -0,0 +1,29 @@
+// Load options of select[data-autocomplete-url] matching text typed in
+// search box added before select. Selected options are kept.
+$(function() {
+  $("select[data-autocomplete-url]").each(function() {
+    var select = this;
+    var search = $('<input type="search" class="autocomplete-search" ' +
+                   'placeholder="Type to search...">');
+    var timer = null;
+    $(select).before(search);
+    search.on("input", function() {
+      clearTimeout(timer);
+      var term = this.value;
+      timer = setTimeout(function() {
+        var url = select.dataset.autocompleteUrl + "?q=" +
+                  encodeURIComponent(term);
+        fetch(url, {credentials: "same-origin"})
+          .then(function(response) { return response.json(); })
+          .then(function(data) {
+            $(select).find("option:not(:selected)").remove();
+            data.results.forEach(function(result) {
+              if (!$(select).find('option[value="' + result.id + '"]').length) {
+                $(select).append($("<option>").val(result.id).text(result.text));
+              }
+            });
+          });
+      }, 250);
+    });
+  });
+});
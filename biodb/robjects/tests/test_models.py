@@ -4,10 +4,23 @@ from django.contrib.auth.models import User
 from projects.models import Project
 from django.db import models
 from robjects.models import Name, Tag
+from robjects.models import ArchivedRobjectHistory
+from robjects.models import RobjectHistoryDiff
+from robjects.cleanup import delete_orphan_names
+from robjects.cleanup import sweep_orphan_names
+from robjects.compaction import compact_history
+from robjects.compaction import get_snapshot_values
+from robjects.compaction import load_archived_history
+from tools.history import DiffField
+from django.core.management import call_command
+from io import StringIO
 from ckeditor.fields import RichTextField
 from django import db
 import datetime
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
+from unittest.mock import patch
 
 
 class RobjectModelTestCase(TestCase):
@@ -289,6 +302,15 @@ class RobjectModelTestCase(TestCase):
         for efield in excluded_fields:
             self.assertNotIn(efield, fields)
 
+    def test_composite_indexes(self):
+        def get_indexes(model):
+            return [index.fields for index in model._meta.indexes]
+        self.assertEqual(get_indexes(Robject),
+                         [["project", "id"], ["project", "create_date"]])
+        self.assertEqual(get_indexes(Robject.history.model),
+                         [["id", "history_date"]])
+        self.assertEqual(get_indexes(Tag), [["project", "name"]])
+
 
 class NameModelTestCase(TestCase):
     def test_Name_has_name_field(self):
@@ -342,3 +364,171 @@ class TagModelTestCase(TestCase):
     def test_project_field_may_be_null(self):
         t = Tag.objects.create()
         self.assertEqual(t.project, None)
+
+
+class RobjectHistoryDiffTestCase(TestCase):
+    def test_diff_is_stored_for_new_historical_record(self):
+        robject = Robject.objects.create(name="robject_1", notes="old")
+        robject.notes = "new"
+        robject.save()
+        created, changed = robject.history.order_by("history_id")
+        self.assertEqual(created.diff.get_diff_objects(), [])
+        self.assertIsNone(created.diff.previous_history)
+        self.assertEqual(changed.diff.previous_history, created)
+        self.assertEqual(changed.diff.get_diff_objects(),
+                         [DiffField("notes", "new", "old")])
+
+    def test_diff_compares_records_of_same_robject(self):
+        robject = Robject.objects.create(name="robject_1")
+        Robject.objects.create(name="robject_2")
+        robject.name = "new_name"
+        robject.save()
+        changed = robject.history.order_by("history_id").last()
+        self.assertEqual(changed.diff.get_diff_objects(),
+                         [DiffField("name", "new_name", "robject_1")])
+
+    def test_backfill_command_stores_missing_diffs(self):
+        robject = Robject.objects.create(name="robject_1")
+        for idx in range(3):
+            robject.name = f"name_{idx}"
+            robject.save()
+        Robject.objects.create(name="robject_2")
+        expected = {diff.history_id: diff.get_diff_objects()
+                    for diff in RobjectHistoryDiff.objects.all()}
+        RobjectHistoryDiff.objects.all().delete()
+        call_command("backfill_history_diffs", batch_size=2, stdout=StringIO())
+        self.assertEqual({diff.history_id: diff.get_diff_objects()
+                          for diff in RobjectHistoryDiff.objects.all()},
+                         expected)
+
+
+class HistoryCompactionTestCase(TestCase):
+    def test_unchanged_records_are_collapsed(self):
+        robject = Robject.objects.create(name="robject_1", notes="old")
+        created = robject.history.get()
+        robject.save()
+        robject.save()
+        robject.notes = "new"
+        robject.save()
+        compact_history([robject.id])
+        records = list(robject.history.order_by("history_id"))
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0], created)
+        self.assertEqual(records[1].notes, "new")
+        self.assertEqual(records[1].diff.previous_history, created)
+
+    def test_changed_records_are_not_collapsed(self):
+        user = User.objects.create_user(username="user")
+        robject = Robject.objects.create(name="robject_1")
+        robject.modify_by = user
+        robject.save()
+        robject.delete()
+        self.assertEqual(compact_history([robject.id]), (0, 0))
+        self.assertEqual(Robject.history.count(), 3)
+
+    def test_old_records_are_archived_as_deltas(self):
+        robject = Robject.objects.create(name="robject_1",
+                                         ref_seq="ACGT" * 100)
+        for idx in range(4):
+            robject.ref_seq = "ACGT" * 50 + "T" * idx + "ACGT" * 49
+            robject.name = f"robject_{idx}"
+            robject.save()
+        records = list(robject.history.all())
+        self.assertEqual(compact_history(
+            [robject.id], archive_before=timezone.now(), keep_latest=2),
+            (0, 3))
+        self.assertEqual(robject.history.count(), 2)
+        archived = ArchivedRobjectHistory.objects.order_by("history_id")
+        self.assertEqual([record.is_delta for record in archived],
+                         [False, True, True])
+        self.assertIn("text", archived[2].get_data()["ref_seq"])
+        snapshots = load_archived_history(robject.id)
+        self.assertEqual(
+            [(snapshot.history_id, snapshot.values)
+             for snapshot in snapshots],
+            [(record.history_id, get_snapshot_values(record))
+             for record in records[2:]])
+
+    def test_records_newer_than_archive_date_are_not_archived(self):
+        robject = Robject.objects.create(name="robject_1")
+        robject.name = "robject_2"
+        robject.save()
+        robject.history.filter(history_type="+").update(
+            history_date=timezone.now() - datetime.timedelta(days=10))
+        self.assertEqual(compact_history(
+            [robject.id],
+            archive_before=timezone.now() - datetime.timedelta(days=5)),
+            (0, 1))
+        self.assertEqual(robject.history.get().name, "robject_2")
+
+    def test_command_respects_dry_run(self):
+        robject = Robject.objects.create(name="robject_1")
+        robject.save()
+        out = StringIO()
+        call_command("compact_history", dry_run=True, stdout=out)
+        self.assertIn("Would remove 1 unchanged", out.getvalue())
+        self.assertEqual(robject.history.count(), 2)
+        call_command("compact_history", archive_after_days=0, keep_latest=0,
+                     batch_size=1, stdout=StringIO())
+        self.assertEqual(robject.history.count(), 0)
+        self.assertEqual(len(load_archived_history(robject.id)), 1)
+
+
+class OrphanNamesTestCase(TestCase):
+    def create_names(self, number, age=0):
+        names = [Name.objects.create(name=f"name_{Name.objects.count()}")
+                 for _ in range(number)]
+        Name.objects.filter(pk__in=[name.pk for name in names]).update(
+            create_date=timezone.now() - datetime.timedelta(seconds=age))
+        return names
+
+    def test_names_of_robjects_are_not_deleted(self):
+        used, orphan = self.create_names(2)
+        Robject.objects.create(name="robject").names.add(used)
+        self.assertEqual(delete_orphan_names(), 1)
+        self.assertEqual(list(Name.objects.all()), [used])
+
+    def test_names_younger_than_min_age_are_not_deleted(self):
+        new = self.create_names(1)
+        self.create_names(2, age=100)
+        self.assertEqual(delete_orphan_names(min_age=50), 2)
+        self.assertEqual(list(Name.objects.all()), new)
+
+    def test_names_are_deleted_in_batches(self):
+        self.create_names(5)
+        self.assertEqual(delete_orphan_names(batch_size=2, max_batches=2), 4)
+        self.assertEqual(delete_orphan_names(batch_size=2), 1)
+
+    def test_batch_is_deleted_in_constant_number_of_queries(self):
+        def count_queries(number):
+            self.create_names(number)
+            with CaptureQueriesContext(db.connection) as queries:
+                self.assertEqual(
+                    delete_orphan_names(batch_size=number, max_batches=1),
+                    number)
+            return len(queries)
+
+        self.assertEqual(count_queries(2), count_queries(20))
+
+    def test_command_deletes_orphan_names(self):
+        self.create_names(2, age=100)
+        out = StringIO()
+        call_command("delete_orphan_names", min_age=50, dry_run=True,
+                     stdout=out)
+        self.assertIn("Would delete 2 orphan names.", out.getvalue())
+        call_command("delete_orphan_names", min_age=50, stdout=StringIO())
+        self.assertFalse(Name.objects.exists())
+
+    @override_settings(ORPHAN_NAMES_SWEEP_INTERVAL=60, ORPHAN_NAMES_MIN_AGE=0,
+                       ORPHAN_NAMES_BATCH_SIZE=2)
+    def test_sweeper_is_rate_limited(self):
+        self.create_names(3)
+        with patch("robjects.cleanup._last_sweep", None):
+            self.assertEqual(sweep_orphan_names(), 2)
+            self.assertIsNone(sweep_orphan_names())
+        self.assertEqual(Name.objects.count(), 1)
+
+    def test_sweeper_is_disabled_by_default(self):
+        self.create_names(1)
+        self.assertIsNone(sweep_orphan_names())
+        self.assertEqual(Name.objects.count(), 1)
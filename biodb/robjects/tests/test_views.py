@@ -1,17 +1,31 @@
 import PyPDF2
 from unit_tests.base import FunctionalTest
-from robjects.models import Robject, Name, Tag
+from robjects.compaction import compact_history
+from robjects.models import ExportJob, Robject, Name, Tag
 from projects.models import Project
 from samples.models import Sample
 from django.contrib.auth.models import User
 from django.core.urlresolvers import reverse
+from django.core.cache import cache
+from django.db import connection
+from django.db.models.signals import pre_delete
+from django.test import override_settings
+from django.utils import timezone
+from django.test.utils import CaptureQueriesContext
 from django_addanother.widgets import AddAnotherWidgetWrapper
 from django import forms
 from django_addanother.views import CreatePopupMixin
 from django.views import generic
 from io import BytesIO
+from multiprocessing.pool import ThreadPool
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
 from openpyxl import load_workbook
-from robjects.views import NameCreateView, TagCreateView
+from robjects.views import ExportExcelView, NameCreateView, TagCreateView
+from robjects.views import RobjectHistoryView, RobjectListView
+from robjects.views import RobjectDeleteView, RobjectPDFeView
+from robjects.views import SearchRobjectsView, get_search_lookups
+from robjects.search import SQLiteFTSBackend
 from biodb import settings
 from guardian.shortcuts import assign_perm
 from tools.history import CustomHistory
@@ -259,7 +273,75 @@ class Robjects_export_to_excel_view_test(FunctionalTest):
         self.assertEqual(message.tags, "error")
 
 
+    def test_excel_export_takes_constant_number_of_queries(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        tag = Tag.objects.create(name="tag_1", project=proj)
+        name = Name.objects.create(name="name_1")
+        for idx in range(5):
+            r = Robject.objects.create(
+                project=proj, name=f"robject_{idx}", author=user,
+                create_by=user, modify_by=user)
+            r.tags.add(tag)
+            r.names.add(name)
+        # count, robjects with joined foreign keys, tags, names
+        with self.assertNumQueries(4):
+            ExportExcelView().export_to_excel(
+                Robject.objects.filter(project=proj), is_relation=True,
+                one_to_one=True, many_to_one=True, exclude_fields=['sample'])
+
+    def test_excel_exports_all_project_robjects_when_all_selected(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        for idx in range(3):
+            Robject.objects.create(project=proj, name=f"robject_{idx}")
+        Robject.objects.create(
+            name="other", project=Project.objects.create(name="other"))
+        response = self.client.get(self.ROBJECT_EXCEL_URL,
+                                   {"select_all_robjects": "1"})
+        ws = load_workbook(BytesIO(response.content)).active
+        values = [cell.value for row in ws.rows for cell in row]
+        self.assertEqual(len(list(ws.rows)), 4)
+        self.assertNotIn("other", values)
+        for idx in range(3):
+            self.assertIn(f"robject_{idx}", values)
+
+    def test_excel_is_streamed_above_threshold(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        r = Robject.objects.create(
+            project=proj, name="robject_1", notes="<p>robject_1_notes</p>")
+        with patch.object(ExportExcelView, "excel_stream_threshold", 0):
+            response = self.client.get(self.ROBJECT_EXCEL_URL,
+                                       {"robject_1": r.id})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response.get('Content-Disposition'),
+                         "attachment; filename=report.xlsx")
+        with BytesIO(b"".join(response.streaming_content)) as f:
+            ws = load_workbook(f).active
+            rows = [[cell.value for cell in row] for row in ws.rows]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][:4], [str(r.id), proj.name, "None", r.name])
+        self.assertIn("robject_1_notes", rows[1])
+
+
 class RobjectSamplesListTest(FunctionalTest):
+    def test_view_takes_constant_number_of_queries(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        robj = Robject.objects.create(name="robject", project=proj)
+        url = reverse("projects:robjects:robject_samples", kwargs={
+            "project_name": proj.name, "robject_id": robj.id})
+        self.assertConstantNumQueries(url, lambda: Sample.objects.create(
+            robject=robj, owner=user, modify_by=user))
+
+    def test_project_counters_are_not_shown(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        robj = Robject.objects.create(name="robject", project=proj)
+        other = Robject.objects.create(name="other", project=proj)
+        Sample.objects.create(robject=other)
+        response = self.client.get(reverse(
+            "projects:robjects:robject_samples",
+            kwargs={"project_name": proj.name, "robject_id": robj.id}))
+        self.assertNotIn("counters", response.context)
+        self.assertNotContains(response, 'class="counters"')
+
     def test_view_returns_404_when_slug_not_match(self):
         self.not_matching_url_kwarg_helper(self.SAMPLE_LIST_URL)
 
@@ -332,6 +414,80 @@ class RObjectsListViewTests(FunctionalTest):
         self.assertIn(robj1, response.context["robject_list"])
         self.assertIn(robj2, response.context["robject_list"])
 
+    def create_robjects(self, proj, number):
+        return [Robject.objects.create(project=proj, name=f"robject_{idx}")
+                for idx in range(number)]
+
+    def add_robject(self, proj, user):
+        return lambda: Robject.objects.create(
+            project=proj, name=f"robject_{Robject.objects.count()}",
+            author=user, create_by=user, modify_by=user)
+
+    def test_view_takes_constant_number_of_queries(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        self.assertConstantNumQueries(self.ROBJECT_LIST_URL,
+                                      self.add_robject(proj, user))
+
+    def test_search_takes_constant_number_of_queries(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        self.assertConstantNumQueries(self.ROBJECT_SEARCH_URL,
+                                      self.add_robject(proj, user),
+                                      {"query": "robject"})
+
+    @patch.object(RobjectListView, "paginate_by", 2)
+    def test_view_paginates_robjects_by_keyset(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        robjects = self.create_robjects(proj, 5)
+        response = self.client.get(self.ROBJECT_LIST_URL)
+        self.assertEqual(list(response.context["robject_list"]),
+                         robjects[:2])
+        page = response.context["page_obj"]
+        response = self.client.get(self.ROBJECT_LIST_URL,
+                                   {"after": page.next_cursor})
+        self.assertEqual(list(response.context["robject_list"]),
+                         robjects[2:4])
+        page = response.context["page_obj"]
+        self.assertTrue(page.has_previous())
+        response = self.client.get(self.ROBJECT_LIST_URL,
+                                   {"before": page.previous_cursor})
+        self.assertEqual(list(response.context["robject_list"]),
+                         robjects[:2])
+        self.assertFalse(response.context["page_obj"].has_previous())
+
+    @patch.object(RobjectListView, "paginate_by", 2)
+    @patch.object(RobjectListView, "keyset_ordering", ("-create_date", "id"))
+    def test_view_paginates_by_create_date_and_id(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        robjects = self.create_robjects(proj, 3)
+        response = self.client.get(self.ROBJECT_LIST_URL)
+        cursor = response.context["page_obj"].next_cursor
+        response = self.client.get(self.ROBJECT_LIST_URL, {"after": cursor})
+        self.assertEqual(list(response.context["robject_list"]),
+                         robjects[:1])
+        self.assertFalse(response.context["page_obj"].has_next())
+
+    @patch.object(RobjectListView, "paginate_by", 2)
+    def test_page_number_falls_back_to_offset_pagination(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        robjects = self.create_robjects(proj, 5)
+        response = self.client.get(self.ROBJECT_LIST_URL, {"page": 3})
+        self.assertEqual(list(response.context["robject_list"]),
+                         robjects[4:])
+        self.assertEqual(response.context["paginator"].num_pages, 3)
+
+    def test_view_returns_404_for_invalid_cursor(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        response = self.client.get(self.ROBJECT_LIST_URL, {"after": "abc"})
+        self.assertEqual(response.status_code, 404)
+
+    @patch.object(RobjectListView, "paginate_by", 2)
+    def test_select_all_robjects_checkbox_is_rendered_for_many_pages(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        self.create_robjects(proj, 3)
+        response = self.client.get(self.ROBJECT_LIST_URL)
+        self.assertContains(response, 'name="select_all_robjects"')
+        self.assertContains(response, 'class="next-page"')
+
 
 class SearchRobjectsViewTests(FunctionalTest):
     def test_visit_permission(self):
@@ -486,6 +642,137 @@ class SearchRobjectsViewTests(FunctionalTest):
         )
 
 
+class SearchLookupsTestCase(FunctionalTest):
+    def test_lookups_include_text_and_foreign_text_fields(self):
+        lookups = get_search_lookups(Robject)
+        self.assertIn("name", lookups)
+        self.assertIn("notes", lookups)
+        self.assertIn("project__name", lookups)
+        self.assertIn("author__username", lookups)
+        self.assertNotIn("create_date", lookups)
+
+    def test_lookups_are_cached_per_model(self):
+        get_search_lookups.cache_clear()
+        get_search_lookups(Robject)
+        get_search_lookups(Robject)
+        self.assertEqual(get_search_lookups.cache_info().misses, 1)
+
+    def test_search_query_is_single_flat_or_node(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        queryset = SearchRobjectsView().perform_search(
+            "one two three", proj.name)
+        where = queryset.query.where
+        # project condition AND flat OR node of all terms and fields
+        or_node = [child for child in where.children
+                   if getattr(child, "connector", None) == "OR"][0]
+        self.assertEqual(len(or_node.children),
+                         3 * len(get_search_lookups(Robject)))
+
+
+@override_settings(ROBJECTS_SEARCH_BACKEND="robjects.search.SQLiteFTSBackend")
+class SearchRobjectsIndexTests(SearchRobjectsViewTests):
+    """Run all search tests using SQLite FTS5 index."""
+
+    @classmethod
+    def setUpClass(cls):
+        # index table is created outside of test transactions, like
+        # after migrate
+        SQLiteFTSBackend().setup()
+        super().setUpClass()
+
+    def search(self, query):
+        resp = self.client.get(self.ROBJECT_SEARCH_URL, {"query": query})
+        return list(resp.context["robject_list"])
+
+    def test_results_are_ranked_by_relevance(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        robj_1 = Robject.objects.create(
+            project=proj, name="robject_1", notes="kinase")
+        robj_2 = Robject.objects.create(
+            project=proj, name="robject_2",
+            notes="kinase kinase kinase", ligand="kinase")
+        self.assertEqual(self.search("kinase"), [robj_2, robj_1])
+
+    def test_short_terms_are_matched(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        robj = Robject.objects.create(project=proj, name="robject_1",
+                                      ligand="IL")
+        self.assertEqual(self.search("il"), [robj])
+
+    def test_index_follows_tags_changes(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        robj = Robject.objects.create(project=proj, name="robject_1")
+        tag = Tag.objects.create(name="antibody", project=proj)
+        robj.tags.add(tag)
+        self.assertEqual(self.search("antibody"), [robj])
+        tag.name = "peptide"
+        tag.save()
+        self.assertEqual(self.search("antibody"), [])
+        self.assertEqual(self.search("peptide"), [robj])
+        tag.delete()
+        self.assertEqual(self.search("peptide"), [])
+
+    def test_deleted_robject_is_removed_from_index(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        robj = Robject.objects.create(project=proj, name="robject_1")
+        robj.delete()
+        self.assertEqual(self.search("robject_1"), [])
+
+    def test_password_and_email_are_not_indexed(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        author = User.objects.create_user(
+            username="AUTHOR", email="author@example.com",
+            password="PASSWORD")
+        robj = Robject.objects.create(project=proj, name="robject_1",
+                                      author=author)
+        self.assertEqual(self.search("AUTHOR"), [robj])
+        self.assertEqual(self.search("pbkdf2_sha256"), [])
+        self.assertEqual(self.search("example.com"), [])
+
+    def test_index_follows_project_rename(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        robj = Robject.objects.create(project=proj, name="robject_1")
+        proj.name = "renamed_project"
+        proj.save()
+        self.assertEqual(list(SQLiteFTSBackend().search(
+            ["renamed_project"], "renamed_project")), [robj])
+
+    def test_index_follows_user_rename(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        author = User.objects.create_user(username="AUTHOR")
+        robj = Robject.objects.create(project=proj, name="robject_1",
+                                      author=author)
+        author.first_name = "Rosalind"
+        author.save()
+        self.assertEqual(self.search("rosalind"), [robj])
+
+    def test_all_matching_robjects_are_found(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        robjects = [Robject.objects.create(project=proj, name=f"robject_{idx}",
+                                           notes="kinase")
+                    for idx in range(5)]
+        self.assertCountEqual(self.search("kinase"), robjects)
+
+
+class SearchIndexReceiversTestCase(FunctionalTest):
+
+    @override_settings(ROBJECTS_SEARCH_BACKEND=None)
+    def test_receivers_are_not_connected_without_backend(self):
+        # Name can be deleted fast (without fetching objects)
+        self.assertFalse(pre_delete.has_listeners(Name))
+        proj = Project.objects.create(name="project_1")
+        proj.name = "renamed_project"
+        with CaptureQueriesContext(connection) as queries:
+            proj.save()
+        # only update, saved name isn't read
+        self.assertEqual(len(queries), 1)
+
+    @override_settings(
+        ROBJECTS_SEARCH_BACKEND="robjects.search.SQLiteFTSBackend")
+    def test_receivers_are_connected_with_backend(self):
+        self.assertTrue(pre_delete.has_listeners(Name))
+
+
 class RobjectCreateViewTestCase(FunctionalTest):
     def get_robject_create_url(self, proj):
         return reverse("projects:robjects:robject_create", kwargs={"project_name": proj.name})
@@ -541,6 +828,27 @@ class RobjectCreateViewTestCase(FunctionalTest):
         self.assertIsInstance(
             form.base_fields["tags"].widget, AddAnotherWidgetWrapper)
 
+    def test_form_renders_only_selected_tags_and_names(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        assign_perm("projects.can_modify_project", user, proj)
+        robject = Robject.objects.create(name="robject", project=proj)
+        for idx in range(5):
+            Tag.objects.create(name=f"tag_{idx}", project=proj)
+            Name.objects.create(name=f"name_{idx}")
+        robject.tags.add(Tag.objects.get(name="tag_3"))
+        robject.names.add(Name.objects.get(name="name_1"))
+        response = self.client.get(reverse(
+            "projects:robjects:robject_edit",
+            kwargs={"project_name": proj.name, "robject_id": robject.id}))
+        html = response.content.decode()
+        self.assertIn("tag_3", html)
+        self.assertIn("name_1", html)
+        for idx in (0, 2, 4):
+            self.assertNotIn(f"tag_{idx}", html)
+            self.assertNotIn(f"name_{idx}", html)
+        self.assertIn(reverse("projects:robjects:tags_autocomplete",
+                              kwargs={"project_name": proj.name}), html)
+
     def test_tags_widget_arguments_in_form(self):
         form = self.get_form_from_context()
         widget = form.base_fields["tags"].widget.widget
@@ -600,14 +908,15 @@ class RobjectCreateViewTestCase(FunctionalTest):
 
         self.assertEqual(response.status_code, 403)
 
-    def test_view_removes_all_robject_less_names_on_get(self):
+    def test_view_does_not_write_on_get(self):
         Name.objects.create(name="name_1")
-        Name.objects.create(name="name_2")
-        self.assertEqual(Name.objects.filter(robjects=None).count(), 2)
         user, proj = self.default_set_up_for_visit_robjects_pages()
         assign_perm("projects.can_modify_project", user, proj)
-        self.client.get(self.get_robject_create_url(proj))
-        self.assertEqual(Name.objects.filter(robjects=None).count(), 0)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.get_robject_create_url(proj))
+        self.assertEqual(Name.objects.filter(robjects=None).count(), 1)
+        self.assertFalse([query for query in queries
+                          if not query["sql"].startswith("SELECT")])
 
     def test_rendered_form_has_no_create_by_field(self):
         form = self.get_form_from_context()
@@ -639,6 +948,20 @@ class RobjectCreateViewTestCase(FunctionalTest):
         r = Robject.objects.last()
         self.assertEqual(r.modify_by, user)
 
+    def test_view_saves_new_robject_once(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        assign_perm("projects.can_modify_project", user, proj)
+        tag = Tag.objects.create(name="tag", project=proj)
+        name = Name.objects.create(name="name")
+        self.client.post(self.get_robject_create_url(proj), {
+            "name": "test", "tags": [tag.id], "names": [name.id]})
+        robject = Robject.objects.get()
+        self.assertEqual(list(robject.tags.all()), [tag])
+        self.assertEqual(list(robject.names.all()), [name])
+        history = robject.history.get()
+        self.assertEqual(history.create_by, user)
+        self.assertEqual(history.modify_by, user)
+
     def test_project_field_from_context_form_is_hidden(self):
         form = self.get_form_from_context()
         self.assertTrue(form.fields["project"].widget.is_hidden)
@@ -648,6 +971,47 @@ class RobjectCreateViewTestCase(FunctionalTest):
         self.assertEqual(form.initial, {"project": Project.objects.first()})
 
 
+class AutocompleteViewsTestCase(FunctionalTest):
+    def get_url(self, url_name, proj):
+        return reverse(f"projects:robjects:{url_name}",
+                       kwargs={"project_name": proj.name})
+
+    def test_names_starting_with_query_are_returned(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        alpha = Name.objects.create(name="alpha")
+        Name.objects.create(name="beta")
+        response = self.client.get(
+            self.get_url("names_autocomplete", proj), {"q": "al"})
+        self.assertEqual(response.json(), {
+            "results": [{"id": alpha.id, "text": "alpha"}], "more": False})
+
+    def test_tags_of_other_projects_are_not_returned(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        tag = Tag.objects.create(name="tag_1", project=proj)
+        Tag.objects.create(name="tag_2",
+                           project=Project.objects.create(name="other"))
+        response = self.client.get(
+            self.get_url("tags_autocomplete", proj), {"q": "tag"})
+        self.assertEqual(response.json()["results"],
+                         [{"id": tag.id, "text": "tag_1"}])
+
+    def test_number_of_results_is_limited(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        for idx in range(25):
+            Name.objects.create(name=f"name_{idx:02}")
+        response = self.client.get(self.get_url("names_autocomplete", proj))
+        data = response.json()
+        self.assertEqual(len(data["results"]), 20)
+        self.assertEqual(data["results"][0]["text"], "name_00")
+        self.assertTrue(data["more"])
+
+    def test_view_permission_is_required(self):
+        user = self.default_set_up_for_projects_pages()
+        proj = Project.objects.create(name="project_1")
+        response = self.client.get(self.get_url("tags_autocomplete", proj))
+        self.assertEqual(response.status_code, 403)
+
+
 class NameCreateViewTestCase(FunctionalTest):
     def get_names_create_url(self, proj):
         url = reverse("projects:robjects:names_create",
@@ -812,6 +1176,49 @@ class RobjectDeleteTestCase(FunctionalTest):
         self.assertIn(robj_1, robjects_context)
         self.assertIn(robj_2, robjects_context)
 
+    def test_view_deletes_all_project_robjects_when_all_selected(self):
+        proj = self.default_set_up_for_robject_delete()
+        Robject.objects.create(name="robject_1", project=proj)
+        Robject.objects.create(name="robject_2", project=proj)
+        other = Robject.objects.create(
+            name="robject_3", project=Project.objects.create(name="other"))
+        url = self.ROBJECT_DELETE_URL + "?select_all_robjects=1"
+        self.client.post(url)
+        self.assertEqual(list(Robject.objects.all()), [other])
+
+    def test_view_deletes_samples_and_writes_history(self):
+        proj = self.default_set_up_for_robject_delete()
+        robj = Robject.objects.create(name="robject_1", project=proj)
+        robj.tags.add(Tag.objects.create(name="tag", project=proj))
+        Sample.objects.create(robject=robj)
+        response = self.client.post(
+            self.ROBJECT_DELETE_URL + f"?robject_1={robj.id}", follow=True)
+        self.assertFalse(Robject.objects.exists())
+        self.assertFalse(Sample.objects.exists())
+        self.assertFalse(Robject.tags.through.objects.exists())
+        deleted = robj.history.first()
+        self.assertEqual(deleted.history_type, "-")
+        self.assertEqual(deleted.name, "robject_1")
+        self.assertEqual(deleted.history_user.username, "USERNAME")
+        self.assertContains(
+            response, "Deleted 1 robject(s), 1 samples in 1 batch(es).")
+
+    def test_view_deletes_robjects_in_constant_number_of_queries(self):
+        proj = self.default_set_up_for_robject_delete()
+        url = self.ROBJECT_DELETE_URL + "?select_all_robjects=1"
+
+        def count_delete_queries(number):
+            for idx in range(number):
+                Robject.objects.create(name=f"robject_{idx}", project=proj)
+            with CaptureQueriesContext(connection) as queries:
+                self.client.post(url)
+            self.assertFalse(Robject.objects.exists())
+            return len(queries)
+
+        with patch.object(RobjectDeleteView, "batch_size", 10):
+            self.assertEqual(count_delete_queries(3),
+                             count_delete_queries(10))
+
 
 class RobjectEditView(FunctionalTest):
     def test_view_returns_404_when_slug_not_match(self):
@@ -839,6 +1246,26 @@ class RobjectEditView(FunctionalTest):
         self.assertEqual(Robject.objects.last().create_by.username, "USERNAME")
         self.assertEqual(Robject.objects.last().modify_by.username, "new_user")
 
+    def test_view_saves_edited_robject_once(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        assign_perm("can_modify_project", user, proj)
+        robject = Robject.objects.create(project=proj, name="ROBJECT_NAME")
+        self.client.post(self.ROBJECT_EDIT_URL, {"name": "new_name"})
+        self.assertEqual(robject.history.count(), 2)
+        self.assertEqual(robject.history.first().modify_by, user)
+
+    def test_view_writes_only_changed_relations(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        assign_perm("can_modify_project", user, proj)
+        tags = [Tag.objects.create(name=f"tag_{idx}", project=proj)
+                for idx in range(3)]
+        robject = Robject.objects.create(project=proj, name="ROBJECT_NAME")
+        robject.tags.add(tags[0], tags[1])
+        self.client.post(self.ROBJECT_EDIT_URL, {
+            "name": "new_name", "project": proj.id,
+            "tags": [tags[1].id, tags[2].id]})
+        self.assertEqual(list(robject.tags.order_by("id")), tags[1:])
+
     def test_view_redirects_on_post(self):
         user, proj = self.default_set_up_for_visit_robjects_pages()
         assign_perm("can_modify_project", user, proj)
@@ -942,7 +1369,120 @@ class RobjectsPdfTestCase(FunctionalTest):
         self.assertEqual(response.status_code, 200)
 
 
+    def test_pdf_sections_rendered_in_parallel_are_merged(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        selected = {}
+        for idx in range(1, 4):
+            robj = Robject.objects.create(
+                author=user, project=proj, name=f"robject_{idx}")
+            selected[robj.name] = robj.id
+        with ThreadPool(2) as pool, \
+                patch.object(RobjectPDFeView, "pdf_parallel_threshold", 2), \
+                patch.object(RobjectPDFeView, "get_pdf_pool",
+                             return_value=pool):
+            response = self.client.get(self.ROBJECT_PDF_URL, selected)
+        self.assertEqual(response.status_code, 200)
+        read_pdf = PyPDF2.PdfFileReader(BytesIO(response.content),
+                                        strict=False)
+        # one page for every robject, in selection order
+        self.assertEqual(read_pdf.getNumPages(), 3)
+        for page_number in range(3):
+            page_content = read_pdf.getPage(page_number).extractText()
+            self.assertIn(f"robject_{page_number + 1}", page_content)
+            # header and footer are merged onto every page
+            self.assertIn("Confidential", page_content)
+            self.assertIn(f"Page {page_number + 1} of 3", page_content)
+
+    @override_settings(EXPORT_JOBS_WORKERS=0)
+    def test_pdf_is_rendered_in_single_job_without_workers(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        selected = {}
+        for idx in range(1, 4):
+            robj = Robject.objects.create(
+                author=user, project=proj, name=f"robject_{idx}")
+            selected[robj.name] = robj.id
+        with patch.object(RobjectPDFeView, "pdf_parallel_threshold", 2), \
+                patch.object(RobjectPDFeView,
+                             "render_pdf_in_parallel") as parallel_mock:
+            response = self.client.get(self.ROBJECT_PDF_URL, selected)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(parallel_mock.called)
+
+
+@override_settings(EXPORT_JOBS_WORKERS=0)
+class ExportJobTestCase(FunctionalTest):
+    def setUp(self):
+        media_root = TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def get_job_url(self, job, url_name="export_job_details"):
+        return reverse(f"projects:robjects:{url_name}", kwargs={
+            "project_name": job.project.name, "job_id": job.id})
+
+    def test_post_creates_job_and_redirects_to_its_status_page(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        robj = Robject.objects.create(name="robject_1", project=proj)
+        response = self.client.post(self.ROBJECT_EXCEL_URL,
+                                    {robj.name: robj.id})
+        job = ExportJob.objects.get()
+        self.assertRedirects(response, self.get_job_url(job))
+        self.assertEqual(job.create_by, user)
+        self.assertEqual(job.export_type, ExportJob.EXCEL)
+        self.assertEqual(job.get_robjects_ids(), [robj.id])
+
+    def test_big_selection_on_get_is_exported_in_background(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        robj_1 = Robject.objects.create(name="robject_1", project=proj)
+        robj_2 = Robject.objects.create(name="robject_2", project=proj)
+        with patch.object(ExportExcelView, "export_job_threshold", 1):
+            response = self.client.get(self.ROBJECT_EXCEL_URL, {
+                robj_1.name: robj_1.id, robj_2.name: robj_2.id})
+        job = ExportJob.objects.get()
+        self.assertRedirects(response, self.get_job_url(job))
+
+    def test_finished_job_result_can_be_downloaded(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        robj = Robject.objects.create(name="robject_1", project=proj)
+        self.client.post(self.ROBJECT_EXCEL_URL, {robj.name: robj.id})
+        job = ExportJob.objects.get()
+        self.assertEqual(job.status, ExportJob.FINISHED)
+        response = self.client.get(self.get_job_url(job))
+        self.assertTemplateUsed(response, "robjects/export_job_details.html")
+        self.assertContains(response,
+                            self.get_job_url(job, "export_job_download"))
+        response = self.client.get(
+            self.get_job_url(job, "export_job_download"))
+        self.assertEqual(response.get('Content-Disposition'),
+                         "attachment; filename=report.xlsx")
+        with BytesIO(b"".join(response.streaming_content)) as f:
+            ws = load_workbook(f).active
+            self.assertEqual(ws.cell(row=2, column=4).value, "robject_1")
+
+    def test_unfinished_job_result_is_not_available(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        job = ExportJob.objects.create(
+            project=proj, export_type=ExportJob.EXCEL, robjects_ids="1")
+        response = self.client.get(
+            self.get_job_url(job, "export_job_download"))
+        self.assertEqual(response.status_code, 404)
+
+    def test_job_status_page_requires_visit_permission(self):
+        self.default_set_up_for_projects_pages()
+        proj = Project.objects.create(name="project_1")
+        job = ExportJob.objects.create(
+            project=proj, export_type=ExportJob.EXCEL, robjects_ids="1")
+        response = self.client.get(self.get_job_url(job))
+        self.assertEqual(response.status_code, 403)
+
+
 class RobjectHistoryViewTest(FunctionalTest):
+    def setUp(self):
+        # rendered diffs are cached by historical records ids
+        cache.clear()
+
     def test_view_returns_404_when_slug_not_match(self):
         self.not_matching_url_kwarg_helper(self.ROBJECT_HISTORY_URL)
 
@@ -1000,8 +1540,8 @@ class RobjectHistoryViewTest(FunctionalTest):
         versions = response.context["versions"]
         self.assertIsInstance(versions, list)
         self.assertEqual(len(versions), 2)
-        # get the versions from the list to check them
-        version_created, version_changed = response.context["versions"]
+        # get the versions from the list to check them (newest first)
+        version_changed, version_created = response.context["versions"]
         self.assertIsInstance(version_created, CustomHistory)
         self.assertIsInstance(version_changed, CustomHistory)
         # check the attributes of created version
@@ -1026,6 +1566,113 @@ class RobjectHistoryViewTest(FunctionalTest):
         self.assertEqual(diff_object.old_value, "Robject_1")
         self.assertEqual(diff_object.new_value, "newname")
 
+    def test_view_takes_constant_number_of_queries(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        robject = Robject.objects.create(name="Robject_1", project=proj,
+                                         modify_by=user)
+        # versions of other robject can't be mixed into diffs
+        Robject.objects.create(name="Robject_2", project=proj)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.ROBJECT_HISTORY_URL)
+        for idx in range(5):
+            robject.name = f"name_{idx}"
+            robject.save()
+        with self.assertNumQueries(len(queries)):
+            response = self.client.get(self.ROBJECT_HISTORY_URL)
+        versions = response.context["versions"]
+        self.assertEqual(len(versions), 6)
+        self.assertEqual(versions[-1].get_diff_objects(), [])
+        diff_object = versions[-2].get_diff_objects()[0]
+        self.assertEqual((diff_object.old_value, diff_object.new_value),
+                         ("Robject_1", "name_0"))
+
+    def test_adding_versions_doesnt_change_number_of_queries(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        robject = Robject.objects.create(name="Robject_1", project=proj,
+                                         modify_by=user)
+
+        def add_version():
+            robject.name = f"name_{robject.history.count()}"
+            robject.save()
+        response = self.assertConstantNumQueries(
+            self.ROBJECT_HISTORY_URL, add_version, rows=5)
+        self.assertEqual(len(response.context["versions"]), 7)
+
+    @patch.object(RobjectHistoryView, "paginate_by", 2)
+    def test_versions_are_paginated_newest_first(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        robject = Robject.objects.create(name="name_0", project=proj)
+        for idx in range(1, 5):
+            robject.name = f"name_{idx}"
+            robject.save()
+        response = self.client.get(self.ROBJECT_HISTORY_URL, {"page": 2})
+        versions = response.context["versions"]
+        self.assertEqual([v.version_id for v in versions], [3, 2])
+        # oldest version on page is compared with version from next page
+        diff_object = versions[-1].get_diff_objects()[0]
+        self.assertEqual((diff_object.old_value, diff_object.new_value),
+                         ("name_0", "name_1"))
+        response = self.client.get(self.ROBJECT_HISTORY_URL, {"page": 3})
+        versions = response.context["versions"]
+        self.assertEqual([v.version_id for v in versions], [1])
+        self.assertEqual(versions[0].get_diff_objects(), [])
+        self.assertContains(response, 'class="previous-page"')
+
+    def test_view_reads_stored_diffs(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        robject = Robject.objects.create(name="Robject_1", project=proj)
+        robject.name = "newname"
+        robject.save()
+        diff = robject.history.order_by("history_id").last().diff
+        diff.changes = '[["name", "stored_new", "stored_old"]]'
+        diff.save()
+        response = self.client.get(self.ROBJECT_HISTORY_URL)
+        self.assertContains(
+            response, 'stored_<del class="diff-delete">old</del>'
+            '<ins class="diff-insert">new</ins>')
+
+    def test_view_renders_inline_diff_of_changed_part(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        robject = Robject.objects.create(name="Robject_1", project=proj,
+                                         ref_seq="ACGT" * 100)
+        robject.ref_seq = "ACGT" * 50 + "TTTT" + "ACGT" * 49
+        robject.save()
+        response = self.client.get(self.ROBJECT_HISTORY_URL)
+        html = response.content.decode()
+        self.assertIn('<ins class="diff-insert">', html)
+        self.assertIn('<span class="diff-skip">', html)
+        self.assertNotIn("ACGT" * 100, html)
+
+    def test_view_returns_404_for_invalid_page(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        Robject.objects.create(name="Robject_1", project=proj)
+        response = self.client.get(self.ROBJECT_HISTORY_URL, {"page": 5})
+        self.assertEqual(response.status_code, 404)
+
+    def test_view_shows_archived_versions(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        robject = Robject.objects.create(name="Robject_1", project=proj,
+                                         ref_seq="ACGT" * 100)
+        for idx in range(4):
+            robject.ref_seq = "ACGT" * 50 + "T" * idx + "ACGT" * 49
+            robject.modify_by = user
+            robject.save()
+
+        def get_versions(page):
+            response = self.client.get(self.ROBJECT_HISTORY_URL,
+                                       {"page": page})
+            return [(version.version_id, version.modify_type,
+                     version.modify_by, version.get_diff_objects())
+                    for version in response.context["versions"]]
+
+        with patch.object(RobjectHistoryView, "paginate_by", 2):
+            expected = [get_versions(page) for page in (1, 2, 3)]
+            compact_history([robject.id], archive_before=timezone.now(),
+                            keep_latest=3)
+            self.assertEqual(robject.history.count(), 3)
+            self.assertEqual([get_versions(page) for page in (1, 2, 3)],
+                             expected)
+
 
 class RobjectDetailViewTest(FunctionalTest):
     def test_view_returns_404_when_slug_not_match(self):
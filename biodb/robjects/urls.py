@@ -1,7 +1,10 @@
 from django.conf.urls import url
 
+from robjects.views import NameAutocompleteView
 from robjects.views import NameCreateView
 from robjects.views import ExportExcelView
+from robjects.views import ExportJobDetailView
+from robjects.views import ExportJobDownloadView
 from robjects.views import RobjectCreateView
 from robjects.views import RobjectDeleteView
 from robjects.views import RobjectDetailView
@@ -11,6 +14,7 @@ from robjects.views import RobjectListView
 from robjects.views import RobjectPDFeView
 from robjects.views import RobjectSamplesList
 from robjects.views import SearchRobjectsView
+from robjects.views import TagAutocompleteView
 from robjects.views import TagCreateView
 
 app_name = 'robjects'
@@ -26,8 +30,16 @@ urlpatterns = [
     url(r"^(?P<robject_id>\d+)/history/$", RobjectHistoryView.as_view(),
         name="robject_history"),
     url(r"^PDF-raport/$", RobjectPDFeView.as_view(), name="pdf_raport"),
+    url(r"^export-jobs/(?P<job_id>[0-9]+)/$", ExportJobDetailView.as_view(),
+        name="export_job_details"),
+    url(r"^export-jobs/(?P<job_id>[0-9]+)/download/$",
+        ExportJobDownloadView.as_view(), name="export_job_download"),
     url(r"^names-create/$", NameCreateView.as_view(), name="names_create"),
     url(r"^tags-create/$", TagCreateView.as_view(), name="tags_create"),
+    url(r"^names-autocomplete/$", NameAutocompleteView.as_view(),
+        name="names_autocomplete"),
+    url(r"^tags-autocomplete/$", TagAutocompleteView.as_view(),
+        name="tags_autocomplete"),
     url(r'^(?P<robject_id>[0-9]+)/samples/$',
         RobjectSamplesList.as_view(), name='robject_samples'),
     url(r'^(?P<robject_id>[0-9]+)/details/$',
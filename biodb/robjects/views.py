@@ -1,14 +1,21 @@
 """Views for robject search."""
 import re
+from functools import lru_cache
+from biodb.mixins import ColumnsJoinMixin
+from biodb.mixins import KeysetPaginationMixin
 from biodb.mixins import LoginPermissionRequiredMixin
+from biodb.mixins import get_column_joins
 
 from django_addanother.views import CreatePopupMixin
 from django_addanother.widgets import AddAnotherWidgetWrapper
 
 from django import forms
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import PermissionDenied
+from django.core.paginator import InvalidPage
+from django.core.paginator import Paginator
 from django.core.urlresolvers import resolve
 from django.core.urlresolvers import reverse
 from django.core.urlresolvers import Resolver404
@@ -16,9 +23,10 @@ from django.db.models import CharField
 from django.db.models import ForeignKey
 from django.db.models import Q
 from django.db.models import TextField
+from django.http import FileResponse
 from django.http import Http404
 from django.http import HttpResponseBadRequest
-from django.shortcuts import get_object_or_404
+from django.http import JsonResponse
 from django.shortcuts import redirect
 from django.shortcuts import render
 from django.utils import timezone
@@ -31,15 +39,25 @@ from django.views.generic import ListView
 from django.views.generic import UpdateView
 from django.views.generic import View
 
+from projects.counters import get_counters
 from projects.mixins import ExportViewMixin
 from projects.models import Project
 
+from robjects.compaction import generate_robject_versions
+from robjects.deletion import delete_robjects
+from robjects.jobs import enqueue_export_job
+from robjects.jobs import get_pool
+from robjects.models import ArchivedRobjectHistory
+from robjects.models import ExportJob
 from robjects.models import Tag
 from robjects.models import Robject
 from robjects.models import Name
+from robjects.saving import save_robject
+from robjects.search import get_search_backend
+from robjects.widgets import AutocompleteSelectMultiple
 
 from samples.views import SampleListView
-from tools.history import generate_versions
+from tools.pagination import paginate
 # Create your views here.
 
 
@@ -47,40 +65,128 @@ def robjects_list_view(request, project_name):
     if not request.user.is_authenticated():
         raise PermissionDenied
     project = Project.objects.get(name=project_name)
-    robject_list = Robject.objects.filter(project=project)
+    robject_list = Robject.objects.filter(project=project).select_related(
+        *get_column_joins(Robject, ROBJECTS_LIST_COLUMNS))
+    paginator, page, robject_list, is_paginated = paginate(
+        request, robject_list, RobjectListView.keyset_ordering,
+        RobjectListView.paginate_by)
     return render(request, "robjects/robjects_list.html",
-                  {"robject_list": robject_list, "project_name": project_name})
+                  {"robject_list": robject_list, "project_name": project_name,
+                   "paginator": paginator, "page_obj": page,
+                   "is_paginated": is_paginated})
 
 
-class RobjectListView(LoginPermissionRequiredMixin, ListView):
+class RobjectSelectionMixin(object):
+    """Read robjects selected in robjects list form.
+
+    Form sends ids of checked robjects or select_all_kwarg flag, when
+    all robjects of project (on all pages) are selected.
+    """
+    select_all_kwarg = "select_all_robjects"
+
+    def is_all_selected(self, data):
+        return bool(data.get(self.select_all_kwarg))
+
+    def get_selected_pks(self, data=None):
+        """Return list of selected robjects ids."""
+        data = self.request.GET if data is None else data
+        if self.is_all_selected(data):
+            return list(Robject.objects.filter(
+                project__name=self.kwargs["project_name"]).values_list(
+                "pk", flat=True))
+        return [value for key, value in data.items()
+                if key != "csrfmiddlewaretoken"]
+
+    def get_selected_queryset(self, data=None):
+        """Return queryset of selected robjects."""
+        data = self.request.GET if data is None else data
+        if self.is_all_selected(data):
+            return Robject.objects.filter(
+                project__name=self.kwargs["project_name"])
+        return Robject.objects.filter(pk__in=self.get_selected_pks(data))
+
+
+# values rendered in every row of robjects_list.html
+ROBJECTS_LIST_COLUMNS = ("id", "name", "project__name", "author",
+                         "create_by", "create_date", "modify_by")
+
+
+class RobjectListView(LoginPermissionRequiredMixin, KeysetPaginationMixin,
+                      ColumnsJoinMixin, ListView):
+    model = Robject
     template_name = "robjects/robjects_list.html"
     context_object_name = "robject_list"
     permissions_required = ["can_visit_project"]
+    columns = ROBJECTS_LIST_COLUMNS
 
     def get_queryset(self):
         project = self.get_permission_object()
-        qs = Robject.objects.filter(project=project)
+        qs = super().get_queryset().filter(project=project)
         return qs
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["project_name"] = self.kwargs["project_name"]
+        context["counters"] = get_counters(self.get_permission_object())
         return context
 
 
-class ExportExcelView(LoginPermissionRequiredMixin, ExportViewMixin, View):
+class ExportJobMixin(RobjectSelectionMixin):
+    """Export big selections of robjects in background ExportJob.
+
+    POST request always creates ExportJob. GET request creates it only
+    when more than export_job_threshold robjects are selected.
+    """
+    export_type = None
+    # above this number of selected robjects export is run in background
+    export_job_threshold = None
+
+    def is_export_job_required(self, robjects_pk):
+        return self.export_job_threshold is not None and \
+            len(robjects_pk) > self.export_job_threshold
+
+    def post(self, request, project_name, *args, **kwargs):
+        robjects_pk = self.get_selected_pks(request.POST)
+        if not robjects_pk:
+            messages.error(request, "No robject selected!")
+            return redirect(reverse("projects:robjects:robjects_list",
+                                    kwargs={"project_name": project_name}))
+        return self.enqueue_export(robjects_pk)
+
+    def enqueue_export(self, robjects_pk):
+        """Create ExportJob and redirect to its status page."""
+        job = ExportJob.objects.create(
+            project=self.get_permission_object(),
+            create_by=self.request.user,
+            export_type=self.export_type,
+            robjects_ids=",".join(str(pk) for pk in robjects_pk
+                                  if str(pk).isdigit()))
+        enqueue_export_job(job)
+        return redirect(job)
+
+
+class ExportExcelView(LoginPermissionRequiredMixin, ExportJobMixin,
+                      ExportViewMixin, View):
     model = Robject
     queryset = None
     permissions_required = ["can_visit_project"]
+    excel_stream_threshold = 1000
+    export_type = ExportJob.EXCEL
+    export_job_threshold = 5000
 
     def get(self, request, project_name, *args, **kwargs):
-        robjects_pk = list(request.GET.values())
-        qs = Robject.objects.filter(pk__in=robjects_pk)
+        robjects_pk = self.get_selected_pks()
+        if self.is_export_job_required(robjects_pk):
+            return self.enqueue_export(robjects_pk)
+        qs = self.get_selected_queryset()
         if not qs:
             messages.error(request, "No robject selected!")
             return redirect(self.get_success_url())
 
-        return self.export_to_excel(qs, is_relation=True,
+        return self.export(qs)
+
+    def export(self, queryset):
+        return self.export_to_excel(queryset, is_relation=True,
                                     one_to_one=True, many_to_one=True,
                                     exclude_fields=['sample'])
 
@@ -89,35 +195,105 @@ class ExportExcelView(LoginPermissionRequiredMixin, ExportViewMixin, View):
             "project_name": self.kwargs["project_name"]})
 
 
-class RobjectPDFeView(LoginPermissionRequiredMixin, View, ExportViewMixin):
+class RobjectPDFeView(LoginPermissionRequiredMixin, ExportJobMixin, View,
+                      ExportViewMixin):
     model = Robject
     pdf_template_name = "robjects/robject_raport_pdf.html"
+    pdf_pages_template_name = "robjects/robject_raport_pdf_pages.html"
     pdf_css_name = 'robjects/css/raport_pdf.css'
     css_sufix = '/robjects'
+    pdf_parallel_threshold = 10
     permissions_required = ["can_visit_project"]
+    export_type = ExportJob.PDF
+    export_job_threshold = 200
+
+    def get_pdf_pool(self):
+        # sections are rendered by export jobs workers, without them
+        # whole pdf is rendered in request process
+        if settings.EXPORT_JOBS_WORKERS:
+            return get_pool()
+        return None
 
     def get(self, request, project_name, *args, **kwargs):
-        self.object_list = Robject.objects.filter(pk__in=request.GET.values())
+        robjects_pk = self.get_selected_pks()
+        if self.is_export_job_required(robjects_pk):
+            return self.enqueue_export(robjects_pk)
+        self.object_list = self.get_selected_queryset()
         if not self.object_list:
             class_name = self.__class__.__name__
             raise Http404(_(f"""Empty list and {class_name}s.allow_empty'
                             is False."""))
         if 'request' not in kwargs:
             kwargs['request'] = request
+        if 'user' not in kwargs:
+            kwargs['user'] = request.user
         if 'create_date' not in kwargs:
             kwargs['create_date'] = timezone.now()
-        return self.export_to_pdf(self.object_list, **kwargs)
+        return self.export(self.object_list, **kwargs)
+
+    def export(self, queryset, **kwargs):
+        return self.export_to_pdf(queryset, **kwargs)
+
+
+class ExportJobDetailView(LoginPermissionRequiredMixin, DetailView):
+    """View to show status of background export."""
+    model = ExportJob
+    template_name = "robjects/export_job_details.html"
+    pk_url_kwarg = "job_id"
+    context_object_name = "job"
+    permissions_required = ["can_visit_project"]
+
+    def get_queryset(self):
+        return super().get_queryset().filter(
+            project__name=self.kwargs["project_name"])
 
 
-class SearchRobjectsView(LoginPermissionRequiredMixin, View):
+class ExportJobDownloadView(ExportJobDetailView):
+    """View to download result of finished export."""
+
+    def get(self, request, *args, **kwargs):
+        job = self.get_object()
+        if job.status != ExportJob.FINISHED:
+            raise Http404(_("Export is not finished."))
+        job.result.open("rb")
+        response = FileResponse(job.result)
+        response['Content-Disposition'] = \
+            'attachment; filename=' + job.get_file_name()
+        return response
+
+
+@lru_cache(maxsize=None)
+def get_search_lookups(model):
+    """Return tuple of lookups of text fields searched in given model.
+
+    Lookups include model CharFields and TextFields and text fields of
+    models related by ForeignKey (eg. "project__name"). Result is cached
+    per model class, use get_search_lookups.cache_clear() after changing
+    model fields (eg. in tests).
+    """
+    lookups = []
+    for field in model._meta.get_fields():
+        if isinstance(field, (CharField, TextField)):
+            lookups.append(field.name)
+        elif isinstance(field, ForeignKey):
+            lookups.extend(
+                '%s__%s' % (field.name, f.name)
+                for f in field.related_model._meta.fields
+                if isinstance(f, (CharField, TextField)))
+    return tuple(lookups)
+
+
+class SearchRobjectsView(LoginPermissionRequiredMixin, ColumnsJoinMixin,
+                         View):
     """View to show filtered list of objects."""
     model = Robject
     permissions_required = ["can_visit_project"]
+    columns = ROBJECTS_LIST_COLUMNS
 
     def get(self, request, project_name):
         query = request.GET.get("query")
 
-        queryset = self.perform_search(query, project_name)
+        queryset = self.join_columns(self.perform_search(query, project_name))
 
         return render(request, "robjects/robjects_list.html",
                       {"robject_list": queryset, "project_name": project_name})
@@ -147,7 +323,9 @@ class SearchRobjectsView(LoginPermissionRequiredMixin, View):
         """Perform search for robjects using given query.
 
         Normalize search string and divede them into search terms.
-        Create list of search queris for CharField and TextField.
+        When ROBJECTS_SEARCH_BACKEND is set, search index is used.
+        Otherwise create list of search queris for CharField and TextField
+        (see get_search_lookups).
 
         Args:
             query (str): Search string provieded by user
@@ -160,44 +338,16 @@ class SearchRobjectsView(LoginPermissionRequiredMixin, View):
         """
         # normalize query string and get the list of words (search terms)
         terms = self.normalize_query(query)
-        # get list of text fields
-        text_fields = [f for f in self.model._meta.get_fields() if isinstance(
-            f, (CharField, TextField))]
-        # get the list of foreig fields
-        foreign_fields = [
-            f for f in self.model._meta.get_fields()
-            if isinstance(f, ForeignKey)]
-        # get dict with ForeigKey field as key and list of Char/Text fields
-        # that are in related model as a argument
-        foreign_models_fields = {}
-        for foreign_field in foreign_fields:
-            fmodel = self.model._meta.get_field(
-                '%s' % foreign_field.name).rel.to
-            foreign_models_fields[foreign_field] = [
-                f for f in fmodel._meta.fields
-                if isinstance(f, (CharField, TextField))]
-
-        # define Q() objects to use or on queries
-        qs = Q()
-        # iterate over all search terms and create the queries
-        # for model text fields and foreign text fields
-        for term in terms:
-            # get queries for Char/Text fields
-            queries = [Q(**{'%s__icontains' % f.name: term})
-                       for f in text_fields]
-            # exted queries by foreign fields
-            if foreign_models_fields:
-                for foreign_field, model_fields \
-                        in foreign_models_fields.items():
-                    queries += [Q(**{'%s__%s__icontains' %
-                                     (foreign_field.name, f.name): term})
-                                for f in model_fields]
-            # perform logical OR on queries
-            if queries:
-                for qs_query in queries:
-                    qs = qs | qs_query
-        # project required
-
+        # use search index if configured
+        backend = get_search_backend()
+        if backend is not None:
+            return backend.search(terms, project_name)
+        # perform logical OR on queries for all search terms and
+        # all (foreign) text fields in single flat Q node
+        qs = Q(*[('%s__icontains' % lookup, term)
+                 for term in terms
+                 for lookup in get_search_lookups(self.model)])
+        qs.connector = Q.OR
         return self.model.objects.filter(qs, project__name=project_name)
 
 
@@ -213,13 +363,17 @@ class RobjectCreateView(LoginPermissionRequiredMixin, CreateView):
             exclude=["create_by", "create_date", "modify_by"],
             widgets={
                 "names": AddAnotherWidgetWrapper(
-                    widget=forms.SelectMultiple,
+                    widget=AutocompleteSelectMultiple(reverse(
+                        "projects:robjects:names_autocomplete",
+                        kwargs={"project_name": self.kwargs["project_name"]})),
                     add_related_url=reverse(
                         "projects:robjects:names_create",
                         kwargs={"project_name": self.kwargs["project_name"]})
                 ),
                 "tags":  AddAnotherWidgetWrapper(
-                    widget=forms.SelectMultiple,
+                    widget=AutocompleteSelectMultiple(reverse(
+                        "projects:robjects:tags_autocomplete",
+                        kwargs={"project_name": self.kwargs["project_name"]})),
                     add_related_url=reverse(
                         "projects:robjects:tags_create",
                         kwargs={"project_name": self.kwargs["project_name"]})
@@ -232,20 +386,12 @@ class RobjectCreateView(LoginPermissionRequiredMixin, CreateView):
         return reverse("projects:robjects:robjects_list",
                        kwargs={"project_name": self.kwargs["project_name"]})
 
-    def get(self, request, *args, **kwargs):
-        Name.objects.filter(robjects=None).delete()
-        return super().get(request, *args, **kwargs)
-
     def form_valid(self, form):
-        robject = form.save()
-        robject.create_by = self.request.user
-        robject.modify_by = self.request.user
-        return super().form_valid(form)
+        self.object = save_robject(form, self.request.user)
+        return redirect(self.get_success_url())
 
     def get_initial(self):
-        return {
-            "project": Project.objects.get(name=self.kwargs["project_name"])
-        }
+        return {"project": self.get_permission_object()}
 
 
 class NameCreateView(CreatePopupMixin, CreateView):
@@ -266,6 +412,44 @@ class NameCreateView(CreatePopupMixin, CreateView):
                 "<h1>Error 400</h1><p>Form available from robject form only</p>")
 
 
+class AutocompleteView(LoginPermissionRequiredMixin, View):
+    """Return JSON with objects which names start with "q" parameter.
+
+    Response: {"results": [{"id": pk, "text": name}, ...], "more": bool},
+    at most limit objects ordered by name. Prefix lookup (LIKE 'q%') uses
+    index only on PostgreSQL, where Django adds varchar_pattern_ops index
+    ("_like" suffix) to unique name columns. LIKE of SQLite is case
+    insensitive and can't use index, so there names are filtered row by
+    row (tags only of the project, found by index of project and name).
+    """
+    model = None
+    permissions_required = ["can_visit_project"]
+    limit = 20
+
+    def get_queryset(self):
+        return self.model.objects.all()
+
+    def get(self, request, *args, **kwargs):
+        objects = list(self.get_queryset().filter(
+            name__startswith=request.GET.get("q", "")).order_by(
+            "name").values_list("pk", "name")[:self.limit + 1])
+        return JsonResponse({
+            "results": [{"id": pk, "text": name}
+                        for pk, name in objects[:self.limit]],
+            "more": len(objects) > self.limit})
+
+
+class NameAutocompleteView(AutocompleteView):
+    model = Name
+
+
+class TagAutocompleteView(AutocompleteView):
+    model = Tag
+
+    def get_queryset(self):
+        return Tag.objects.filter(project__name=self.kwargs["project_name"])
+
+
 class TagCreateView(CreatePopupMixin, CreateView):
     model = Tag
     fields = ["name"]
@@ -292,6 +476,7 @@ class TagCreateView(CreatePopupMixin, CreateView):
 
 class RobjectSamplesList(SampleListView):
     permissions_required = ["can_visit_project"]
+    show_counters = False
 
     def get_queryset(self):
         """
@@ -306,15 +491,27 @@ class RobjectSamplesList(SampleListView):
         return qs
 
 
-class RobjectDeleteView(LoginPermissionRequiredMixin, DeleteView):
+class RobjectDeleteView(LoginPermissionRequiredMixin, RobjectSelectionMixin,
+                        DeleteView):
     model = Robject
     context_object_name = "robjects"
     permissions_required = ["can_visit_project", "can_modify_project"]
 
+    # number of robjects deleted in one transaction
+    batch_size = 500
+
     def get_object(self, queryset=None):
-        ids = self.request.GET.values()
-        qs = self.model.objects.filter(pk__in=ids)
-        return qs
+        return self.get_selected_queryset()
+
+    def delete(self, request, *args, **kwargs):
+        """Delete selected robjects in batches and show summary."""
+        summary = delete_robjects(self.get_object(), user=request.user,
+                                  batch_size=self.batch_size)
+        related = "".join(f", {count} {name}"
+                          for name, count in summary.related.items())
+        messages.success(request, f"Deleted {summary.robjects} robject(s)"
+                         f"{related} in {summary.batches} batch(es).")
+        return redirect(self.get_success_url())
 
     def get_success_url(self):
         return reverse("projects:robjects:robjects_list", kwargs=self.kwargs)
@@ -324,38 +521,53 @@ class RobjectEditView(RobjectCreateView, UpdateView):
     pk_url_kwarg = "robject_id"
     permissions_required = ["can_visit_project", "can_modify_project"]
 
-    def form_valid(self, form):
-        robject = form.save()
-        robject.modify_by = self.request.user
-        robject.save()
-        return redirect(self.get_success_url())
-
 
 @method_decorator(login_required, name='dispatch')
 class RobjectHistoryView(LoginPermissionRequiredMixin, DetailView):
     """View to show historical records of robject.
 
-    Views show in table all changes made on object.
+    Views show in table all changes made on object, newest first,
+    paginated by paginate_by versions (page number in "page" parameter).
     Changes are prsented in github style.
     """
     model = Robject
     template_name = "robjects/robject_history.html"
     permissions_required = ["can_visit_project"]
     pk_url_kwarg = "robject_id"
+    paginate_by = 50
+    page_kwarg = "page"
 
     def get_context_data(self, **kwargs):
-        """Add CustomHistory objects as versions to context."""
+        """Add CustomHistory objects of page as versions to context."""
         context = super(RobjectHistoryView, self).get_context_data(**kwargs)
-        # get robject
-        robject = self.get_object()
-        # get all simple history versions
-        robject_history = robject.history.all()
+        # get robject (already fetched by DetailView)
+        robject = self.object
+        # get all simple history versions (newest first) with stored diffs
+        robject_history = robject.history.select_related("diff")
+        history_count = robject_history.count()
+        # compacted versions older than history ones (see compact_history)
+        archived_count = ArchivedRobjectHistory.objects.filter(
+            robject_id=robject.id).count()
+        # paginator counts versions for absolute version numbers
+        paginator = Paginator(range(history_count + archived_count),
+                              self.paginate_by)
+        try:
+            page = paginator.page(self.request.GET.get(self.page_kwarg, 1))
+        except InvalidPage as e:
+            raise Http404(_(f"Invalid page: {e}"))
         # use history_tools for built logic on top of versions (prepare for
-        # table)
+        # table), only versions of page without stored diff are diffed
         exclude_fields = ["create_date", "modify_date"]
-        versions = generate_versions(robject_history, exclude=exclude_fields)
+        start = (page.number - 1) * self.paginate_by
+        stop = min(start + self.paginate_by, paginator.count)
+        versions = generate_robject_versions(
+            robject, robject_history, history_count, archived_count,
+            start, stop, exclude=exclude_fields)
         # create table
         context["versions"] = versions
+        context["paginator"] = paginator
+        context["page_obj"] = page
+        context["is_paginated"] = page.has_other_pages()
         return context
 
 
@@ -364,7 +576,3 @@ class RobjectDetailView(LoginPermissionRequiredMixin, DetailView):
     template_name = 'robjects/robject_details.html'
     pk_url_kwarg = "robject_id"
     permissions_required = ["can_visit_project"]
-
-    def get_permission_object(self):
-        project = get_object_or_404(Project, name=self.kwargs['project_name'])
-        return project
@@ -0,0 +1,37 @@
+"""Form widgets of robjects forms."""
+from django import forms
+from django.forms.models import ModelChoiceIterator
+
+
+class AutocompleteSelectMultiple(forms.SelectMultiple):
+    """SelectMultiple rendering only selected options.
+
+    Other options are loaded on demand from autocomplete_url (see
+    robjects.views.AutocompleteView) when user types in search box, so
+    size of page doesn't depend on number of choices.
+    """
+
+    def __init__(self, autocomplete_url, attrs=None, choices=()):
+        self.autocomplete_url = autocomplete_url
+        super().__init__(attrs, choices)
+
+    class Media:
+        js = ("robjects/autocomplete.js",)
+
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs)
+        attrs["data-autocomplete-url"] = self.autocomplete_url
+        return attrs
+
+    def optgroups(self, name, value, attrs=None):
+        all_choices = self.choices
+        if isinstance(all_choices, ModelChoiceIterator):
+            # only selected objects are read (ids are digits)
+            selected = [pk for pk in value if str(pk).isdigit()]
+            self.choices = [
+                all_choices.choice(obj)
+                for obj in all_choices.queryset.filter(pk__in=selected)]
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = all_choices
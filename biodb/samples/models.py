@@ -46,6 +46,9 @@ class Sample(models.Model):
     source = models.CharField(max_length=100, blank=True)
     status = models.IntegerField(default=1, choices=STATUS_CHOICES)
 
+    class Meta:
+        indexes = [models.Index(fields=["robject", "status"])]
+
     def __str__(self):
         return "Sample " + str(self.id)
 
@@ -62,6 +62,13 @@ class SampleListViewTest(FunctionalTest):
         self.assertEqual(response.resolver_match.func.__name__,
                          SampleListView.as_view().__name__)
 
+    def test_view_takes_constant_number_of_queries(self):
+        user, proj = self.default_set_up_for_visit_robjects_pages()
+        robj = Robject.objects.create(name='robject', project=proj)
+        self.assertConstantNumQueries(
+            self.SAMPLE_LIST_URL, lambda: Sample.objects.create(
+                robject=robj, owner=user, modify_by=user))
+
     def test_context_data(self):
         user, proj = self.default_set_up_for_visit_robjects_pages()
         assign_perm("projects.can_visit_project", user, proj)
@@ -1,29 +1,36 @@
 """Views for robject search."""
+from biodb.mixins import ColumnsJoinMixin
 from biodb.mixins import LoginPermissionRequiredMixin
+from biodb.mixins import get_request_project
 
 from django_tables2 import SingleTableView
 
 from django.http import Http404
-from django.shortcuts import get_object_or_404
 from django.views.generic import DetailView
 from django.views.generic.list import ListView
 
-from projects.models import Project
+from projects.counters import get_counters
+
 from samples.models import Sample
 from samples.tables import SampleTable
 
 
-class SampleListView(LoginPermissionRequiredMixin, SingleTableView, ListView):
+class SampleListView(LoginPermissionRequiredMixin, ColumnsJoinMixin,
+                     SingleTableView, ListView):
     model = Sample
     template_name = "samples/samples_list.html"
     table_class = SampleTable
     permissions_required = ["can_visit_project"]
+    # values rendered in samples_list.html and SampleTable
+    columns = ("robject__name", "robject__project__name", "owner",
+               "modify_by")
+    # counters of whole project, shown only above all project samples
+    show_counters = True
 
     def dispatch(self, request, *args, **kwargs):
         if 'project_name' in self.kwargs:
-            project = get_object_or_404(Project,
-                                        name=self.kwargs['project_name'])
-            self.project = project
+            self.project = get_request_project(
+                request, self.kwargs['project_name'])
         else:
             raise Http404
         request.session['_succes_url'] = self.request.build_absolute_uri()
@@ -41,6 +48,8 @@ class SampleListView(LoginPermissionRequiredMixin, SingleTableView, ListView):
     def get_context_data(self, **kwargs):
         context = super(SampleListView, self).get_context_data(**kwargs)
         context['project'] = self.project
+        if self.show_counters:
+            context['counters'] = get_counters(self.project)
         return context
 
 
@@ -0,0 +1,232 @@
+"""Inline (github style) diff of text values.
+
+Values are compared with Myers O(ND) algorithm, where D is number of
+edits, so long sequences with few changes are compared quickly. When
+values differ by more than allowed number of edits, comparison falls
+back to lines, and finally to replacing whole value.
+"""
+import re
+
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+EQUAL = "equal"
+DELETE = "delete"
+INSERT = "insert"
+
+# line ends (new lines, closing paragraphs and line breaks of rich text)
+LINE_PATTERN = re.compile(r".*?(?:\n|</p>|<br\s*/?>)|.+", re.S | re.I)
+
+
+def _shortest_edit_trace(a, b, max_edits):
+    """Return (trace, edits) of Myers greedy algorithm or None.
+
+    trace[d] holds furthest reaching x on diagonals -d-1..d+1 before
+    step d. None is returned when sequences need more than max_edits.
+    """
+    n, m = len(a), len(b)
+    limit = n + m if max_edits is None else min(n + m, max_edits)
+    offset = limit + 1
+    v = [0] * (2 * limit + 3)
+    trace = []
+    for d in range(limit + 1):
+        trace.append(v[offset - d - 1:offset + d + 2])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                # move down (insert b[y])
+                x = v[offset + k + 1]
+            else:
+                # move right (delete a[x])
+                x = v[offset + k - 1] + 1
+            y = x - k
+            # follow diagonal (equal elements)
+            if x < n and y < m and a[x] == b[y]:
+                run = _equal_run_length(a, b, x, y)
+                x += run
+                y += run
+            v[offset + k] = x
+            if x >= n and y >= m:
+                return trace, d
+    return None
+
+
+def _equal_run_length(a, b, x, y):
+    """Return number of equal elements of a from x and b from y.
+
+    Compared slices grow twice after every match, so long runs of equal
+    elements (repeated text) are skipped with few comparisons.
+    """
+    limit = min(len(a) - x, len(b) - y)
+    length, step = 0, 1
+    while length < limit:
+        step = min(step, limit - length)
+        if a[x + length:x + length + step] == b[y + length:y + length + step]:
+            length += step
+            step *= 2
+        elif step == 1:
+            break
+        else:
+            step //= 2
+    return length
+
+
+def _backtrack(a, b, trace, edits):
+    """Return list of (tag, a_index, b_index) moves from end to start."""
+    moves = []
+    x, y = len(a), len(b)
+    for d in range(edits, 0, -1):
+        snapshot = trace[d]
+        k = x - y
+        if k == -d or (k != d and
+                       snapshot[k - 1 + d + 1] < snapshot[k + 1 + d + 1]):
+            prev_k = k + 1
+        else:
+            prev_k = k - 1
+        prev_x = snapshot[prev_k + d + 1]
+        prev_y = prev_x - prev_k
+        while x > prev_x and y > prev_y:
+            x -= 1
+            y -= 1
+            moves.append((EQUAL, x, y))
+        if prev_k == k + 1:
+            moves.append((INSERT, prev_x, prev_y))
+        else:
+            moves.append((DELETE, prev_x, prev_y))
+        x, y = prev_x, prev_y
+    while x > 0 and y > 0:
+        x -= 1
+        y -= 1
+        moves.append((EQUAL, x, y))
+    return moves
+
+
+def common_prefix_length(a, b):
+    """Return length of common prefix of sequences.
+
+    Slices are compared (binary search), which is much faster than
+    comparing elements one by one in python.
+    """
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[low:middle] == b[low:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def common_affixes(a, b):
+    """Return lengths of common prefix and suffix of sequences."""
+    prefix = common_prefix_length(a, b)
+    suffix = common_prefix_length(a[prefix:][::-1], b[prefix:][::-1])
+    return prefix, suffix
+
+
+def diff_sequences(a, b, max_edits=None):
+    """Return list of (tag, elements) chunks turning a into b.
+
+    Tags are EQUAL, DELETE and INSERT, elements are slices of a (EQUAL,
+    DELETE) or b (INSERT). None is returned when sequences need more than
+    max_edits insertions and deletions.
+    """
+    # common prefix and suffix don't need to be compared
+    prefix, suffix = common_affixes(a, b)
+    middle_a = a[prefix:len(a) - suffix]
+    middle_b = b[prefix:len(b) - suffix]
+    result = _shortest_edit_trace(middle_a, middle_b, max_edits)
+    if result is None:
+        return None
+    moves = _backtrack(middle_a, middle_b, *result)
+    chunks = []
+    if prefix:
+        chunks.append((EQUAL, a[:prefix]))
+    # join consecutive moves of the same kind into [tag, start, stop]
+    ranges = []
+    for tag, x, y in reversed(moves):
+        index = y if tag == INSERT else x
+        if ranges and ranges[-1][0] == tag and ranges[-1][2] == index:
+            ranges[-1][2] += 1
+        else:
+            ranges.append([tag, index, index + 1])
+    for tag, start, stop in ranges:
+        source = middle_b if tag == INSERT else middle_a
+        chunks.append((tag, source[start:stop]))
+    if suffix:
+        chunks.append((EQUAL, a[len(a) - suffix:]))
+    return chunks
+
+
+def split_lines(text):
+    """Return lines of text, split after new lines and after closing
+    paragraphs and line breaks of html."""
+    return LINE_PATTERN.findall(text)
+
+
+def diff_text(old, new, max_edits=None):
+    """Return list of (tag, text) chunks turning old text into new one.
+
+    Texts are compared by characters when they differ by at most
+    max_edits characters. Otherwise they are compared by lines (at most
+    max_edits lines) and replaced lines are compared by characters again.
+    When it fails too, whole old text is replaced by new one.
+    """
+    chunks = diff_sequences(old, new, max_edits)
+    if chunks is not None:
+        return chunks
+    line_chunks = diff_sequences(split_lines(old), split_lines(new),
+                                 max_edits)
+    if line_chunks is None:
+        return [(tag, text) for tag, text in ((DELETE, old), (INSERT, new))
+                if text]
+    chunks = []
+    for tag, lines in line_chunks:
+        text = "".join(lines)
+        # compare replaced lines by characters
+        if tag == INSERT and chunks and chunks[-1][0] == DELETE:
+            refined = diff_sequences(chunks[-1][1], text, max_edits)
+            if refined is not None:
+                chunks[-1:] = refined
+                continue
+        chunks.append((tag, text))
+    return merge_chunks(chunks)
+
+
+def merge_chunks(chunks):
+    """Join consecutive chunks with the same tag."""
+    merged = []
+    for tag, text in chunks:
+        if merged and merged[-1][0] == tag:
+            merged[-1] = (tag, merged[-1][1] + text)
+        else:
+            merged.append((tag, text))
+    return merged
+
+
+def render_chunks(chunks, context=None):
+    """Return html with deleted text in <del> and inserted in <ins> tags.
+
+    Equal text longer than 2 * context chars is shortened to context
+    chars around changes.
+    """
+    html = []
+    for idx, (tag, text) in enumerate(chunks):
+        if tag == EQUAL:
+            if context is not None and len(text) > 2 * context:
+                head = text[:context] if idx > 0 else ""
+                tail = text[-context:] if idx < len(chunks) - 1 else ""
+                html.append(escape(head))
+                html.append('<span class="diff-skip">&hellip;</span>')
+                html.append(escape(tail))
+            else:
+                html.append(escape(text))
+        elif tag == DELETE:
+            html.append(f'<del class="diff-delete">{escape(text)}</del>')
+        else:
+            html.append(f'<ins class="diff-insert">{escape(text)}</ins>')
+    return mark_safe("".join(html))
+
+
+def render_inline_diff(old, new, max_edits=None, context=None):
+    """Return html of inline diff of old and new values (see diff_text)."""
+    return render_chunks(diff_text(str(old), str(new), max_edits), context)
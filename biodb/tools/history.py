@@ -1,6 +1,58 @@
 """"Tools to generate historical review."""
 from collections import namedtuple
 
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.query import QuerySet
+
+from tools.diff import render_inline_diff
+
+# marks previous version not read from database yet
+NOT_LOADED = object()
+
+# difference of single field between versions
+DiffField = namedtuple("DiffField",  # pylint: disable-msg=C0103
+                       ["field", "new_value", "old_value"])
+# html of inline diff of single field
+InlineDiff = namedtuple("InlineDiff",  # pylint: disable-msg=C0103
+                        ["field", "html"])
+
+
+def get_inline_diff(history_id, previous_history_id, diff_object):
+    """Return html of inline diff of DiffField object.
+
+    Historical records never change, so rendered diff is cached (without
+    timeout) under key made of both records ids and field name.
+    """
+    key = f"history-diff:{history_id}:{previous_history_id}:" \
+        f"{diff_object.field}"
+    html = cache.get(key)
+    if html is None:
+        html = render_inline_diff(
+            diff_object.old_value, diff_object.new_value,
+            max_edits=getattr(settings, "HISTORY_DIFF_MAX_EDITS", None),
+            context=getattr(settings, "HISTORY_DIFF_CONTEXT", None))
+        cache.set(key, html, None)
+    return html
+
+
+def compare_versions(current, previous, fields):
+    """Return list of DiffField objects for fields differ in versions.
+
+        Args:
+            current (obj): SimpleHistory object.
+            previous (obj): SimpleHistory object of previous version.
+            fields (iterable): Names of compared fields.
+    """
+    diff_objects = []
+    for field in sorted(fields):
+        new_value = getattr(current, field)
+        old_value = getattr(previous, field)
+        if new_value != old_value:
+            diff_objects.append(
+                DiffField(field, new_value or "", old_value or ""))
+    return diff_objects
+
 
 class CustomHistory():
     """Contains tools for display object history data in table.
@@ -16,6 +68,11 @@ class CustomHistory():
         SimpleHistObj (obj): SimpleHistory object
         version_id (int): Version number
         exclude (list): List of fields names to exclude.
+        previous_version (obj): SimpleHistory object of previous version
+            or None for first version. When not given it is queried from
+            database (see generate_versions to avoid that).
+        diff_objects (list): Precomputed DiffField objects (eg. stored in
+            database). When not given versions are compared.
     Attributes:
         version_id (int): Version number
         modify_by (obj): User relation field (required in object model)
@@ -25,7 +82,8 @@ class CustomHistory():
         exclude (list): list of fields names to exclude; default:  ["id"].
     """
 
-    def __init__(self, SimpleHistObj, version_id, exclude=None):
+    def __init__(self, SimpleHistObj, version_id, exclude=None,
+                 previous_version=NOT_LOADED, diff_objects=None):
         # get extra attr with version number
         self.version_id = version_id
 
@@ -47,38 +105,30 @@ class CustomHistory():
         # by default exclude ID (some history can have problems with changed ID)
         if "id" not in self.exclude:
             self.exclude.append("id")
+        self.previous_version = previous_version
+        self.diff_objects = diff_objects
 
     def return_previous_version(self):
         """Return previous version of object or None"""
+        # previous version is queried only once
+        if self.previous_version is not NOT_LOADED:
+            return self.previous_version
         # get previous version
         try:
             pr_ver = self.curr_ver.get_previous_by_history_date()
         # if DoesNotExist exception or different create_date
         # there is no previous version
         except self.curr_ver.DoesNotExist:
-            return None
+            pr_ver = None
         # if pr_ver.create_date != self.curr_ver.create_date:
         #     return None
         # return previous version
+        self.previous_version = pr_ver
         return pr_ver
 
     def get_differ_fields(self):
         """Return list of model fields containing changes."""
-        # create empty list for diff fileds
-        diff_fields = []
-        # get previous versions
-        pr_ver = self.return_previous_version()
-        # if there isn't previous version return empty list
-        if not pr_ver:
-            return diff_fields
-        # get all field names in set
-        fields = self.curr_ver.instance.get_fields_names(exclude=self.exclude)
-        # search for differ fields
-        for field in fields:
-            # if field differ from curren version add it to list
-            if getattr(self.curr_ver, field) != getattr(pr_ver, field):
-                diff_fields.append(field)
-        return diff_fields
+        return [diff_object.field for diff_object in self.get_diff_objects()]
 
     def get_differ_values(self, field):
         """ Get current and previous value for a given field."""
@@ -96,38 +146,103 @@ class CustomHistory():
         """Create difference objects for all diferent field fdxor the instance.
 
         Function is returning list of difference objects conteining attributes:
-        field name, new_value, old_value
+        field name, new_value, old_value. Versions are compared only once.
         """
-        # create empty list
-        diff_objects = []
-        # create object conteinter
-        DiffField = namedtuple("DiffField",  # pylint: disable-msg=C0103
-                               ["field", "new_value", "old_value"])
-        # get list of differ fields
-        fields = self.get_differ_fields()
-        # for each field get differ values and write all to diff object
-        for field in fields:
-            # get diff values (old & new)
-            old_value, new_value = self.get_differ_values(field)
-            # create diff object
-            diff_object = DiffField(field, new_value, old_value)
-            # add object to list
-            diff_objects.append(diff_object)
-        # return list of diff objects
-        return diff_objects
+        if self.diff_objects is None:
+            # get previous versions
+            pr_ver = self.return_previous_version()
+            # if there isn't previous version there is no differences
+            if not pr_ver:
+                self.diff_objects = []
+            else:
+                # get all field names in set
+                fields = self.curr_ver.instance.get_fields_names(
+                    exclude=self.exclude)
+                self.diff_objects = compare_versions(
+                    self.curr_ver, pr_ver, fields)
+        return self.diff_objects
+
+    def get_inline_diffs(self):
+        """Return InlineDiff objects of all different fields."""
+        diff_objects = self.get_diff_objects()
+        if not diff_objects:
+            return []
+        history_id = self.curr_ver.history_id
+        previous_history_id = self.return_previous_version().history_id
+        return [InlineDiff(diff_object.field, get_inline_diff(
+            history_id, previous_history_id, diff_object))
+            for diff_object in diff_objects]
 
 
 def generate_versions(history_objects, exclude=None):
     """Transform model.history.all() into CustomHistory instances list.
 
+        History is loaded once (with users joined) and every version is
+        compared with version preceding it in history_objects, so no
+        queries are made when versions are diffed.
+
         Args:
-            history_objects (list): The list of SimpleHistory objects.
+            history_objects (list): The list of SimpleHistory objects
+                                    (newest first).
             exlude (list): List of fields names to exclude.
         Retruns:
             list: List of CustomHistory objects with autogenerated version
                   number
     """
+    if isinstance(history_objects, QuerySet):
+        history_objects = history_objects.select_related(
+            "modify_by", "create_by")
+    history_objects = list(history_objects)
     if not history_objects:
         return []
-    return [CustomHistory(version, version_id=idx, exclude=exclude)
-            for idx, version in enumerate(reversed(history_objects), 1)]
+    versions = []
+    previous_version = None
+    for idx, version in enumerate(reversed(history_objects), 1):
+        custom_history = CustomHistory(
+            version, version_id=idx, exclude=exclude,
+            previous_version=previous_version)
+        versions.append(custom_history)
+        previous_version = version
+    return versions
+
+
+def generate_versions_range(history_objects, start, stop, count,
+                            exclude=None, get_stored_diff=None):
+    """Transform history_objects[start:stop] into CustomHistory instances.
+
+        Only versions in range and version preceding the oldest of them
+        are loaded from database (one query). Version numbers are
+        absolute, computed from count of all history objects.
+
+        Args:
+            history_objects (QuerySet): SimpleHistory objects (newest
+                                        first).
+            start (int): index of first (newest) version.
+            stop (int): index after last (oldest) version.
+            count (int): number of all history objects.
+            exlude (list): List of fields names to exclude.
+            get_stored_diff (callable): Function returning precomputed
+                                        DiffField objects list of history
+                                        object or None.
+        Retruns:
+            list: List of CustomHistory objects, newest first.
+    """
+    if isinstance(history_objects, QuerySet):
+        history_objects = history_objects.select_related(
+            "modify_by", "create_by")
+    # one more object to compare oldest version with
+    records = list(history_objects[start:stop + 1])
+    versions = []
+    for idx, version in enumerate(records[:stop - start]):
+        if idx + 1 < len(records):
+            previous_version = records[idx + 1]
+        else:
+            previous_version = None
+        if get_stored_diff is not None:
+            diff_objects = get_stored_diff(version)
+        else:
+            diff_objects = None
+        versions.append(CustomHistory(
+            version, version_id=count - start - idx, exclude=exclude,
+            previous_version=previous_version, diff_objects=diff_objects))
+    return versions
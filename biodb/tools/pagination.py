@@ -0,0 +1,166 @@
+"""Keyset (seek) pagination of querysets.
+
+Offset pagination (?page=N) makes database skip all rows of previous
+pages, so deep pages get slower with every page. Keyset pagination
+remembers values of ordering fields of last (or first) object on page
+(cursor) and filters next page with them, so every page costs the same.
+"""
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.http import Http404
+from django.utils.translation import ugettext as _
+
+CURSOR_SEPARATOR = ","
+
+
+class KeysetPage(object):
+    """Page of objects returned by keyset_paginate.
+
+    Attributes:
+        object_list (list): objects on page.
+        ordering (tuple): ordering used to paginate.
+        has_previous_objects (bool): are there objects before page.
+        has_next_objects (bool): are there objects after page.
+    """
+
+    def __init__(self, object_list, ordering, has_previous, has_next):
+        self.object_list = object_list
+        self.ordering = ordering
+        self.has_previous_objects = has_previous
+        self.has_next_objects = has_next
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self.has_next_objects
+
+    def has_previous(self):
+        return self.has_previous_objects
+
+    def has_other_pages(self):
+        return self.has_previous() or self.has_next()
+
+    @property
+    def next_cursor(self):
+        if not self.has_next():
+            return None
+        return encode_cursor(self.object_list[-1], self.ordering)
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous():
+            return None
+        return encode_cursor(self.object_list[0], self.ordering)
+
+
+def get_ordering_fields(model, ordering):
+    """Return list of model fields used in ordering."""
+    return [model._meta.get_field(name.lstrip("-")) for name in ordering]
+
+
+def encode_cursor(obj, ordering):
+    """Return cursor (string) with values of ordering fields of obj."""
+    return CURSOR_SEPARATOR.join(
+        field.value_to_string(obj)
+        for field in get_ordering_fields(type(obj), ordering))
+
+
+def decode_cursor(model, cursor, ordering):
+    """Return list of ordering fields values stored in cursor.
+
+    Raises:
+        ValueError: when cursor doesn't match ordering.
+        ValidationError: when value can't be converted to field type.
+    """
+    fields = get_ordering_fields(model, ordering)
+    values = cursor.split(CURSOR_SEPARATOR)
+    if len(values) != len(fields):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return [field.to_python(value) for field, value in zip(fields, values)]
+
+
+def get_keyset_filter(ordering, values, backwards=False):
+    """Return Q object matching objects after given ordering values.
+
+    For ordering ("create_date", "id") it is:
+        create_date > v1 OR (create_date = v1 AND id > v2)
+    With backwards=True objects before given values are matched.
+    """
+    condition = Q()
+    equal = {}
+    for name, value in zip(ordering, values):
+        field_name = name.lstrip("-")
+        descending = name.startswith("-") != backwards
+        lookup = "lt" if descending else "gt"
+        condition |= Q(**equal, **{f"{field_name}__{lookup}": value})
+        equal[field_name] = value
+    return condition
+
+
+def reverse_ordering(ordering):
+    return [name[1:] if name.startswith("-") else "-" + name
+            for name in ordering]
+
+
+def keyset_paginate(queryset, ordering, page_size, after=None, before=None):
+    """Return KeysetPage of objects after (or before) given cursor.
+
+    Ordering fields should be not null and their combination unique
+    (last field is usually "id"). Without cursor first page is returned.
+
+    Raises:
+        ValueError, ValidationError: for cursors not matching ordering.
+    """
+    model = queryset.model
+    if before is not None:
+        values = decode_cursor(model, before, ordering)
+        # read page backwards and reverse it
+        objects = list(queryset.filter(
+            get_keyset_filter(ordering, values, backwards=True)).order_by(
+            *reverse_ordering(ordering))[:page_size + 1])
+        has_previous = len(objects) > page_size
+        objects = objects[:page_size][::-1]
+        return KeysetPage(objects, ordering, has_previous, True)
+    queryset = queryset.order_by(*ordering)
+    if after is not None:
+        values = decode_cursor(model, after, ordering)
+        queryset = queryset.filter(get_keyset_filter(ordering, values))
+    objects = list(queryset[:page_size + 1])
+    has_next = len(objects) > page_size
+    return KeysetPage(objects[:page_size], ordering, after is not None,
+                      has_next)
+
+
+def paginate(request, queryset, ordering, page_size, page_kwarg="page",
+             after_kwarg="after", before_kwarg="before"):
+    """Paginate queryset with parameters from request.
+
+    Keyset pagination is used unless page number is given in page_kwarg,
+    then offset pagination (django Paginator) is used.
+
+    Returns:
+        tuple: (paginator, page, object_list, is_paginated) like
+            django MultipleObjectMixin.paginate_queryset. Paginator is
+            None for keyset pagination.
+    """
+    if page_kwarg in request.GET:
+        paginator = Paginator(queryset.order_by(*ordering), page_size)
+        try:
+            page = paginator.page(request.GET[page_kwarg])
+        except InvalidPage as e:
+            raise Http404(_(f"Invalid page: {e}"))
+        return (paginator, page, page.object_list, page.has_other_pages())
+    try:
+        page = keyset_paginate(
+            queryset, ordering, page_size,
+            after=request.GET.get(after_kwarg),
+            before=request.GET.get(before_kwarg))
+    except (ValueError, ValidationError):
+        raise Http404(_("Invalid cursor."))
+    return (None, page, page.object_list, page.has_other_pages())
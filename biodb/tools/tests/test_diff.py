@@ -0,0 +1,88 @@
+import random
+from unittest import TestCase
+
+from tools.diff import DELETE
+from tools.diff import EQUAL
+from tools.diff import INSERT
+from tools.diff import diff_sequences
+from tools.diff import diff_text
+from tools.diff import render_inline_diff
+
+
+def apply_chunks(chunks):
+    """Return (old, new) texts rebuilt from chunks."""
+    old = "".join(text for tag, text in chunks if tag != INSERT)
+    new = "".join(text for tag, text in chunks if tag != DELETE)
+    return old, new
+
+
+class DiffTestCase(TestCase):
+
+    def test_diff_sequences_finds_shortest_edit_script(self):
+        chunks = diff_sequences("ABCABBA", "CBABAC")
+        self.assertEqual(apply_chunks(chunks), ("ABCABBA", "CBABAC"))
+        edits = sum(len(text) for tag, text in chunks if tag != EQUAL)
+        # length of longest common subsequence is 4
+        self.assertEqual(edits, 7 + 6 - 2 * 4)
+
+    def test_diff_sequences_of_equal_and_empty_values(self):
+        self.assertEqual(diff_sequences("ACGT", "ACGT"), [(EQUAL, "ACGT")])
+        self.assertEqual(diff_sequences("", ""), [])
+        self.assertEqual(diff_sequences("", "AC"), [(INSERT, "AC")])
+
+    def test_diff_sequences_returns_none_above_max_edits(self):
+        self.assertIsNone(diff_sequences("AAAA", "TTTT", max_edits=3))
+        self.assertIsNotNone(diff_sequences("AAAA", "AATA", max_edits=2))
+
+    def test_diff_text_falls_back_to_lines(self):
+        old = "line 1\nline 2\nline 3\n"
+        new = "line 1\nline two\nline 3\n"
+        chunks = diff_text(old, new, max_edits=2)
+        self.assertEqual(chunks, [(EQUAL, "line 1\n"), (DELETE, "line 2\n"),
+                                  (INSERT, "line two\n"), (EQUAL, "line 3\n")])
+
+    def test_diff_text_compares_replaced_lines_by_characters(self):
+        old = "AAAA\nCCCC\nGGGG\n"
+        new = "ATTA\nCCCC\nGTTG\n"
+        chunks = diff_text(old, new, max_edits=4)
+        self.assertEqual(chunks, [
+            (EQUAL, "A"), (DELETE, "AA"), (INSERT, "TT"),
+            (EQUAL, "A\nCCCC\nG"), (DELETE, "GG"), (INSERT, "TT"),
+            (EQUAL, "G\n")])
+
+    def test_diff_text_splits_lines_after_paragraphs(self):
+        old = "<p>AAAA</p><p>CCCC</p>"
+        new = "<p>AAAA</p><p>GGGG</p>"
+        chunks = diff_text(old, new, max_edits=2)
+        self.assertEqual(chunks, [(EQUAL, "<p>AAAA</p>"),
+                                  (DELETE, "<p>CCCC</p>"),
+                                  (INSERT, "<p>GGGG</p>")])
+
+    def test_diff_text_of_long_line_with_indels_stays_small(self):
+        rng = random.Random(0)
+        old = "".join(rng.choice("ACGT") for _ in range(100000))
+        new = old[:1000] + "GGG" + old[1000:60000] + old[60005:]
+        chunks = diff_text(old, new, max_edits=200)
+        self.assertEqual(apply_chunks(chunks), (old, new))
+        changed = sum(len(text) for tag, text in chunks if tag != EQUAL)
+        self.assertLessEqual(changed, 8)
+
+    def test_diff_text_skips_long_runs_of_repeated_text(self):
+        old = "C" + "A" * 100000 + "C"
+        new = "G" + "A" * 100000 + "G"
+        self.assertEqual(diff_text(old, new, max_edits=200), [
+            (DELETE, "C"), (INSERT, "G"), (EQUAL, "A" * 100000),
+            (DELETE, "C"), (INSERT, "G")])
+
+    def test_diff_text_replaces_whole_value_above_max_edits(self):
+        chunks = diff_text("AAAA", "TTTT", max_edits=2)
+        self.assertEqual(chunks, [(DELETE, "AAAA"), (INSERT, "TTTT")])
+
+    def test_render_inline_diff_escapes_and_shortens_equal_text(self):
+        html = render_inline_diff("<p>" + "A" * 20 + "C</p>",
+                                  "<p>" + "A" * 20 + "G</p>", context=3)
+        # only context before first change is shown
+        self.assertEqual(
+            html, '<span class="diff-skip">&hellip;</span>AAA'
+                  '<del class="diff-delete">C</del>'
+                  '<ins class="diff-insert">G</ins>&lt;/p&gt;')
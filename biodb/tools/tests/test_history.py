@@ -6,6 +6,7 @@ from unittest import TestCase
 from datetime import datetime
 
 from tools.history import generate_versions
+from tools.history import generate_versions_range
 from tools.history import CustomHistory
 
 
@@ -78,3 +79,28 @@ class HistoryTestCase(TestCase):
         differ_values = reference.get_differ_values("fieldname")
         # verify
         mock_get_differ_values.assert_called_with("fieldname")
+
+    def test_previous_version_is_not_queried_when_given(self):
+        sh_mock = mock_custom_history().curr_ver
+        previous = Mock()
+        custom_history = CustomHistory(sh_mock, 2, previous_version=previous)
+        self.assertEqual(custom_history.return_previous_version(), previous)
+        self.assertFalse(sh_mock.get_previous_by_history_date.called)
+
+    def test_generate_versions_links_adjacent_versions(self):
+        history = [mock_custom_history(num).curr_ver for num in range(3)]
+        versions = generate_versions(history)
+        # history is ordered newest first, versions oldest first
+        self.assertEqual([v.version_id for v in versions], [1, 2, 3])
+        self.assertIsNone(versions[0].return_previous_version())
+        self.assertEqual(versions[1].return_previous_version(), history[2])
+        self.assertEqual(versions[2].return_previous_version(), history[1])
+
+    def test_generate_versions_range_numbers_versions_absolutely(self):
+        history = [mock_custom_history(num).curr_ver for num in range(5)]
+        versions = generate_versions_range(history, 2, 4, count=5)
+        self.assertEqual([v.version_id for v in versions], [3, 2])
+        # oldest version on page is compared with object after range
+        self.assertEqual(versions[-1].return_previous_version(), history[4])
+        versions = generate_versions_range(history, 4, 5, count=5)
+        self.assertIsNone(versions[0].return_previous_version())
@@ -3,6 +3,8 @@ from django.contrib.auth.models import User
 from projects.models import Project
 from robjects.models import Robject
 from django.core.urlresolvers import reverse, resolve
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from guardian.shortcuts import assign_perm
 
 
@@ -122,3 +124,21 @@ class FunctionalTest(TestCase):
             self.assertIn(
                 f"<p>The requested URL {new_path} was not found on this server.</p>",
                 str(response.content))
+
+    def assertConstantNumQueries(self, url, add_row, data=None, rows=3):
+        """Assert that adding rows doesn't change number of queries of GET
+        request and return last response.
+
+            Args:
+                url: address of requested view
+                add_row: function creating single row shown by view
+                data: GET parameters
+                rows: number of rows added before second request
+        """
+        add_row()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url, data)
+        for _ in range(rows):
+            add_row()
+        with self.assertNumQueries(len(queries)):
+            return self.client.get(url, data)